@@ -0,0 +1,218 @@
+'''
+Benchmarks tokenization, each built-in feature module, and each model analyzer on synthetic corpora
+
+Example (100 files of 10KB each):
+	python benchmarks/bench.py --files 100 --file-size 10KB --output results.json
+'''
+#pylint: disable = wrong-import-position, wrong-import-order
+import os
+from os.path import join
+import re
+import sys
+import json
+import argparse
+from contextlib import contextmanager, redirect_stdout, redirect_stderr
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import context #pylint: disable=unused-import
+from synthetic_corpus import generate_tess_corpus, generate_parsed_english_corpus
+from qcrit import color as c
+from qcrit import textual_feature
+from qcrit.extract_features import main as extract_features, parse_tess
+import qcrit.features.ancient_greek_features
+import qcrit.features.universal_features
+import qcrit.features.parsed_english_features
+
+BENCHMARKS = ('tokenization', 'features', 'analyzers')
+_TOKENIZE_TYPES = ('sentences', 'words', 'sentence_words')
+#A leaf of a parse tree looks like "(TAG word)"
+_PARSED_WORD_REGEX = re.compile(r' [^()\s]+\)')
+
+@contextmanager
+def _quiet():
+	#Hide the output and progress bars of the code being measured
+	with open(os.devnull, mode='w') as devnull, redirect_stdout(devnull), redirect_stderr(devnull):
+		yield
+
+def _result(benchmark, name, seconds, files=None, tokens=None, fits=None, error=None):
+	return {
+		'benchmark': benchmark, 'name': name, 'seconds': seconds,
+		'files_per_second': files / seconds if files is not None and seconds else None,
+		'tokens_per_second': tokens / seconds if tokens is not None and seconds else None,
+		'fits_per_second': fits / seconds if fits is not None and seconds else None,
+		'error': error,
+	}
+
+def _count_tokens(tokenize_type, tokens):
+	return sum(len(sentence) for sentence in tokens) if tokenize_type == 'sentence_words' else len(tokens)
+
+def _parse_text(file_name):
+	with open(file_name, mode='r', encoding='utf-8') as file:
+		return file.read()
+
+def bench_tokenization(file_names):
+	'''
+	Time each tokenize type on its own (without deriving from other cached tokens), excluding parse time. Sentences
+	are also split by the fast sentence splitter with the same terminal punctuation, for comparison with Punkt
+	'''
+	fast_session = textual_feature.ExtractionSession(
+		terminal_punctuation=textual_feature.tokenizer_settings['terminal_punctuation'], sentence_splitter='fast'
+	)
+	tokenize_funcs = {
+		tokenize_type: textual_feature.tokenize_types[tokenize_type]['func'] for tokenize_type in _TOKENIZE_TYPES
+	}
+	tokenize_funcs['sentences (fast splitter)'] = fast_session.tokenize_types['sentences']['func']
+	seconds = {name: 0.0 for name in tokenize_funcs}
+	num_tokens = {name: 0 for name in tokenize_funcs}
+	for file_name in file_names:
+		text = parse_tess(file_name)
+		for name, tokenize in tokenize_funcs.items():
+			start = perf_counter()
+			tokens = tokenize(text)
+			seconds[name] += perf_counter() - start
+			num_tokens[name] += _count_tokens(name, tokens)
+	return [
+		_result('tokenization', name, seconds[name], len(file_names), num_tokens[name]) for name in tokenize_funcs
+	]
+
+def _module_features(module):
+	return [name for name, func in textual_feature.decorated_features.items() if func.__module__ == module.__name__]
+
+def bench_feature_module(module, corpus_dir, file_extension_to_parse_function, num_files, num_tokens, output_dir, jobs):
+	'''Time extract_features.main end to end on only the features of the given module'''
+	output_file = join(output_dir, f'{module.__name__}.pickle')
+	try:
+		start = perf_counter()
+		with _quiet():
+			extract_features(
+				corpus_dir=corpus_dir, file_extension_to_parse_function=file_extension_to_parse_function,
+				features=_module_features(module), output_file=output_file, jobs=jobs
+			)
+		return _result('features', module.__name__, perf_counter() - start, num_files, num_tokens)
+	except Exception as e: #pylint: disable = broad-except
+		return _result('features', module.__name__, perf_counter() - start, error=repr(e))
+
+@contextmanager
+def _count_fits(estimator_class, counter):
+	#Count every call to estimator_class.fit while inside the context
+	original_fit = estimator_class.fit
+	def fit(self, *args, **kwargs):
+		counter[estimator_class.__name__] = counter.get(estimator_class.__name__, 0) + 1
+		return original_fit(self, *args, **kwargs)
+	estimator_class.fit = fit
+	try:
+		yield
+	finally:
+		estimator_class.fit = original_fit
+
+def bench_analyzers(num_files, num_features, seed):
+	'''Time each decorated model analyzer on random data with two labels'''
+	#pylint: disable = import-outside-toplevel
+	import numpy as np
+	from sklearn import ensemble
+	from qcrit import model_analyzer
+	import qcrit.analysis.analyzers #pylint: disable = unused-import
+
+	rng = np.random.default_rng(seed)
+	target = np.arange(num_files) % 2
+	#Shift one label so that the classifiers have something to learn
+	data = rng.normal(size=(num_files, num_features)) + target[:, np.newaxis] * 0.5
+	file_names = [f'synthetic.{i}' for i in range(num_files)]
+	feature_names = [f'feature_{i}' for i in range(num_features)]
+	labels_key = {0: 'even', 1: 'odd'}
+
+	results = []
+	for name, analyzer in model_analyzer.DECORATED_ANALYZERS.items():
+		fits = {}
+		start = perf_counter()
+		try:
+			with _quiet(), _count_fits(ensemble.RandomForestClassifier, fits):
+				analyzer(data, target, file_names, feature_names, labels_key)
+			results.append(_result('analyzers', name, perf_counter() - start, num_files, fits=sum(fits.values())))
+		except Exception as e: #pylint: disable = broad-except
+			results.append(_result('analyzers', name, perf_counter() - start, error=repr(e)))
+	return results
+
+def _format_rate(rate):
+	return f'{rate:>14.2f}' if rate is not None else f'{"-":>14}'
+
+def print_results(results):
+	'''Display the results as a table'''
+	print(c.yellow(
+		f'{"benchmark":<14} {"name":<54} {"seconds":>10} {"files/s":>14} {"tokens/s":>14} {"fits/s":>14}'
+	))
+	for result in results:
+		print(
+			f'{result["benchmark"]:<14} {result["name"]:<54} {result["seconds"]:>10.4f} '
+			+ ' '.join(_format_rate(result[key]) for key in ('files_per_second', 'tokens_per_second', 'fits_per_second'))
+			+ (' ' + c.red(f'failed: {result["error"]}') if result['error'] else '')
+		)
+
+def run(
+	corpus_dir, num_files, file_size, seed=0, jobs=1, benchmarks=BENCHMARKS, analyzer_files=200,
+	analyzer_features=20
+):
+	'''Generate the corpora in corpus_dir (unless they were already generated) and return the benchmark results'''
+	tess_dir = join(corpus_dir, 'tess')
+	english_dir = join(corpus_dir, 'parsed_english')
+	if not os.path.isdir(tess_dir): generate_tess_corpus(tess_dir, num_files, file_size, seed)
+	if not os.path.isdir(english_dir): generate_parsed_english_corpus(english_dir, num_files, file_size, seed)
+	tess_files = sorted(join(tess_dir, name) for name in os.listdir(tess_dir))
+	english_files = sorted(join(english_dir, name) for name in os.listdir(english_dir))
+
+	results = []
+	if 'tokenization' in benchmarks:
+		results.extend(bench_tokenization(tess_files))
+	if 'features' in benchmarks:
+		num_tess_words = sum(len(textual_feature.word_tokenizer.word_tokenize(parse_tess(f))) for f in tess_files)
+		num_english_words = sum(len(_PARSED_WORD_REGEX.findall(_parse_text(f))) for f in english_files)
+		with TemporaryDirectory() as output_dir:
+			for module in (qcrit.features.ancient_greek_features, qcrit.features.universal_features):
+				results.append(bench_feature_module(
+					module, tess_dir, {'tess': parse_tess}, len(tess_files), num_tess_words, output_dir, jobs
+				))
+			results.append(bench_feature_module(
+				qcrit.features.parsed_english_features, english_dir, {'psd': _parse_text}, len(english_files),
+				num_english_words, output_dir, jobs
+			))
+	if 'analyzers' in benchmarks:
+		results.extend(bench_analyzers(analyzer_files, analyzer_features, seed))
+	return results
+
+def _parse_args(args):
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--files', type=int, default=100, help='number of files in each corpus (default 100)')
+	parser.add_argument('--file-size', default='10KB', help='approximate size of each file, e.g. 1KB or 100MB')
+	parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic corpora and data')
+	parser.add_argument('--jobs', type=int, default=1, help='number of processes used to extract features')
+	parser.add_argument(
+		'--benchmarks', nargs='+', choices=BENCHMARKS, default=BENCHMARKS, help='which benchmarks to run'
+	)
+	parser.add_argument('--analyzer-files', type=int, default=200, help='number of rows given to the analyzers')
+	parser.add_argument('--analyzer-features', type=int, default=20, help='number of columns given to the analyzers')
+	parser.add_argument(
+		'--corpus-dir', help='directory to generate the corpora in and reuse them from (default: a temporary directory)'
+	)
+	parser.add_argument('--output', help='json file to write the results to, for comparison between revisions')
+	return parser.parse_args(args)
+
+def _main(args):
+	args = _parse_args(args)
+	textual_feature.setup_tokenizers(terminal_punctuation=('.', ';'))
+	run_args = dict(
+		num_files=args.files, file_size=args.file_size, seed=args.seed, jobs=args.jobs, benchmarks=args.benchmarks,
+		analyzer_files=args.analyzer_files, analyzer_features=args.analyzer_features
+	)
+	if args.corpus_dir:
+		results = run(args.corpus_dir, **run_args)
+	else:
+		with TemporaryDirectory() as corpus_dir:
+			results = run(corpus_dir, **run_args)
+	print_results(results)
+	if args.output:
+		with open(args.output, mode='w') as output:
+			json.dump({'arguments': vars(args), 'results': results}, output, indent='\t')
+
+if __name__ == '__main__':
+	_main(sys.argv[1:])
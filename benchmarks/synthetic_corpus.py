@@ -0,0 +1,119 @@
+'''
+Generates synthetic corpora for benchmarking. Tess files are assembled from runs of lines of the demo texts, and
+parsed English files are assembled from sentences in the bracketed format of the Penn parsed corpora
+'''
+import os
+from os.path import join, dirname, abspath
+import re
+import random
+from glob import glob
+
+_DEMO_DIR = join(dirname(abspath(__file__)), '..', 'demo')
+_SIZE_UNITS = {'': 1, 'B': 1, 'KB': 1 << 10, 'MB': 1 << 20, 'GB': 1 << 30}
+_SIZE_REGEX = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*$', flags=re.IGNORECASE)
+#Lines are copied from the demo texts in runs so that sentences mostly stay intact
+_TESS_RUN_LENGTH = 20
+
+#Each line of a parsed English sentence is a constituent, and a relative clause ("SBAR" followed by "WHNP")
+#spans two lines like it does in the parsed corpora
+_ENGLISH_SUBJECTS = (
+	('(NP-SBJ (PRP he))',),
+	('(NP-SBJ (PRP they))',),
+	('(NP-SBJ (DT the) (NN king))',),
+	('(NP-SBJ (DT some) (NNS men))',),
+	('(NP-SBJ (DT the) (JJ other) (NN army))',),
+	('(NP-SBJ (DT the) (JJS greatest) (NN lord))',),
+	('(NP-SBJ (DT the) (NN man)', '(SBAR', '(WHNP-1 (WP who))', '(IP-SUB (VBDS came) (ADVP (RB then)))))'),
+)
+_ENGLISH_PREDICATES = (
+	('(VBD saw) (NP-OB1 (PRP himself))',),
+	('(MD would) (VB go) (PP (IN to) (NP (DT the) (NN hall)))',),
+	(
+		'(VBD ruled) (NP-OB1 (DT the) (NN land))', '(SBAR', '(WHNP-2 (WDT that))',
+		'(IP-SUB (NP-SBJ (PRP they)) (VBD held)))'
+	),
+	('(VBD fought) (CONJ and) (VBD fell)',),
+	('(VBD spoke) (PP (IN of) (NP (DT the) (ADJ same) (N oath)))',),
+	('(VBD left) (PP (IN because) (IP-SUB (PRP he) (VBD feared)))',),
+)
+_ENGLISH_OPENERS = (
+	(),
+	('(ADVP (RB moreover))',),
+	('(PP (IN since) (IP-SUB (NP-SBJ (PRP he)) (VBD came)))',),
+	('(PP (P +ta) (N hwile))',),
+	('(PP (IN in) (NP (N conclusion)))',),
+	('(INTJ (UH alas))',),
+	('(PP (IN if) (IP-SUB (NP-SBJ (PRP it)) (VBDS were)))',),
+)
+_ENGLISH_TERMINALS = ('(. .)', '(. .)', '(. .)', '(. ?)', '(. !)')
+
+def parse_size(size):
+	'''Convert a size such as 1024, "1KB", or "100MB" into a number of bytes'''
+	if isinstance(size, int): return size
+	match = _SIZE_REGEX.match(size)
+	if not match: raise ValueError(f'"{size}" is not a valid size (e.g. 1KB, 100MB)')
+	return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+def _demo_tess_lines():
+	lines = []
+	for file_name in sorted(glob(join(_DEMO_DIR, '*.tess'))):
+		with open(file_name, mode='r', encoding='utf-8') as tess_file:
+			#Drop the tags, new tags are given to each synthetic file
+			lines.extend(line[line.index('>') + 1:].strip() for line in tess_file if '>' in line)
+	return [line for line in lines if line]
+
+def _tess_chunks(rng, lines, tag):
+	#Yield runs of consecutive demo lines with tags numbered in order
+	line_num = 1
+	while True:
+		start = rng.randrange(len(lines))
+		for line in lines[start:start + _TESS_RUN_LENGTH]:
+			yield f'<{tag} {line_num}> {line}\n'
+			line_num += 1
+
+def _english_chunks(rng, _lines, tag):
+	#Yield one parsed sentence at a time
+	sentence_num = 1
+	while True:
+		lines = ['( (IP-MAT']
+		lines.extend(rng.choice(_ENGLISH_OPENERS))
+		lines.extend(rng.choice(_ENGLISH_SUBJECTS))
+		lines.extend(rng.choice(_ENGLISH_PREDICATES))
+		lines.append(rng.choice(_ENGLISH_TERMINALS) + ')')
+		lines.append(f'  (ID {tag}.{sentence_num}))')
+		yield '\n'.join(('  ' if 0 < i < len(lines) - 1 else '') + line for i, line in enumerate(lines)) + '\n\n'
+		sentence_num += 1
+
+def _generate_corpus(corpus_dir, num_files, file_size, seed, file_extension, chunks, lines):
+	file_size = parse_size(file_size)
+	if num_files < 1: raise ValueError('The number of files must be a positive integer')
+	if file_size < 1: raise ValueError('The file size must be positive')
+	os.makedirs(corpus_dir, exist_ok=True)
+	rng = random.Random(seed)
+	width = len(str(num_files - 1))
+	file_names = []
+	for i in range(num_files):
+		file_name = join(corpus_dir, f'synthetic.{i:0{width}d}.{file_extension}')
+		with open(file_name, mode='w', encoding='utf-8') as out:
+			size = 0
+			#Stop after the first chunk that reaches the size so that no line is cut off
+			for chunk in chunks(rng, lines, f'syn. {i}'):
+				out.write(chunk)
+				size += len(chunk.encode('utf-8'))
+				if size >= file_size: break
+		file_names.append(file_name)
+	return file_names
+
+def generate_tess_corpus(corpus_dir, num_files, file_size, seed=0):
+	'''
+	Write num_files .tess files of about file_size bytes each into corpus_dir, and return their paths.
+	The same seed always produces the same corpus
+	'''
+	return _generate_corpus(corpus_dir, num_files, file_size, seed, 'tess', _tess_chunks, _demo_tess_lines())
+
+def generate_parsed_english_corpus(corpus_dir, num_files, file_size, seed=0):
+	'''
+	Write num_files parsed English .psd files of about file_size bytes each into corpus_dir, and return their paths.
+	The same seed always produces the same corpus
+	'''
+	return _generate_corpus(corpus_dir, num_files, file_size, seed, 'psd', _english_chunks, None)
@@ -1,4 +1,4 @@
-# pylint: disable = trailing-whitespace, C0330, unused-argument
+# pylint: disable = trailing-whitespace, C0330, unused-argument, import-outside-toplevel
 '''
 Analyzers
 '''
@@ -8,26 +8,28 @@ import statistics
 from collections import Counter
 import warnings
 
-from sklearn.exceptions import UndefinedMetricWarning
 import numpy as np
-from tqdm import tqdm
-import sklearn
-from sklearn import svm, neural_network, naive_bayes, ensemble, neighbors
-from sklearn.model_selection import train_test_split, cross_val_score, StratifiedKFold, GridSearchCV
-from sklearn.inspection import permutation_importance
 
 from ..model_analyzer import model_analyzer
 
-#Ignores warning for undefined F1-score when a category is never predicted.
-warnings.filterwarnings(action='ignore', category=UndefinedMetricWarning)
-
 RED = '\033[91m'
 GREEN = '\033[92m'
 YELLOW = '\033[93m'
 PURPLE = '\033[95m'
 RESET = '\033[0m'
 
+def _import_sklearn():
+	#sklearn (and tqdm) take longer to import than the rest of qcrit, so they are only imported once an analyzer runs
+	import sklearn
+	import sklearn.metrics
+	from sklearn.exceptions import UndefinedMetricWarning
+
+	#Ignores warning for undefined F1-score when a category is never predicted.
+	warnings.filterwarnings(action='ignore', category=UndefinedMetricWarning)
+	return sklearn
+
 def _display_stats(expected, results, file_names, labels_key, tabs=0):
+	sklearn = _import_sklearn()
 	assert len(expected) == len(results)
 
 	#Obtain stats
@@ -61,6 +63,8 @@ def _display_stats(expected, results, file_names, labels_key, tabs=0):
 
 # @model_analyzer()
 # def random_forest_test(data, target, file_names, feature_names, labels_key):
+# 	from sklearn import ensemble
+# 	from sklearn.model_selection import train_test_split
 # 	print(RED + 'Random Forest tests' + RESET)
 
 # 	features_train, features_test, labels_train, labels_test = train_test_split(data, target, test_size=0.4, random_state=0)
@@ -75,6 +79,8 @@ def _display_stats(expected, results, file_names, labels_key, tabs=0):
 
 @model_analyzer()
 def random_forest_cross_validation(data, target, file_names, feature_names, labels_key):
+	from sklearn import ensemble
+	from sklearn.model_selection import StratifiedKFold
 	print(RED + 'Random Forest cross validation' + RESET)
 	clf = ensemble.RandomForestClassifier(random_state=0, n_estimators=10, max_features='sqrt')
 	splitter = StratifiedKFold(n_splits=5, shuffle=True, random_state=0)
@@ -98,6 +104,10 @@ def random_forest_cross_validation(data, target, file_names, feature_names, labe
 
 @model_analyzer()
 def random_forest_averaged_cross_validation(data, target, file_names, feature_names, labels_key):
+	sklearn = _import_sklearn()
+	from sklearn import ensemble
+	from sklearn.model_selection import StratifiedKFold
+	from tqdm import tqdm
 	numcorrect_numtotal_f1micro_f1macro_f1weighted = []
 	rf_trials = 10
 	kfold_trials = 10
@@ -163,6 +173,9 @@ def random_forest_averaged_cross_validation(data, target, file_names, feature_na
 
 @model_analyzer()
 def random_forest_misclassifications(data, target, file_names, feature_names, labels_key):
+	from sklearn import ensemble
+	from sklearn.model_selection import StratifiedKFold
+	from tqdm import tqdm
 	misclass_counter = Counter()
 	rf_trials = 10
 	kfold_trials = 10
@@ -216,6 +229,9 @@ def random_forest_misclassifications(data, target, file_names, feature_names, la
 
 @model_analyzer()
 def random_forest_gini_feature_rankings(data, target, file_names, feature_names, labels_key):
+	from sklearn import ensemble
+	from sklearn.model_selection import StratifiedKFold
+	from tqdm import tqdm
 	rf_trials = 10
 	kfold_trials = 10
 	splits = 5
@@ -263,6 +279,10 @@ def random_forest_gini_feature_rankings(data, target, file_names, feature_names,
 
 @model_analyzer()
 def random_forest_permutation_importance_feature_rankings(data, target, file_names, feature_names, labels_key):
+	from sklearn import ensemble
+	from sklearn.model_selection import StratifiedKFold
+	from sklearn.inspection import permutation_importance
+	from tqdm import tqdm
 	rf_trials = 5
 	kfold_trials = 5
 	splits = 5
@@ -324,6 +344,8 @@ def random_forest_permutation_importance_feature_rankings(data, target, file_nam
 
 # @model_analyzer()
 # def random_forest_hyper_parameters(data, target, file_names, feature_names, labels_key):
+# 	from sklearn import ensemble
+# 	from sklearn.model_selection import cross_val_score, GridSearchCV
 # 	print(f'{RED}Random Forest hyper parameter search:{RESET}')
 # 	default_forest_params = {
 # 		'bootstrap': True, 'class_weight': None, 'max_depth': None, 
@@ -353,6 +375,8 @@ def random_forest_permutation_importance_feature_rankings(data, target, file_nam
 
 # @model_analyzer()
 # def sample_classifiers(data, target, file_names, feature_names, labels_key):
+# 	from sklearn import svm, neural_network, naive_bayes, ensemble, neighbors
+# 	from sklearn.model_selection import train_test_split
 # 	#Includes a sample of several the machine learning classifiers
 # 	classifiers = [
 # 		ensemble.RandomForestClassifier(random_state=0, n_estimators=10, max_features='sqrt'), 
@@ -0,0 +1,133 @@
+'''
+Tokens stored as offsets into the text they come from, instead of as a string for each token
+'''
+from collections.abc import Sequence
+from itertools import chain
+
+import numpy as np
+
+def _offset_dtype(text):
+	return np.int32 if len(text) < 1 << 31 else np.int64
+
+def _spans_to_offsets(text, spans, count=-1):
+	#Flatten (start, end) tuples into an array without keeping the tuples
+	offsets = np.fromiter(chain.from_iterable(spans), dtype=_offset_dtype(text), count=count)
+	return offsets[0::2], offsets[1::2]
+
+class TokenOffsets(Sequence):
+	'''
+	A sequence of the tokens of a text, stored as the offsets where each token starts and ends. A token is only
+	created as a string when it is accessed, and slicing creates a view of the offsets instead of copying them, so
+	features that only need lengths or boundaries never create a string for each token
+	'''
+	__slots__ = ('text', 'starts', 'ends')
+
+	def __init__(self, text, starts, ends):
+		self.text = text
+		self.starts = starts
+		self.ends = ends
+
+	def __len__(self):
+		return len(self.starts)
+
+	def __getitem__(self, index):
+		if isinstance(index, slice):
+			return TokenOffsets(self.text, self.starts[index], self.ends[index])
+		return self.text[self.starts[index]:self.ends[index]]
+
+	def __iter__(self):
+		text = self.text
+		for start, end in zip(self.starts.tolist(), self.ends.tolist()):
+			yield text[start:end]
+
+	def __eq__(self, other):
+		if isinstance(other, TokenOffsets):
+			return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+		return NotImplemented
+
+	def __repr__(self):
+		return f'TokenOffsets({list(self[:10])}{"..." if len(self) > 10 else ""}, length={len(self)})'
+
+	@property
+	def nbytes(self):
+		'''Bytes of the offsets (the text is not included)'''
+		return self.starts.nbytes + self.ends.nbytes
+
+	def lengths(self):
+		'''Return an array of the number of characters in each token'''
+		return self.ends - self.starts
+
+class NestedTokenOffsets(Sequence):
+	'''
+	A sequence of groups of consecutive tokens (e.g. the words of each sentence). Group i is the TokenOffsets of
+	tokens[bounds[i]:bounds[i + 1]], created only when it is accessed. If groups is given, it is the TokenOffsets
+	of the text spanned by each group (e.g. the sentences themselves)
+	'''
+	__slots__ = ('tokens', 'bounds', 'groups')
+
+	def __init__(self, tokens, bounds, groups=None):
+		self.tokens = tokens
+		self.bounds = bounds
+		self.groups = groups
+
+	def __len__(self):
+		return len(self.bounds) - 1
+
+	def __getitem__(self, index):
+		if isinstance(index, slice):
+			return [self[i] for i in range(*index.indices(len(self)))]
+		if index < 0:
+			index += len(self)
+		if not 0 <= index < len(self):
+			raise IndexError('group index out of range')
+		return self.tokens[self.bounds[index]:self.bounds[index + 1]]
+
+	def __iter__(self):
+		bounds = self.bounds.tolist()
+		for start, end in zip(bounds, bounds[1:]):
+			yield self.tokens[start:end]
+
+	def __eq__(self, other):
+		if isinstance(other, NestedTokenOffsets):
+			return np.array_equal(self.bounds, other.bounds) and self.tokens == other.tokens
+		return NotImplemented
+
+	def __repr__(self):
+		return f'NestedTokenOffsets(groups={len(self)}, tokens={len(self.tokens)})'
+
+	@property
+	def nbytes(self):
+		'''Bytes of the offsets (the text is not included)'''
+		return self.tokens.nbytes + self.bounds.nbytes + (0 if self.groups is None else self.groups.nbytes)
+
+	def lengths(self):
+		'''Return an array of the number of tokens in each group'''
+		return np.diff(self.bounds)
+
+def regex_offsets(regex, text, pos=0, endpos=None):
+	'''Return the TokenOffsets of each match of the compiled regex in text[pos:endpos]'''
+	matches = regex.finditer(text, pos, len(text) if endpos is None else endpos)
+	return TokenOffsets(text, *_spans_to_offsets(text, (match.span() for match in matches)))
+
+def sentence_offsets(sentence_tokenizer, text):
+	'''Return the TokenOffsets of each sentence found by the nltk sentence tokenizer'''
+	return TokenOffsets(text, *_spans_to_offsets(text, sentence_tokenizer.span_tokenize(text)))
+
+def sentence_word_offsets(word_regex, sentences):
+	'''
+	Return the NestedTokenOffsets of the words of each sentence, given the compiled regex that matches words
+	and the TokenOffsets of the sentences
+	'''
+	text = sentences.text
+	bounds = np.zeros(len(sentences) + 1, dtype=_offset_dtype(text))
+	def spans():
+		for i, (start, end) in enumerate(zip(sentences.starts.tolist(), sentences.ends.tolist()), 1):
+			#Searching text between start and end matches exactly what searching text[start:end] would
+			num_words = 0
+			for match in word_regex.finditer(text, start, end):
+				num_words += 1
+				yield match.span()
+			bounds[i] = num_words
+	starts, ends = _spans_to_offsets(text, spans())
+	np.cumsum(bounds, out=bounds)
+	return NestedTokenOffsets(TokenOffsets(text, starts, ends), bounds, sentences)
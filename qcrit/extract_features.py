@@ -2,98 +2,507 @@
 Utilities for a feature extraction
 '''
 
-import pickle
 import os
 from os.path import join
-from io import StringIO
-import collections as clctn
-
-from tqdm import tqdm
+import re
+import mmap
+from time import perf_counter
+from collections.abc import Mapping
 
 from . import color as c
 from . import textual_feature
+from .feature_cache import FeatureCache
+from .feature_output import FeatureJournal, read_features, write_features
+from .profiling import ExtractionProfile
+
+#Text of a line after its tess tag, preceded by the closing '>' of the tag. The group is empty if the tag is never
+#closed. '<', '>', and newlines never occur inside multi-byte UTF-8 sequences, so the bytes of the file can be
+#searched directly. Starting the pattern with the newline before the tag lets the regex engine skip ahead instead
+#of testing every position of long lines
+_TESS_LINE = re.compile(rb'\n<[^>\n]*((?:>[^\n]*)?)')
+#Fallback for files that contain carriage returns, which also end lines when reading text files
+_TESS_LINE_UNIVERSAL_NEWLINES = re.compile(rb'(?:\A|(?<=[\r\n]))<[^>\r\n]*((?:>[^\r\n]*)?)')
+_TESS_CHUNK_SIZE = 1 << 22
+
+def _iter_tess_segments(file_name):
+	#Yield lists of the raw segments (see _TESS_LINE) of consecutive lines in the memory-mapped file
+	with open(file_name, mode='rb') as file:
+		if os.fstat(file.fileno()).st_size == 0:
+			return
+		with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+			if buffer.find(b'\r') != -1:
+				yield _TESS_LINE_UNIVERSAL_NEWLINES.findall(buffer)
+				return
+			#Precede the first line with a newline so that it is found by the same pattern as the other lines
+			first_newline = buffer.find(b'\n')
+			yield _TESS_LINE.findall(b'\n' + buffer[:len(buffer) if first_newline == -1 else first_newline])
+			#Every chunk starts at a newline, so no line is split between chunks
+			start = 0 if first_newline == -1 else first_newline
+			while start < len(buffer) and first_newline != -1:
+				end = buffer.find(b'\n', min(start + _TESS_CHUNK_SIZE, len(buffer)))
+				end = len(buffer) if end == -1 else end
+				yield _TESS_LINE.findall(buffer, start, end)
+				start = end
+
+def _decode_tess_segments(segments, file_name):
+	#Decode the segments in bulk, and return the list of their stripped texts
+	assert b'' not in segments, f'Malformed tess tag in {file_name}'
+	return list(map(str.strip, b'\n'.join(segments).decode('utf-8')[1:].split('\n>'))) if segments else []
+
+def iter_parse_tess(file_name):
+	'''
+	Yield the text of each line of a .tess file that has a tess tag, with the tag and surrounding whitespace removed.
+	Joining the yielded segments with spaces gives the text returned by parse_tess.
+	'''
+	for segments in _iter_tess_segments(file_name):
+		yield from _decode_tess_segments(segments, file_name)
 
 def parse_tess(file_name):
 	'''Used to parse tess tags found at the beginning of lines of .tess files'''
-	file_text = StringIO()
-	with open(file_name, mode='r', encoding='utf-8') as file:
-		for line in file:
-			#Ignore lines without tess tags, or parse the tag out and strip whitespace
-			if not line.startswith('<'):
-				continue
-			assert '>' in line, f'Malformed tess tag in {file_name}'
-			file_text.write(line[line.index('>') + 1:].strip())
-			file_text.write(' ')
-	return file_text.getvalue()
+	chunks = [
+		' '.join(texts) for texts in (
+			_decode_tess_segments(segments, file_name) for segments in _iter_tess_segments(file_name)
+		) if texts
+	]
+	if not chunks:
+		return ''
+	#Every line with a tess tag is followed by a space
+	chunks[-1] += ' '
+	return ' '.join(chunks)
 
 FILE_PARSERS = {
 	'tess': parse_tess,
 }
 
-def _get_filenames(corpus_dir, file_extensions, excluded_paths):
-	#Obtain all the files to parse by traversing through the corpus directory
+def _normalize_path(path):
+	return os.path.normcase(os.path.abspath(path))
+
+def _walk_corpus(corpus_dir, file_extensions, excluded_paths):
+	#Yield the DirEntry of every file to parse by traversing through the corpus directory. Like os.walk, symbolic
+	#links to directories are not followed
+	excluded_paths = {_normalize_path(path) for path in excluded_paths}
+	stack = [(corpus_dir, _normalize_path(corpus_dir))]
+	while stack:
+		current_path, normalized_path = stack.pop()
+		with os.scandir(current_path) as entries:
+			for entry in entries:
+				normalized_entry_path = join(normalized_path, os.path.normcase(entry.name))
+				if normalized_entry_path in excluded_paths:
+					continue
+				try:
+					is_dir = entry.is_dir()
+				except OSError:
+					is_dir = False
+				if is_dir:
+					if not entry.is_symlink():
+						stack.append((entry.path, normalized_entry_path))
+				elif '.' in entry.name and entry.name[entry.name.rindex('.') + 1:] in file_extensions:
+					yield entry
+
+_MANIFEST_FIELDS = ('path', 'size', 'mtime')
+
+def _write_manifest(manifest, corpus_dir, entries):
+	#Save the corpus directory, then the path, size, and modification time of every file found by the traversal, and
+	#return the paths
+	import csv #pylint:disable=import-outside-toplevel
+	file_names = []
+	with open(manifest, mode='w', newline='', encoding='utf-8') as manifest_file:
+		writer = csv.writer(manifest_file)
+		writer.writerow(('corpus_dir', _normalize_path(corpus_dir)))
+		writer.writerow(_MANIFEST_FIELDS)
+		for entry in entries:
+			stat = entry.stat()
+			writer.writerow((entry.path, stat.st_size, stat.st_mtime))
+			file_names.append(entry.path)
+	return file_names
+
+def _read_manifest(manifest, file_extensions=None, excluded_paths=(), corpus_dir=None):
+	#Obtain the paths saved in the manifest instead of traversing the corpus directory. If file_extensions is None,
+	#files of every extension are included. If corpus_dir is given, the manifest must have been saved for it, and the
+	#size and modification time of each included file must not have changed since
+	import csv #pylint:disable=import-outside-toplevel
+	excluded_paths = {_normalize_path(path) for path in excluded_paths}
 	file_names = []
-	for current_path, current_dir_names, current_file_names in os.walk(corpus_dir, topdown=True):
-		#Remove the excluded directories to prevent traversing into them
-		del_indexes = []
-		for i, cur_dir in enumerate(current_dir_names):
-			if join(current_path, cur_dir) + os.sep in excluded_paths:
-				del_indexes.append(i)
-		#Iterate backwards to prevent index removal issues
-		for i in range(len(del_indexes) - 1, -1, -1):
-			del current_dir_names[del_indexes[i]]
-
-		for current_file_name in current_file_names:
-			if '.' in current_file_name and current_file_name[current_file_name.rindex('.') + 1:] in file_extensions \
-			and join(current_path, current_file_name) not in excluded_paths:
-				file_names.append(join(current_path, current_file_name))
+	changed = []
+	with open(manifest, mode='r', newline='', encoding='utf-8') as manifest_file:
+		reader = csv.reader(manifest_file)
+		saved_corpus_dir = next(reader, ())
+		if len(saved_corpus_dir) != 2 or saved_corpus_dir[0] != 'corpus_dir' or tuple(next(reader, ())) != _MANIFEST_FIELDS:
+			raise ValueError(
+				f'"{manifest}" is not a manifest: it must start with the row corpus_dir,<directory> and then the header '
+				f'{",".join(_MANIFEST_FIELDS)}'
+			)
+		if corpus_dir is not None and saved_corpus_dir[1] != _normalize_path(corpus_dir):
+			raise ValueError(
+				f'"{manifest}" lists the files of "{saved_corpus_dir[1]}", not of "{_normalize_path(corpus_dir)}"'
+			)
+		for path, size, mtime in reader:
+			if file_extensions is not None and (
+				'.' not in os.path.basename(path) or path[path.rindex('.') + 1:] not in file_extensions
+			):
+				continue
+			#A path is excluded if it or any of its parent directories is excluded
+			normalized_path = _normalize_path(path)
+			while normalized_path not in excluded_paths and os.path.dirname(normalized_path) != normalized_path:
+				normalized_path = os.path.dirname(normalized_path)
+			if normalized_path not in excluded_paths:
+				file_names.append(path)
+				if corpus_dir is not None:
+					try:
+						stat = os.stat(path)
+					except OSError:
+						changed.append(path)
+						continue
+					if stat.st_size != int(size) or stat.st_mtime != float(mtime):
+						changed.append(path)
+	if changed:
+		raise ValueError(
+			f'The following files have changed or been removed since "{manifest}" was saved. Delete it so that the '
+			'corpus is traversed again: {\n\t' + '\n\t'.join(changed) + '\n}'
+		)
+	return file_names
+
+def _get_filenames(corpus_dir, file_extensions, excluded_paths, manifest=None):
+	#Obtain all the files to parse, from the manifest if it exists, or else by traversing through the corpus directory
+	#(saving the manifest if one was requested)
+	if manifest is not None and os.path.isfile(manifest):
+		file_names = _read_manifest(manifest, file_extensions, excluded_paths, corpus_dir)
+	elif manifest is not None:
+		file_names = _write_manifest(manifest, corpus_dir, _walk_corpus(corpus_dir, file_extensions, excluded_paths))
+	else:
+		file_names = [entry.path for entry in _walk_corpus(corpus_dir, file_extensions, excluded_paths)]
 	return sorted(file_names)
 
-def _extract_features(corpus_dir, file_extension_to_parse_function, excluded_paths, features, output_file):
-	file_names = _get_filenames(corpus_dir, file_extension_to_parse_function.keys(), excluded_paths)
-	feature_tuples = [(name, textual_feature.decorated_features[name]) for name in features]
-	text_to_features = {} #Associates file names to their respective features
+def _parse_file(file_name, file_extension_to_parse_function, profiler=None):
+	file_extension = file_name[file_name.rindex('.') + 1:]
+	start = perf_counter()
+	file_text = file_extension_to_parse_function[file_extension](file_name)
+	if profiler is not None:
+		profiler.record('parse', file_extension, file_name, perf_counter() - start)
+	return file_text
+
+def _extract_file_features(file_name, file_extension_to_parse_function, feature_tuples, file_text=None, profiler=None):
+	#Compute every feature in feature_tuples for a single file, parsing it unless its text is given
+	scores = {}
+	if file_text is None:
+		file_text = _parse_file(file_name, file_extension_to_parse_function, profiler)
+
+	for feature_name, feature_func in feature_tuples:
+		try:
+			score = feature_func(text=file_text, filepath=file_name)
+		except Exception as exp:
+			import sys #pylint:disable=import-outside-toplevel
+			print(f'Error while parsing {file_name}', file=sys.stderr)
+			raise exp
+		scores[feature_name] = score
+	return scores
+
+#State of a worker process in the process pool, assigned once by _init_worker
+_worker_state = {}
+
+def _init_worker(tokenizer_settings, file_extension_to_parse_function, profile, token_cache_dir, features):
+	#Each worker process gets a session of its own, with its own tokenizers and token caches
+	session = textual_feature.ExtractionSession(features=features)
+	session.setup_tokenizers(**tokenizer_settings)
+	session.set_token_cache_dir(token_cache_dir)
+	session.profiler = ExtractionProfile() if profile else None
+	_worker_state['session'] = session
+	_worker_state['file_extension_to_parse_function'] = file_extension_to_parse_function
+
+def _extract_file_features_in_worker(file_name, features):
+	session = _worker_state['session']
+	scores = _extract_file_features(
+		file_name, _worker_state['file_extension_to_parse_function'],
+		[(name, session.decorated_features[name]) for name in features], profiler=session.profiler
+	)
+	#Send the timings back to the parent process along with the scores
+	return file_name, scores, session.profiler.pop_records() if session.profiler else None
+
+def _extract_features_in_parallel(file_to_features, file_extension_to_parse_function, jobs, session):
+	#pylint:disable=import-outside-toplevel
+	import multiprocessing
+	from concurrent.futures import ProcessPoolExecutor, as_completed
+
+	#Forking lets workers inherit features that were declared in the __main__ module, as well as parse
+	#functions that cannot be pickled (e.g. lambdas)
+	mp_context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+
+	#Schedule the largest files first so that a single long file does not hold up the end of the run
+	schedule = sorted(file_to_features, key=lambda file_name: (-os.path.getsize(file_name), file_name))
+	with ProcessPoolExecutor(
+		max_workers=jobs, mp_context=mp_context, initializer=_init_worker,
+		initargs=(
+			session.tokenizer_settings, file_extension_to_parse_function, session.profiler is not None,
+			session.disk_token_cache and session.disk_token_cache.cache_dir,
+			tuple(session.decorated_features[name] for name in set().union(*file_to_features.values())),
+		),
+	) as executor:
+		futures = [
+			executor.submit(_extract_file_features_in_worker, file_name, file_to_features[file_name])
+			for file_name in schedule
+		]
+		for future in as_completed(futures):
+			file_name, scores, profile_records = future.result()
+			if profile_records:
+				session.profiler.records.extend(profile_records)
+			yield file_name, scores
+
+def _prefetch_parsed_files(file_names, file_extension_to_parse_function, prefetch, profiler=None):
+	#Yield a tuple of each file name and its parsed text in order, while the next prefetch files are read and parsed
+	#in background threads. At most prefetch parsed texts are held besides the one being yielded
+	#pylint:disable=import-outside-toplevel
+	from concurrent.futures import ThreadPoolExecutor
+	from collections import deque
+
+	file_names = iter(file_names)
+	pending = deque()
+	with ThreadPoolExecutor(max_workers=prefetch) as executor:
+		def submit_next():
+			file_name = next(file_names, None)
+			if file_name is not None:
+				pending.append((file_name, executor.submit(
+					_parse_file, file_name, file_extension_to_parse_function, profiler
+				)))
+		try:
+			for _ in range(prefetch):
+				submit_next()
+			while pending:
+				file_name, future = pending.popleft()
+				file_text = future.result()
+				submit_next()
+				yield file_name, file_text
+		finally:
+			#Do not finish reading ahead if the extraction stopped early
+			for _, future in pending:
+				future.cancel()
+
+def _compute_features(file_to_features, file_extension_to_parse_function, jobs, session, prefetch=0):
+	#Yield a tuple of the file name and its scores as each file is completed
+	if jobs == 1 and prefetch:
+		for file_name, file_text in _prefetch_parsed_files(
+			file_to_features, file_extension_to_parse_function, prefetch, session.profiler
+		):
+			yield file_name, _extract_file_features(
+				file_name, file_extension_to_parse_function,
+				[(name, session.decorated_features[name]) for name in file_to_features[file_name]],
+				file_text
+			)
+	elif jobs == 1:
+		for file_name, features in file_to_features.items():
+			yield file_name, _extract_file_features(
+				file_name, file_extension_to_parse_function,
+				[(name, session.decorated_features[name]) for name in features], profiler=session.profiler
+			)
+	else:
+		yield from _extract_features_in_parallel(file_to_features, file_extension_to_parse_function, jobs, session)
+
+def _journal_file(output_file):
+	return f'{output_file}{os.extsep}partial'
+
+#pylint: disable = too-many-locals
+def _extract_features(
+	corpus_dir, file_extension_to_parse_function, excluded_paths, features, output_file, jobs=1, cache_file=None,
+	resume=False, profile=False, prefetch=0, manifest=None, shard_index=None, shard_count=None, augment=False,
+	token_cache_dir=None, session=None, tokenize_jobs=1
+):
+	if session is None: session = textual_feature.default_session
+	session.profiler = ExtractionProfile() if profile else None
+	session.set_token_cache_dir(token_cache_dir)
+	session.set_tokenize_jobs(tokenize_jobs, session.parallel_min_chars)
+	try:
+		_run_extraction(
+			corpus_dir, file_extension_to_parse_function, excluded_paths, features, output_file, jobs, cache_file, resume,
+			prefetch, manifest, shard_index, shard_count, augment, session
+		)
+		if profile:
+			print(c.yellow('\nExtraction profile (seconds summed across all files):'))
+			session.profiler.print_hotspots()
+			if output_file is not None:
+				session.profiler.write(_profile_file_prefix(output_file))
+				print(f'Profile written to "{c.yellow(_profile_file_prefix(output_file))}.csv" and ".json"')
+	finally:
+		session.profiler = None
+		session.set_token_cache_dir(None)
+		session.set_tokenize_jobs(1, session.parallel_min_chars)
+
+def _profile_file_prefix(output_file):
+	return f'{output_file}{os.extsep}profile'
+
+def _run_extraction(
+	corpus_dir, file_extension_to_parse_function, excluded_paths, features, output_file, jobs, cache_file, resume,
+	prefetch, manifest, shard_index, shard_count, augment, session
+):
+	file_names = _get_filenames(corpus_dir, file_extension_to_parse_function.keys(), excluded_paths, manifest)
+	if shard_count is not None:
+		#Every shard_count-th file starting from shard_index, so that shards are of nearly equal size and together
+		#cover each file exactly once
+		num_files = len(file_names)
+		file_names = file_names[shard_index::shard_count]
+		print(f'Shard {shard_index} of {shard_count}: {len(file_names)} of {num_files} files')
 	print(
 		f'Extracting features from file with extensions '
 		f'[{", ".join(file_extension_to_parse_function.keys())}] in directory {c.yellow(corpus_dir)}'
 	)
 
-	#Feature extraction
-	for file_name in file_names if output_file is None else tqdm(file_names, dynamic_ncols=True):
-		text_to_features[file_name] = {}
-		file_extension = file_name[file_name.rindex('.') + 1:]
-		file_text = file_extension_to_parse_function[file_extension](file_name)
-
-		for feature_name, feature_func in feature_tuples:
-			try:
-				score = feature_func(text=file_text, filepath=file_name)
-			except Exception as exp:
-				import sys #pylint:disable=import-outside-toplevel
-				print(f'Error while parsing {file_name}', file=sys.stderr)
-				raise exp
-			text_to_features[file_name][feature_name] = score
-			if output_file is None:
-				print(f'{file_name}, {str(feature_name)}, {c.green(str(score))}')
-
-	textual_feature.clear_cache()
-
-	if output_file is not None:
+	#When augmenting, the scores already in the output file are kept, and the output has both its features and the
+	#given features. Only the features a file is missing are computed
+	existing_scores = {}
+	if augment:
+		existing_scores = read_features(output_file)
+		features = list(dict.fromkeys(
+			[feature for scores in existing_scores.values() for feature in scores] + list(features)
+		))
+		undecorated = {
+			feature for file_name in file_names for feature in features
+			if feature not in existing_scores.get(file_name, {}) and feature not in session.decorated_features
+		}
+		if undecorated:
+			raise ValueError(
+				f'The features {sorted(undecorated)} are missing from some files in "{output_file}", '
+				f'but they are not among the decorated features'
+			)
+		removed = sorted(existing_scores.keys() - set(file_names))
+		if removed:
+			import sys #pylint:disable=import-outside-toplevel
+			print(
+				f'The following texts have data in "{output_file}" but are no longer in the corpus. '
+				'They will be omitted from the output: {\n\t' + '\n\t'.join(removed) + '\n}',
+				file=sys.stderr
+			)
+
+	#Scores are streamed into a journal as each file is completed, unless they are only displayed
+	journal = None if output_file is None else FeatureJournal(_journal_file(output_file), resume=resume)
+	text_to_features = {} #Associates file names to their respective features when there is no output file
+	def record(file_name, scores):
+		if journal is None:
+			text_to_features[file_name] = scores
+		else:
+			journal.append(file_name, scores)
+
+	cache = None if cache_file is None else FeatureCache(cache_file, session)
+	try:
+		#Skip features that were already recorded, and obtain previously computed scores from the cache,
+		#so that only the missing features of each file get computed
+		cached_scores = {}
+		cache_keys = {}
+		file_to_missing_features = {}
+		for file_name in file_names:
+			recorded = journal.recorded.get(file_name, ()) if journal is not None else ()
+			existing = existing_scores.get(file_name, ())
+			features_to_obtain = [name for name in features if name not in recorded and name not in existing]
+			if not features_to_obtain:
+				continue
+			scores = {}
+			if cache is not None:
+				scores, cache_keys[file_name] = cache.lookup(
+					file_name, file_extension_to_parse_function[file_name[file_name.rindex('.') + 1:]],
+					features_to_obtain
+				)
+			missing_features = [name for name in features_to_obtain if name not in scores]
+			if session.profiler is not None:
+				for name in scores:
+					session.profiler.record('feature', name, file_name, 0.0, cache_hit=True)
+			if missing_features:
+				file_to_missing_features[file_name] = missing_features
+				cached_scores[file_name] = scores
+			else:
+				record(file_name, scores)
+
+		#Feature extraction
+		progress_bar = None
+		if output_file is not None:
+			from tqdm import tqdm #pylint:disable=import-outside-toplevel
+			progress_bar = tqdm(total=len(file_to_missing_features), dynamic_ncols=True)
+		try:
+			for file_name, scores in _compute_features(
+				file_to_missing_features, file_extension_to_parse_function, jobs, session, prefetch
+			):
+				if cache is not None:
+					cache.store(cache_keys[file_name], scores)
+				record(file_name, {**cached_scores.pop(file_name), **scores})
+				if progress_bar is not None:
+					progress_bar.update()
+		finally:
+			if progress_bar is not None:
+				progress_bar.close()
+	finally:
+		if cache is not None:
+			cache.close()
+		if journal is not None:
+			journal.close()
+
+	token_stats = session.cache_stats()
+	session.clear_cache()
+	#Worker processes have token caches of their own
+	if jobs == 1:
+		print(
+			f'Token cache: {c.green(str(token_stats["hits"]))} hits, {c.yellow(str(token_stats["misses"]))} misses, '
+			f'{c.yellow(str(token_stats["evictions"]))} evictions'
+		)
+		if 'disk' in token_stats:
+			print(
+				f'Token cache directory: {c.green(str(token_stats["disk"]["hits"]))} hits, '
+				f'{c.yellow(str(token_stats["disk"]["misses"]))} misses'
+			)
+
+	if cache is not None:
+		print(f'Feature cache: {c.green(str(cache.hits))} hits, {c.yellow(str(cache.misses))} misses')
+
+	if output_file is None:
+		for file_name in file_names:
+			for feature_name in features:
+				print(f'{file_name}, {str(feature_name)}, {c.green(str(text_to_features[file_name][feature_name]))}')
+	else:
 		print(f'Feature mining complete. Attempting to write feature results to "{c.yellow(output_file)}"...')
-		with open(output_file, 'wb') as pickle_file:
-			pickle_file.write(pickle.dumps(text_to_features))
+		journal.finalize(output_file, file_names, features, existing_scores)
 		print(c.green('Success!'))
 
+def _check_output_file(output_file):
+	if not isinstance(output_file, str): raise ValueError('Output file must be a string for a file path')
+	if os.path.isfile(output_file): raise ValueError(f'Output file "{output_file}" already exists!')
+	if os.path.isdir(output_file):
+		raise ValueError(f'The end of the path "{output_file}" is a directory - please specify a filename')
+	if os.sep in output_file and not os.path.isdir(os.path.dirname(output_file)):
+		raise ValueError(f'"{os.path.dirname(output_file)}" is not a valid directory!')
+
 # Keys of file_extension_to_parse_function must not include the dot e.g. use txt not .txt
-# If excluded_paths is given, it must be a set and it can contain files or directories (the directories must
-# end in a file separator e.g. slash on Mac or Linux)
-#pylint: disable = too-many-branches
-def main(corpus_dir, file_extension_to_parse_function, excluded_paths=None, features=None, output_file=None):
+# If excluded_paths is given, it must be a set and it can contain files or directories
+# If jobs is greater than 1, files are spread across that many worker processes
+# If cache_file is given, scores are stored in it (it is created if necessary) and reused by later runs for
+# any file, feature, and tokenizer settings that have not changed since
+# Scores are appended to "<output_file>.partial" as each file is completed. If a run is interrupted, run again
+# with resume=True to skip the files that were already recorded
+# If profile is True, the time spent parsing, tokenizing, and computing each feature for each file is recorded.
+# A table of the hotspots is displayed, and the timings are written to "<output_file>.profile.csv" and ".json"
+# If prefetch is positive and jobs is 1, the next prefetch files are read and parsed in background threads while
+# the features of the current file are computed
+# If manifest is given and the file exists, the files listed in it are used instead of traversing corpus_dir. It must
+# have been saved for corpus_dir, and the size and modification time of every listed file must be unchanged.
+# Otherwise corpus_dir is traversed and it, along with the path, size, and modification time of each file, is saved
+# to manifest
+# If shard_index and shard_count are given, only the files at positions shard_index, shard_index + shard_count,
+# shard_index + 2 * shard_count, etc. of the sorted files are extracted. Combine the outputs of every shard with merge
+# If augment is True, output_file must already exist. Its scores are kept, only the features that are missing from it
+# are computed, and then it is replaced with the combined scores
+# If token_cache_dir is given, the tokens of each text are stored in it as offsets (it is created if necessary), and
+# later runs with the same tokenizer settings load them with memory mapping instead of tokenizing the text again
+# If session is given, its tokenizers and features are used instead of those of the textual_feature decorator
+# If tokenize_jobs is greater than 1 and jobs is 1, each text of at least session.parallel_min_chars characters is
+# split into chunks that are tokenized in that many processes. The tokens are identical to those of serial tokenization,
+# except that the sentences of Punkt could rarely differ near a split
+#pylint: disable = too-many-branches, too-many-arguments
+def main(
+	corpus_dir, file_extension_to_parse_function, excluded_paths=None, features=None, output_file=None, jobs=1,
+	cache_file=None, resume=False, profile=False, prefetch=0, manifest=None, shard_index=None, shard_count=None,
+	augment=False, token_cache_dir=None, session=None, tokenize_jobs=1
+):
 	'''Run feature extraction on all decorated features'''
 	if excluded_paths is None: excluded_paths = set()
-	if features is None: features = textual_feature.decorated_features.keys()
+	if session is None: session = textual_feature.default_session
+	if features is None: features = session.decorated_features.keys()
 
 	if not corpus_dir: raise ValueError('Must provide a directory that contains the corpus')
-	if not file_extension_to_parse_function or not isinstance(file_extension_to_parse_function, clctn.Mapping):
+	if not file_extension_to_parse_function or not isinstance(file_extension_to_parse_function, Mapping):
 		raise ValueError('Must provide a mapping from file extensions to functions specifying how to parse them')
 	if None in file_extension_to_parse_function:
 		raise ValueError('The keys of file_extension_to_parse_function must not be None')
@@ -113,20 +522,58 @@ def main(corpus_dir, file_extension_to_parse_function, excluded_paths=None, feat
 	if not isinstance(excluded_paths, set): raise ValueError('Excluded paths must be in a set')
 	if not all(os.path.isfile(path) or os.path.isdir(path) for path in excluded_paths):
 		raise ValueError(f'Each path in {str(excluded_paths)} must be a valid path for a file or directory!')
-	if not all(name in textual_feature.decorated_features.keys() for name in features):
+	if not all(name in session.decorated_features.keys() for name in features):
 		raise ValueError(
-			f'The values in set {str(set(features) - textual_feature.decorated_features.keys())} '
-			f'are not among the decorated features in {str(textual_feature.decorated_features.keys())}'
+			f'The values in set {str(set(features) - session.decorated_features.keys())} '
+			f'are not among the decorated features in {str(session.decorated_features.keys())}'
 		)
 
-	if output_file:
+	if augment and not output_file: raise ValueError('Cannot augment without an output file')
+	if augment:
 		if not isinstance(output_file, str): raise ValueError('Output file must be a string for a file path')
-		if os.path.isfile(output_file): raise ValueError(f'Output file "{output_file}" already exists!')
-		if os.path.isdir(output_file):
-			raise ValueError(f'The end of the path "{output_file}" is a directory - please specify a filename')
-		if os.sep in output_file and not os.path.isdir(os.path.dirname(output_file)):
-			raise ValueError(f'"{os.path.dirname(output_file)}" is not a valid directory!')
+		if not os.path.isfile(output_file): raise ValueError(f'Output file "{output_file}" does not exist to augment!')
+	if output_file:
+		if not augment:
+			_check_output_file(output_file)
+		if not resume and os.path.isfile(_journal_file(output_file)):
+			raise ValueError(
+				f'Partial output "{_journal_file(output_file)}" already exists! Use resume=True to continue'
+				' the interrupted extraction, or delete it'
+			)
 	elif output_file is not None: raise ValueError('Output file must be truthy, or None')
+	if resume and output_file is None: raise ValueError('Cannot resume without an output file')
+
+	if not isinstance(jobs, int) or isinstance(jobs, bool) or jobs < 1:
+		raise ValueError('The number of jobs must be a positive integer')
+	if jobs > 1 and session.tokenizer_settings is None:
+		raise ValueError(
+			'Tokenizers not initialized: Use "setup_tokenizers(terminal_punctuation=<tuple of punctutation>)"'
+			' before extracting features in parallel'
+		)
+	if not isinstance(tokenize_jobs, int) or isinstance(tokenize_jobs, bool) or tokenize_jobs < 1:
+		raise ValueError('The number of tokenize jobs must be a positive integer')
+	if jobs > 1 and tokenize_jobs > 1:
+		raise ValueError('Texts can only be tokenized in parallel when jobs is 1')
+
+	if not isinstance(prefetch, int) or isinstance(prefetch, bool) or prefetch < 0:
+		raise ValueError('The number of files to prefetch must be a non-negative integer')
+	if manifest is not None:
+		if not manifest or not isinstance(manifest, str): raise ValueError('Manifest must be a string for a file path')
+		if os.path.isdir(manifest):
+			raise ValueError(f'The end of the path "{manifest}" is a directory - please specify a filename')
+		if os.path.dirname(manifest) and not os.path.isdir(os.path.dirname(manifest)):
+			raise ValueError(f'"{os.path.dirname(manifest)}" is not a valid directory!')
+	if (shard_index is None) != (shard_count is None):
+		raise ValueError('shard_index and shard_count must be given together')
+	if shard_count is not None:
+		if not all(isinstance(n, int) and not isinstance(n, bool) for n in (shard_index, shard_count)) \
+		or shard_count < 1 or not 0 <= shard_index < shard_count:
+			raise ValueError('shard_count must be a positive integer, and shard_index must be in [0, shard_count)')
+	if token_cache_dir is not None:
+		if not token_cache_dir or not isinstance(token_cache_dir, str):
+			raise ValueError('Token cache directory must be a string for a directory path')
+		if os.path.exists(token_cache_dir) and not os.path.isdir(token_cache_dir):
+			raise ValueError(f'"{token_cache_dir}" is not a directory')
 
 	from timeit import timeit
 	from functools import partial
@@ -135,9 +582,61 @@ def main(corpus_dir, file_extension_to_parse_function, excluded_paths=None, feat
 			'Feature mining elapsed time: ' + '%.4f' % timeit(
 				partial(
 					_extract_features, corpus_dir, file_extension_to_parse_function,
-					excluded_paths, features, output_file
+					excluded_paths, features, output_file, jobs, cache_file, resume, profile, prefetch, manifest,
+					shard_index, shard_count, augment, token_cache_dir, session, tokenize_jobs
 				),
 				number=1
 			) + ' seconds'
 		)
 	)
+
+# Each of shard_files is the output_file of main for one shard. Files that occur in more than one shard are reported,
+# and the scores of the first shard listed are kept. If manifest is given, the files it lists that are not in any shard
+# are reported. Returns the overlapping and missing files
+def merge(shard_files, output_file, manifest=None):
+	'''Combine the outputs of sharded feature extraction into output_file'''
+	import sys #pylint:disable=import-outside-toplevel
+	if not shard_files or isinstance(shard_files, str):
+		raise ValueError('Must provide a list of the output files of the shards')
+	for shard_file in shard_files:
+		if not os.path.isfile(shard_file): raise ValueError(f'File "{shard_file}" does not exist')
+	if not output_file: raise ValueError('Must provide an output file')
+	_check_output_file(output_file)
+	if manifest is not None and not os.path.isfile(manifest): raise ValueError(f'File "{manifest}" does not exist')
+
+	text_to_features = {}
+	file_to_shards = {}
+	expected_features = None
+	for shard_file in shard_files:
+		shard = read_features(shard_file)
+		for file_name, scores in shard.items():
+			if expected_features is None:
+				expected_features = (shard_file, set(scores))
+			elif set(scores) != expected_features[1]:
+				raise ValueError(
+					f'The features of "{file_name}" in "{shard_file}" do not match the features in '
+					f'"{expected_features[0]}": {sorted(set(scores) ^ expected_features[1])} are not in both'
+				)
+			file_to_shards.setdefault(file_name, []).append(shard_file)
+			text_to_features.setdefault(file_name, scores)
+
+	overlapping = sorted(file_name for file_name, shards in file_to_shards.items() if len(shards) > 1)
+	if overlapping:
+		print(
+			'The following texts occur in more than one shard. The scores from the first shard are kept: {\n\t'
+			+ '\n\t'.join(f'{file_name}: {file_to_shards[file_name]}' for file_name in overlapping) + '\n}',
+			file=sys.stderr
+		)
+	missing = []
+	if manifest is not None:
+		missing = sorted(set(_read_manifest(manifest)) - text_to_features.keys())
+		if missing:
+			print(
+				f'The following texts are in "{manifest}" but not in any shard: {{\n\t' + '\n\t'.join(missing) + '\n}',
+				file=sys.stderr
+			)
+
+	print(f'Merging {len(text_to_features)} texts from {len(shard_files)} shards into "{c.yellow(output_file)}"...')
+	write_features(output_file, {file_name: text_to_features[file_name] for file_name in sorted(text_to_features)})
+	print(c.green('Success!'))
+	return overlapping, missing
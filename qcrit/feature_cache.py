@@ -0,0 +1,117 @@
+'''
+Persistent cache of feature scores
+
+Scores are keyed by the hash of the file contents, the name of the feature, the hash of the
+source code of the feature, of the module that defines it (which holds the tables, such as lexicons, that a feature
+may only read), of the functions that compute its tokenize type, and of the function that parsed the file, and the
+tokenizer settings. Editing a file or a feature therefore only invalidates the scores that depend on it.
+'''
+import hashlib
+import inspect
+import pickle
+import sqlite3
+
+from . import textual_feature
+
+def _function_hash(func):
+	#Hash the source code of a function so that editing it invalidates its cached scores
+	func = inspect.unwrap(func)
+	try:
+		source = inspect.getsource(func).encode('utf-8')
+	except (OSError, TypeError):
+		#The source is unavailable (e.g. the function was declared in an interactive session)
+		code = getattr(func, '__code__', None)
+		source = repr(func).encode('utf-8') if code is None else code.co_code + repr(code.co_consts).encode('utf-8')
+	return hashlib.sha256(source).hexdigest()
+
+def _module_hash(func):
+	#Hash the source code of the module that defines a function, so that editing the tables it reads (e.g. lexicons,
+	#patterns, or phrases) invalidates its cached scores
+	module = inspect.getmodule(inspect.unwrap(func))
+	try:
+		source = inspect.getsource(module).encode('utf-8')
+	except (OSError, TypeError):
+		return ''
+	return hashlib.sha256(source).hexdigest()
+
+def _tokenize_type_hash(session, tokenize_type):
+	#Hash the source code of the functions that compute the tokens of a tokenize type (and of the modules that define
+	#them), along with those of the tokenize types that it is derived from
+	entry = session.tokenize_types[tokenize_type]
+	functions = [entry['func']] + ([entry['derive']] if 'derive' in entry else [])
+	parts = [_function_hash(func) for func in functions] + [_module_hash(func) for func in functions]
+	parts += [_tokenize_type_hash(session, dependency) for dependency in entry.get('derive_from', ())]
+	return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+def _file_hash(file_name):
+	sha = hashlib.sha256()
+	with open(file_name, mode='rb') as file:
+		for block in iter(lambda: file.read(1 << 20), b''):
+			sha.update(block)
+	return sha.hexdigest()
+
+class FeatureCache:
+	'''
+	Stores feature scores in a sqlite database so that reruns only compute changed files and features. The features
+	and tokenizer settings are those of session (textual_feature.default_session if it is not given)
+	'''
+
+	def __init__(self, cache_file, session=None):
+		if session is None: session = textual_feature.default_session
+		self._session = session
+		self.hits = 0
+		self.misses = 0
+		self._connection = sqlite3.connect(cache_file)
+		self._connection.execute('CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, score BLOB NOT NULL)')
+		self._settings = repr((
+			sorted((session.tokenizer_settings or {}).items()), textual_feature.NON_WORD_CHARS
+		))
+		self._function_hashes = {}
+		self._feature_hashes = {}
+
+	def _hash_of(self, func):
+		if func not in self._function_hashes:
+			self._function_hashes[func] = _function_hash(func)
+		return self._function_hashes[func]
+
+	def _feature_hash(self, name):
+		if name not in self._feature_hashes:
+			feature = self._session.decorated_features[name]
+			self._feature_hashes[name] = '\0'.join((
+				self._hash_of(feature), _module_hash(feature), _tokenize_type_hash(self._session, feature.tokenize_type)
+			))
+		return self._feature_hashes[name]
+
+	def lookup(self, file_name, parse_function, feature_names):
+		'''
+		Return a tuple of the cached scores for the file as a dict, and the cache keys for all the given features
+		'''
+		file_hash = _file_hash(file_name)
+		keys = {
+			name: hashlib.sha256('\0'.join((
+				file_hash, name, self._feature_hash(name),
+				self._hash_of(parse_function), self._settings,
+			)).encode('utf-8')).hexdigest()
+			for name in feature_names
+		}
+		scores = {}
+		for name, key in keys.items():
+			row = self._connection.execute('SELECT score FROM scores WHERE key = ?', (key,)).fetchone()
+			if row is None:
+				self.misses += 1
+			else:
+				self.hits += 1
+				scores[name] = pickle.loads(row[0])
+		return scores, keys
+
+	def store(self, keys, scores):
+		'''Record newly computed scores under the keys returned by lookup()'''
+		with self._connection:
+			self._connection.executemany(
+				'INSERT OR REPLACE INTO scores (key, score) VALUES (?, ?)',
+				[(keys[name], pickle.dumps(score)) for name, score in scores.items()]
+			)
+
+	def close(self):
+		'''Close the database'''
+		self._connection.close()
@@ -0,0 +1,180 @@
+'''
+Reading and writing the results of feature extraction
+
+Results are either a pickled dict of dicts {filename: {feature: score}}, or, if the output file ends in ".npz",
+a columnar file holding a float matrix (one row per file, one column per feature) along with the file names
+and feature names. The matrix of a columnar file is memory-mapped when it is read, so that only the rows
+and columns that are actually used get loaded.
+'''
+import os
+import pickle
+import struct
+import zipfile
+
+import numpy as np
+
+_RECORD_HEADER = struct.Struct('<Q') #Length of the pickled record that follows
+_ZIP_LOCAL_HEADER = struct.Struct('<4s5H3L2H') #Fixed-size part of the header of a member of a zip file
+COLUMNAR_EXTENSION = 'npz'
+
+class FeatureJournal:
+	'''
+	Append-only file of per-file feature scores, written as each file is completed
+
+	Every record is a length prefix followed by a pickled tuple of a file name and a dict of its scores.
+	A record that was only partially written (e.g. because the process was killed) is discarded on resume.
+	'''
+
+	def __init__(self, journal_file, resume=False):
+		self.journal_file = journal_file
+		self.recorded = {} #Associates file names to the set of features already recorded for them
+		if resume and os.path.isfile(journal_file):
+			end_of_last_record = 0
+			for file_name, scores, end_of_last_record in self._records():
+				self.recorded.setdefault(file_name, set()).update(scores)
+			#Remove any partially written record from the end of the journal
+			with open(journal_file, mode='r+b') as journal:
+				journal.truncate(end_of_last_record)
+		self._journal = open(journal_file, mode='ab' if resume else 'wb')
+
+	def _records(self):
+		#Yield a tuple of the file name, scores, and offset after the record for each complete record
+		with open(self.journal_file, mode='rb') as journal:
+			while True:
+				header = journal.read(_RECORD_HEADER.size)
+				if len(header) < _RECORD_HEADER.size:
+					return
+				payload = journal.read(_RECORD_HEADER.unpack(header)[0])
+				try:
+					file_name, scores = pickle.loads(payload)
+				except Exception: #pylint: disable=broad-except
+					return
+				yield file_name, scores, journal.tell()
+
+	def append(self, file_name, scores):
+		'''Durably record the scores of a file'''
+		payload = pickle.dumps((file_name, scores))
+		self._journal.write(_RECORD_HEADER.pack(len(payload)) + payload)
+		self._journal.flush()
+		#Once per file, which is cheap next to extracting its features, so that the record survives a crash of the system
+		os.fsync(self._journal.fileno())
+		self.recorded.setdefault(file_name, set()).update(scores)
+
+	def close(self):
+		'''Close the journal, keeping it on disk so that the extraction can be resumed'''
+		self._journal.close()
+
+	def finalize(self, output_file, file_names, features, text_to_features=None):
+		'''
+		Write the recorded scores of the given files to output_file, then delete the journal. Scores in the optional
+		text_to_features ({filename: {feature: score}}) are written too, unless a score for them was recorded
+		'''
+		self.close()
+		text_to_features = {
+			file_name: dict(scores) for file_name, scores in (text_to_features or {}).items() if file_name in file_names
+		}
+		for file_name, scores, _ in self._records():
+			text_to_features.setdefault(file_name, {}).update(scores)
+		text_to_features = {
+			file_name: {feature: text_to_features[file_name][feature] for feature in features}
+			for file_name in file_names
+		}
+		write_features(output_file, text_to_features)
+		os.remove(self.journal_file)
+
+def is_columnar(feature_data_file):
+	'''Whether the file name denotes the columnar format'''
+	return feature_data_file.endswith(f'{os.extsep}{COLUMNAR_EXTENSION}')
+
+def _write_columnar(output, text_to_features):
+	file_names = list(text_to_features)
+	feature_names = list(next(iter(text_to_features.values()))) if text_to_features else []
+	data = np.empty((len(file_names), len(feature_names)), dtype=np.float64)
+	for i, file_name in enumerate(file_names):
+		try:
+			data[i] = [
+				np.nan if text_to_features[file_name][feature] is None else text_to_features[file_name][feature]
+				for feature in feature_names
+			]
+		except (TypeError, ValueError) as exp:
+			raise ValueError(
+				f'The scores of "{file_name}" cannot all be stored as numbers in the columnar format'
+			) from exp
+	#Saved without compression so that the matrix can be memory-mapped
+	np.savez(
+		output, data=data, file_names=np.array(file_names, dtype=str), feature_names=np.array(feature_names, dtype=str)
+	)
+
+def write_features(output_file, text_to_features):
+	'''Write {filename: {feature: score}} to output_file, replacing it only once it is completely written'''
+	temp_file = f'{output_file}{os.extsep}tmp'
+	with open(temp_file, 'wb') as output:
+		if is_columnar(output_file):
+			_write_columnar(output, text_to_features)
+		else:
+			output.write(pickle.dumps(text_to_features))
+	os.replace(temp_file, output_file)
+
+def _memory_map_member(feature_data_file, member):
+	#Memory-map an array stored without compression in a .npz file, or return None if that is not possible
+	with zipfile.ZipFile(feature_data_file) as archive:
+		info = archive.getinfo(member)
+	if info.compress_type != zipfile.ZIP_STORED:
+		return None
+	with open(feature_data_file, mode='rb') as file:
+		file.seek(info.header_offset)
+		local_header = _ZIP_LOCAL_HEADER.unpack(file.read(_ZIP_LOCAL_HEADER.size))
+		file.seek(info.header_offset + _ZIP_LOCAL_HEADER.size + local_header[-2] + local_header[-1])
+		version = np.lib.format.read_magic(file)
+		if version == (1, 0):
+			shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+		elif version == (2, 0):
+			shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+		else:
+			return None
+		offset = file.tell()
+	if dtype.hasobject or 0 in shape:
+		return None
+	return np.memmap(
+		feature_data_file, dtype=dtype, mode='r', offset=offset, shape=shape, order='F' if fortran_order else 'C'
+	)
+
+def read_feature_matrix(feature_data_file):
+	'''
+	Return a tuple of a matrix of scores (one row per file, one column per feature), the list of file names,
+	and the list of feature names. The matrix of a columnar file is memory-mapped.
+	'''
+	if is_columnar(feature_data_file):
+		with np.load(feature_data_file, allow_pickle=False) as arrays:
+			file_names = arrays['file_names'].tolist()
+			feature_names = arrays['feature_names'].tolist()
+			data = _memory_map_member(feature_data_file, f'data{os.extsep}npy')
+			if data is None:
+				data = arrays['data']
+		return data, file_names, feature_names
+
+	text_to_features = read_features(feature_data_file)
+	file_names = list(text_to_features)
+	feature_names = list(next(iter(text_to_features.values()))) if text_to_features else []
+	try:
+		data = np.fromiter(
+			(
+				np.nan if text_to_features[file_name][feature] is None else text_to_features[file_name][feature]
+				for file_name in file_names for feature in feature_names
+			),
+			dtype=np.float64, count=len(file_names) * len(feature_names)
+		).reshape(len(file_names), len(feature_names))
+	except (TypeError, ValueError):
+		#Scores that are not all numbers are kept as they are
+		data = np.asarray([[text_to_features[file_name][feature] for feature in feature_names] for file_name in file_names])
+	return data, file_names, feature_names
+
+def read_features(feature_data_file):
+	'''Return the results in feature_data_file as {filename: {feature: score}}'''
+	if is_columnar(feature_data_file):
+		data, file_names, feature_names = read_feature_matrix(feature_data_file)
+		return {
+			file_name: dict(zip(feature_names, row.tolist())) for file_name, row in zip(file_names, data)
+		}
+	with open(feature_data_file, mode='rb') as pickle_file:
+		return pickle.loads(pickle_file.read())
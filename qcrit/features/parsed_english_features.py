@@ -3,42 +3,93 @@
 Parsed English Features
 '''
 import re
+from functools import wraps
 from statistics import mean, pvariance
-from ..textual_feature import textual_feature
+from ..textual_feature import textual_feature, add_tokenize_type
+from ..pattern_counter import PatternCounter
+from ..phrase_matcher import PhraseMatcher
 
 _TERMINAL_PUNCTUATION = ('.', '!', '?')
-
-@textual_feature()
+_SENTENCE_WORD_REGEX = re.compile(
+	'[A-Za-z&+' + ''.join('\\' + p for p in _TERMINAL_PUNCTUATION) + '-]+'
+)
+
+def _sentence_words(tree):
+	#The words of each sentence of a ParseTree, where a sentence ends at terminal punctuation. Only the words made of
+	#letters, "&", "+", "-", and terminal punctuation are counted (for a leaf with spaces, such as an ID, only the part
+	#after its last space), and the words after the last terminal punctuation are left out. Unlike the regex the features
+	#used before, text in a bracket after the brackets in it (as in the malformed "(NP (N end) extra)") is not a word
+	text = tree.text
+	sentences = []
+	cur_sentence = []
+	for start, word in zip(tree.words.starts.tolist(), tree.words):
+		space = word.rfind(' ')
+		if space < 0 and text[start - 1] != ' ':
+			continue
+		word = word[space + 1:]
+		if not _SENTENCE_WORD_REGEX.fullmatch(word):
+			continue
+		cur_sentence.append(word)
+		if word in _TERMINAL_PUNCTUATION:
+			sentences.append(cur_sentence)
+			cur_sentence = []
+	return sentences
+
+#The sentences of words of a parsed text, derived from its 'parsed_tree' so that the text is only parsed once
+add_tokenize_type(
+	'parsed_sentence_words', derive_from=('parsed_tree',), derive=lambda text, tree: _sentence_words(tree)
+)
+
+#The patterns of the features below that count the matches of a regex, which are all counted in one pass over each
+#text by the 'parsed_pattern_counts' tokenize type (a dict of the count of each pattern)
+_PATTERNS = PatternCounter()
+add_tokenize_type('parsed_pattern_counts', func=lambda text: _PATTERNS.count(text))
+
+def _counts_pattern(pattern, flags=0):
+	#Decorator for a feature of the number of matches of pattern in a text, which the feature is given as its text
+	def decor(f):
+		_PATTERNS.add(f.__name__, pattern, flags)
+		@textual_feature(tokenize_type='parsed_pattern_counts')
+		@wraps(f)
+		def feature(text):
+			return f(text[f.__name__])
+		return feature
+	return decor
+
+def _words_pattern(words):
+	#A pattern of any of the words as a whole leaf word
+	return r'\b(?:' + '|'.join(re.escape(word) for word in words) + r')\)'
+
+@_counts_pattern(r'\bPRP\s')
 def pronouns(text):
-	return sum(1 for _ in re.finditer(r'\bPRP\s', text))
+	return text
 
-@textual_feature()
+@_counts_pattern(r'\bDT\s')
 def determiners(text):
-	return sum(1 for _ in re.finditer(r'\bDT\s', text))
+	return text
 
-@textual_feature()
+@_counts_pattern(r'\bsome\)', re.IGNORECASE)
 def suma(text):
-	return sum(1 for _ in re.finditer(r'\bsome\)', text, flags=re.IGNORECASE))
+	return text
 
-@textual_feature()
+@_counts_pattern(r'(self|selves)\)', re.IGNORECASE)
 def reflexives(text):
-	return sum(1 for _ in re.finditer(r'(self|selves)\)', text, flags=re.IGNORECASE))
+	return text
 
 @textual_feature()
 def ilca(text):
 	return sum(1 for _ in re.finditer(r'\bthe\b.+?\bsame\)', text, flags=re.IGNORECASE))
 
-@textual_feature()
+@_counts_pattern(r'\bother\)', re.IGNORECASE)
 def othr(text):
-	return sum(1 for _ in re.finditer(r'\bother\)', text, flags=re.IGNORECASE))
+	return text
 
-@textual_feature()
+@_counts_pattern(_words_pattern((
+	'and', 'both', 'bothe', 'boyth', 'but', 'butt', 'either', 'eyther', 'nor',
+	'nother', 'neither', 'neyther', 'ne', 'or', 'ore', '&'
+)), re.IGNORECASE)
 def conjunct(text):
-	conjs = [
-		'and', 'both', 'bothe', 'boyth', 'but', 'butt', 'either', 'eyther', 'nor',
-		'nother', 'neither', 'neyther', 'ne', 'or', 'ore', '&'
-	]
-	return sum(1 for conj in conjs for _ in re.finditer(fr'\b{conj}\)', text, flags=re.IGNORECASE))
+	return text
 
 @textual_feature()
 def relclausesentences(text):
@@ -77,141 +128,77 @@ def avgrelclause(text):
 				relleng=0;
 	return mean(rellengths) if rellengths else 0
 
-@textual_feature()
+@_counts_pattern(r'\bif\)', re.IGNORECASE)
 def gif(text):
-	return sum(1 for _ in re.finditer(r'\bif\)', text, flags=re.IGNORECASE))
+	return text
 
-@textual_feature()
+@_counts_pattern(_words_pattern((
+	'since', 'sens', 'sithence', 'syns', 'then', 'thenne', 'finally',
+	'although', 'althoughe', 'despite', 'because', 'consequently', 'therefore',
+	'thus', 'lest', 'leste', 'when', 'whenne'
+)), re.IGNORECASE)
 def temporalcausal(text):
-	tempcaus = [
-		'since', 'sens', 'sithence', 'syns', 'then', 'thenne', 'finally',
-		'although', 'althoughe', 'despite', 'because', 'consequently', 'therefore',
-		'thus', 'lest', 'leste', 'when', 'whenne'
-	]
-	return sum(1 for temp in tempcaus for _ in re.finditer(fr'\b{temp}\)', text, flags=re.IGNORECASE))
+	return text
 
-@textual_feature()
+@textual_feature(tokenize_type='parsed_sentence_words')
 def meansent(text):
-	punc = ''.join('\\' + p for p in _TERMINAL_PUNCTUATION)
-	sen_lengths = []
-	cur_sen_len = 0
-	for match in re.finditer(fr' ([A-Za-z&+{punc}-]+?)\)', text):
-		word = match.group(1)
-		cur_sen_len += len(word)
-		if word in _TERMINAL_PUNCTUATION:
-			sen_lengths.append(cur_sen_len)
-			cur_sen_len = 0
-	return mean(sen_lengths)
+	return mean([sum(len(word) for word in sentence) for sentence in text])
 
-@textual_feature()
+@textual_feature(tokenize_type='parsed_sentence_words')
 def varsent(text):
-	punc = ''.join('\\' + p for p in _TERMINAL_PUNCTUATION)
-	sen_lengths = []
-	cur_sen_len = 0
-	for match in re.finditer(fr' ([A-Za-z&+{punc}-]+?)\)', text):
-		word = match.group(1)
-		cur_sen_len += len(word)
-		if word in _TERMINAL_PUNCTUATION:
-			sen_lengths.append(cur_sen_len)
-			cur_sen_len = 0
-	return pvariance(sen_lengths)
+	return pvariance([sum(len(word) for word in sentence) for sentence in text])
 
 @textual_feature()
 def interrogatives(text):
 	return sum(1 for _ in re.finditer(r'\s\?\)', text, flags=re.IGNORECASE))
 
-@textual_feature()
+@_counts_pattern(r'\bIN\s')
 def prepositions(text):
-	return sum(1 for _ in re.finditer(r'\bIN\s', text))
+	return text
 
-@textual_feature()
+@_counts_pattern(r'\bJJS\s')
 def superlatives(text):
-	return sum(1 for _ in re.finditer(r'\bJJS\s', text))
+	return text
 
-@textual_feature()
+@_counts_pattern(_words_pattern(('o', 'lo', 'alas')), re.IGNORECASE)
 def exclams(text):
-	ex = ['o', 'lo', 'alas',]
-	return sum(1 for temp in ex for _ in re.finditer(fr'\b{temp}\)', text, flags=re.IGNORECASE))
+	return text
 
-@textual_feature()
+@_counts_pattern(r'\bMD\s')
 def modals(text):
-	return sum(1 for _ in re.finditer(r'\bMD\s', text))
-
-@textual_feature()
+	return text
+
+_DISCOURSE_MARKERS = PhraseMatcher((
+	('moreover',),
+	('since',),
+	('in', 'conclusion'),
+	('first', 'of', 'all'),
+	('in', 'the', 'end'),
+	('to', 'the', 'extent', 'that'),
+	('on', 'the', 'other', 'hand'),
+	('at', 'the', 'end', 'of', 'the', 'day'),
+), casefold=True)
+
+@textual_feature(tokenize_type='parsed_sentence_words')
 def discoursemarkers(text):
-	punc = ''.join('\\' + p for p in _TERMINAL_PUNCTUATION)
-	sentences = []
-	cur_sentence = []
-	for match in re.finditer(fr' ([A-Za-z&+{punc}-]+?)\)', text):
-		word = match.group(1)
-		cur_sentence.append(word)
-		if word in _TERMINAL_PUNCTUATION:
-			sentences.append(cur_sentence)
-			cur_sentence = []
-
-	markers = (
-		('moreover',),
-		('since',),
-		('in', 'conclusion'),
-		('first', 'of', 'all'),
-		('in', 'the', 'end'),
-		('to', 'the', 'extent', 'that'),
-		('on', 'the', 'other', 'hand'),
-		('at', 'the', 'end', 'of', 'the', 'day'),
-	)
-	cnt = 0
-	for cur_sentence in sentences:
-		for i in range(len(cur_sentence)):
-			for marker_list in markers:
-				satisfied = True
-				for j, marker in enumerate(marker_list):
-					if i + j >= len(cur_sentence) or cur_sentence[i + j].lower() != marker.lower():
-						satisfied = False
-						break
-				cnt += 1 if satisfied else 0
-	return cnt
+	return _DISCOURSE_MARKERS.count_in_sentences(text)
 
 @textual_feature()
 def num_sentences(text):
 	return sum(1 for punc in _TERMINAL_PUNCTUATION for _ in re.finditer(' \\' + punc + r'\)', text))
 
-@textual_feature()
+@_counts_pattern(r'\b(?:AXDS|AXP|BEDS|BEPS|HVDS|HVPS|VBDS|VBPH)\s')
 def oe_subjunctives(text):
-	subjs = ('AXDS', 'AXP', 'BEDS', 'BEPS', 'HVDS', 'HVPS', 'VBDS', 'VBPH')
-	return sum(1 for subj in subjs for _ in re.finditer(fr'\b{subj}\s', text))
+	return text
 
-@textual_feature()
+_THAHWILE = PhraseMatcher((('+ta', lambda word: 'hwil' in word),))
+
+@textual_feature(tokenize_type='parsed_sentence_words')
 def oe_thahwile(text):
-	punc = ''.join('\\' + p for p in _TERMINAL_PUNCTUATION)
-	sentences = []
-	cur_sentence = []
-	for match in re.finditer(fr' ([A-Za-z&+{punc}-]+?)\)', text):
-		word = match.group(1)
-		cur_sentence.append(word)
-		if word in _TERMINAL_PUNCTUATION:
-			sentences.append(cur_sentence)
-			cur_sentence = []
-	cnt = 0
-	for sentence in sentences:
-		for i in range(len(sentence) - 1):
-			if sentence[i] == '+ta' and 'hwil' in sentence[i + 1]:
-				cnt += 1
-	return cnt
+	return _THAHWILE.count_in_sentences(text)
 
-@textual_feature()
+_AERTHAM = PhraseMatcher((('+ar', lambda word: '+tam' in word or '+ton' in word),))
+
+@textual_feature(tokenize_type='parsed_sentence_words')
 def oe_aertham(text):
-	punc = ''.join('\\' + p for p in _TERMINAL_PUNCTUATION)
-	sentences = []
-	cur_sentence = []
-	for match in re.finditer(fr' ([A-Za-z&+{punc}-]+?)\)', text):
-		word = match.group(1)
-		cur_sentence.append(word)
-		if word in _TERMINAL_PUNCTUATION:
-			sentences.append(cur_sentence)
-			cur_sentence = []
-	cnt = 0
-	for sentence in sentences:
-		for i in range(len(sentence) - 1):
-			if sentence[i] == '+ar' and ('+tam' in sentence[i + 1] or '+ton' in sentence[i + 1]):
-				cnt += 1
-	return cnt
+	return _AERTHAM.count_in_sentences(text)
@@ -0,0 +1,76 @@
+'''
+Lexicons of words compiled into a single table, so that the words of every lexicon are counted in one pass over a text
+'''
+from types import MappingProxyType
+from unicodedata import normalize
+
+import numpy as np
+
+_NORMALIZATION_FORMS = ('NFD', 'NFC', 'NFKD', 'NFKC')
+
+def normalized_forms(words):
+	'''Return a frozenset of the words along with each of their Unicode normalization forms'''
+	return frozenset(words).union(*({normalize(form, word) for word in words} for form in _NORMALIZATION_FORMS))
+
+class LexiconMatcher:
+	'''
+	Maps each word of any of the given lexicons (a mapping of a name to its words) to a bit mask of the lexicons that
+	contain it, along with every Unicode normalization form of the word. If suffixes (a mapping of a name to a tuple
+	of word endings) is given, the words that end with any of the endings of a name also belong to that name. A word's
+	bit mask is only determined once for each id of a Vocabulary
+	'''
+
+	def __init__(self, lexicons, suffixes=None):
+		if suffixes is None: suffixes = {}
+		self.names = tuple(lexicons) + tuple(suffixes)
+		if len(self.names) > 63: raise ValueError('A LexiconMatcher holds at most 63 lexicons')
+		self.bits = MappingProxyType({name: 1 << i for i, name in enumerate(self.names)})
+		table = {}
+		for name, words in lexicons.items():
+			for word in normalized_forms(words):
+				table[word] = table.get(word, 0) | self.bits[name]
+		self.table = MappingProxyType(table)
+		self.suffixes = tuple(
+			(tuple(normalized_forms(endings)), self.bits[name]) for name, endings in suffixes.items()
+		)
+
+	def categories_of(self, word):
+		'''Return the bit mask of the lexicons that contain word'''
+		bits = self.table.get(word, 0)
+		for endings, bit in self.suffixes:
+			if word.endswith(endings):
+				bits |= bit
+		return bits
+
+	def count(self, word_ids):
+		'''Return the LexiconCounts of the words of a WordIds'''
+		vocabulary = word_ids.vocabulary
+		token_categories = vocabulary.values(self.categories_of)[word_ids.ids]
+		matched = token_categories[token_categories != 0]
+		return LexiconCounts(
+			self.bits, {name: int(np.count_nonzero(matched & bit)) for name, bit in self.bits.items()},
+			int(vocabulary.values(len)[word_ids.ids].sum()), token_categories, word_ids
+		)
+
+class LexiconCounts:
+	'''
+	The number of words of a text (word_ids) in each lexicon of a LexiconMatcher (counts), the number of characters of
+	all its words (chars), and the bit mask of the lexicons of each word in order (token_categories)
+	'''
+	__slots__ = ('bits', 'counts', 'chars', 'token_categories', 'word_ids')
+
+	def __init__(self, bits, counts, chars, token_categories, word_ids):
+		self.bits = bits
+		self.counts = counts
+		self.chars = chars
+		self.token_categories = token_categories
+		self.word_ids = word_ids
+
+	@property
+	def nbytes(self):
+		'''Bytes of the bit masks of the words (the word ids are cached on their own)'''
+		return self.token_categories.nbytes
+
+	def has(self, name):
+		'''Return a boolean array of whether each word of the text is in the lexicon of name'''
+		return (self.token_categories & self.bits[name]) != 0
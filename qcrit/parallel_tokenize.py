@@ -0,0 +1,138 @@
+'''
+Tokenization of a single large text by several processes, each tokenizing a chunk of the text. Chunks are split at
+blank lines or after terminal punctuation followed by whitespace. A window of tokens around each split is tokenized
+again, and the chunks are only joined where their tokens agree with the window's, and with those of a larger window.
+If they never agree, the whole text is tokenized serially. The words, and the sentences of the fast sentence splitter,
+are identical to the serial tokens. Punkt weighs the words around a possible sentence boundary, so its sentences could
+still differ from the serial sentences if a boundary depends on text farther from a split than the windows
+'''
+import multiprocessing
+import re
+from threading import Lock
+
+import numpy as np
+
+#Texts shorter than this are tokenized serially by default, since starting processes would take longer
+DEFAULT_MIN_CHARS = 1 << 22
+
+#The function that the forked worker processes call, which they inherit instead of receiving it pickled (along with
+#the text it refers to). The lock keeps calls from several threads from replacing it while their processes are started
+_worker_state = {}
+_worker_lock = Lock()
+
+def _call_worker_function(args):
+	return _worker_state['func'](*args)
+
+def fork_available():
+	'''Whether worker processes can be forked, which is required to share the text with them without copying it'''
+	return 'fork' in multiprocessing.get_all_start_methods()
+
+def map_in_processes(func, args_list, jobs):
+	'''Return the list of func(*args) for each args in args_list, computed by up to jobs forked processes'''
+	from concurrent.futures import ProcessPoolExecutor #pylint:disable=import-outside-toplevel
+	with _worker_lock:
+		_worker_state['func'] = func
+		try:
+			with ProcessPoolExecutor(
+				max_workers=min(jobs, len(args_list)), mp_context=multiprocessing.get_context('fork')
+			) as executor:
+				return list(executor.map(_call_worker_function, args_list))
+		finally:
+			_worker_state.clear()
+
+def split_regex(terminal_punctuation):
+	'''
+	Return a compiled regex that matches the whitespace of a blank line, or the whitespace after terminal punctuation
+	unless a period follows it (where it could be part of a ". . ." word token)
+	'''
+	terminal_chars = ''.join(re.escape(punctuation) for punctuation in terminal_punctuation)
+	return re.compile(fr'\n[^\S\n]*\n\s*|(?<=[{terminal_chars}])\s+(?!\.)')
+
+def chunk_bounds(text, num_chunks, splitter):
+	'''
+	Return the offsets that split text into at most num_chunks chunks of nearly equal length (with 0 and len(text) at
+	either end). Each chunk after the first starts after the whitespace matched by the compiled regex splitter
+	'''
+	bounds = [0]
+	for i in range(1, num_chunks):
+		match = splitter.search(text, max(len(text) * i // num_chunks, bounds[-1]))
+		if match is None:
+			break
+		if bounds[-1] < match.end() < len(text):
+			bounds.append(match.end())
+	bounds.append(len(text))
+	return bounds
+
+def _contains(starts, ends, window):
+	#Whether the tokens of a window (a tuple of their starts and ends) occur unchanged among the given tokens
+	window_starts, window_ends = window
+	i = int(np.searchsorted(starts, window_starts[0]))
+	return (
+		i + len(window_starts) <= len(starts) and np.array_equal(starts[i:i + len(window_starts)], window_starts) and
+		np.array_equal(ends[i:i + len(window_ends)], window_ends)
+	)
+
+def _stitch(span_func, text, left, right):
+	#Join two adjacent chunks (each a tuple of its start, its end, and the starts and ends of its tokens), or return
+	#None if they cannot be joined. Tokenizing a chunk on its own may change several of its last tokens (or first
+	#tokens), since the tokenizer takes the end of the chunk for the end of the text. So a window from the mth last
+	#token of the left chunk to the nth token of the right chunk is tokenized again, and its tokens replace those of
+	#the chunks only if its first and last tokens are exactly those tokens of the chunks, so that the chunks and the
+	#window are only cut where both of them find a boundary between tokens. Since the tokens of the window may still
+	#depend on the text around it (e.g. Punkt looks at the words before a boundary), they are also only used once a
+	#window that extends past them on both sides finds the same tokens. Otherwise the window grows
+	left_start, _, left_starts, left_ends = left
+	_, right_end, right_starts, right_ends = right
+	if not len(left_starts) or not len(right_starts):
+		return (
+			left_start, right_end, np.concatenate((left_starts, right_starts)), np.concatenate((left_ends, right_ends))
+		)
+	m = n = 2
+	agreeing = None #The m, n, and tokens of the last window whose first and last tokens are those of the chunks
+	while True:
+		m = min(m, len(left_starts))
+		n = min(n, len(right_starts))
+		window_start = left_starts[-m]
+		window_end = right_ends[n - 1]
+		starts, ends = span_func(text, int(window_start), int(window_end))
+		if agreeing is not None and _contains(starts, ends, agreeing[2:]):
+			break
+		agrees = len(starts) and (
+			starts[0] == window_start and ends[0] == left_ends[-m] and
+			starts[-1] == right_starts[n - 1] and ends[-1] == window_end
+		)
+		agreeing = (m, n, starts, ends) if agrees else None
+		if m == len(left_starts) and n == len(right_starts):
+			#The window cannot extend past the first token of the text, and the tokens after it are checked when the
+			#next chunk is joined
+			if agreeing is None:
+				return None
+			break
+		m *= 2
+		n *= 2
+	m, n, starts, ends = agreeing
+	return (
+		left_start, right_end,
+		np.concatenate((left_starts[:-m], starts, right_starts[n:])),
+		np.concatenate((left_ends[:-m], ends, right_ends[n:])),
+	)
+
+def parallel_spans(span_func, text, bounds, jobs):
+	'''
+	Return arrays of the starts and ends of the tokens that span_func(text, 0, len(text)) would return, by calling
+	span_func(text, start, end) on each chunk between consecutive bounds in up to jobs processes. span_func returns
+	the starts and ends (offsets into text) of the tokens of text[start:end]. If the tokens of two chunks cannot be
+	joined where they meet, the whole text is tokenized serially
+	'''
+	chunks = [
+		(start, end, *spans) for (start, end), spans in zip(
+			zip(bounds, bounds[1:]),
+			map_in_processes(lambda start, end: span_func(text, start, end), list(zip(bounds, bounds[1:])), jobs)
+		)
+	]
+	joined = chunks[0]
+	for chunk in chunks[1:]:
+		joined = _stitch(span_func, text, joined, chunk)
+		if joined is None:
+			return span_func(text, 0, len(text))
+	return joined[2], joined[3]
@@ -0,0 +1,71 @@
+'''
+The leaves of texts in the bracketed format of the Penn parsed corpora (e.g. "( (IP-MAT (PRO he) (VBD came) (. .)))"),
+parsed once into parallel arrays
+'''
+import re
+from array import array
+
+import numpy as np
+
+from .compact_tokens import TokenOffsets, _offset_dtype
+
+#A leaf "(TAG word)" (whose word may contain spaces, e.g. "(ID syn. 0.1)", and whose tag may be missing, as in the
+#malformed "( word)"), or else an opening or closing bracket
+_BRACKET_REGEX = re.compile(r'\(([^\s()]*)\s+([^()]*[^\s()])\)|(\()|\)')
+
+class ParseTree:
+	'''
+	The leaves of a bracketed text in order, as parallel arrays: the TokenOffsets of the tag and of the word of each
+	leaf, the index of the sentence (the top-level bracket) that each leaf is in, and the depth of each leaf (the number
+	of brackets around it, counting its own). Constituents that are not leaves are only recorded through these depths.
+	A leaf without a tag, such as "( word)", has an empty tag
+	'''
+	__slots__ = ('text', 'tags', 'words', 'sentences', 'depths', 'num_sentences')
+
+	def __init__(self, text, tags, words, sentences, depths, num_sentences):
+		self.text = text
+		self.tags = tags
+		self.words = words
+		self.sentences = sentences
+		self.depths = depths
+		self.num_sentences = num_sentences
+
+	def __len__(self):
+		return len(self.words)
+
+	def __repr__(self):
+		return f'ParseTree(leaves={len(self)}, sentences={self.num_sentences})'
+
+	@property
+	def nbytes(self):
+		'''Bytes of the arrays (the text is not included)'''
+		return self.tags.nbytes + self.words.nbytes + self.sentences.nbytes + self.depths.nbytes
+
+def parse_bracketed(text):
+	'''Return the ParseTree of the leaves of the bracketed text. Unbalanced closing brackets are ignored'''
+	offsets = array('q') #The tag start, tag end, word start, and word end of each leaf
+	sentences = array('q')
+	depths = array('q')
+	depth = 0
+	sentence = 0
+	for match in _BRACKET_REGEX.finditer(text):
+		kind = match.lastindex
+		if kind == 2:
+			offsets.extend(match.span(1) + match.span(2))
+			sentences.append(sentence)
+			depths.append(depth + 1)
+			if depth == 0:
+				sentence += 1
+		elif kind == 3:
+			depth += 1
+		elif depth:
+			depth -= 1
+			if depth == 0:
+				sentence += 1
+	dtype = _offset_dtype(text)
+	offsets = np.frombuffer(offsets, dtype=np.int64).astype(dtype)
+	return ParseTree(
+		text, TokenOffsets(text, offsets[0::4], offsets[1::4]), TokenOffsets(text, offsets[2::4], offsets[3::4]),
+		np.frombuffer(sentences, dtype=np.int64).astype(np.int32), np.frombuffer(depths, dtype=np.int64).astype(np.int32),
+		sentence + (depth > 0)
+	)
@@ -0,0 +1,47 @@
+'''
+Regex patterns compiled into a single alternation, so that the matches of every pattern are counted in one pass over a
+text
+'''
+import re
+from collections import Counter
+from operator import attrgetter
+
+#The flags that a pattern can be given, which are applied to its part of the alternation as inline flags
+_INLINE_FLAGS = ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'))
+
+class PatternCounter:
+	'''
+	Counts the matches of each of several named regex patterns in one pass over a text, with a single regex that is an
+	alternation of a named group for each pattern. The counts are the same as the number of non-overlapping matches of
+	each pattern on its own, as long as no match of one pattern overlaps a match of another (a pattern may not refer
+	to its groups by number, since they are numbered within the alternation). Patterns are added until the first text
+	is counted, which compiles the alternation
+	'''
+
+	def __init__(self):
+		self.patterns = {}
+		self._regex = None
+
+	def add(self, name, pattern, flags=0):
+		'''Add pattern (a regex string with any of the flags re.IGNORECASE, re.MULTILINE, and re.DOTALL) as name'''
+		if self._regex is not None: raise ValueError('Patterns cannot be added after a PatternCounter counts a text')
+		if name in self.patterns: raise ValueError(f'"{name}" is already a pattern')
+		if not name.isidentifier(): raise ValueError(f'"{name}" is not a valid group name for a pattern')
+		if flags & ~sum(flag for flag, _ in _INLINE_FLAGS):
+			raise ValueError(f'Pattern "{name}" may only be given the flags re.IGNORECASE, re.MULTILINE, and re.DOTALL')
+		re.compile(pattern, flags) #Raise any error in the pattern now, instead of when the alternation is compiled
+		letters = ''.join(letter for flag, letter in _INLINE_FLAGS if flags & flag)
+		self.patterns[name] = f'(?{letters}:{pattern})' if letters else pattern
+
+	@property
+	def regex(self):
+		'''The compiled alternation of every pattern'''
+		if self._regex is None:
+			self._regex = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in self.patterns.items()))
+		return self._regex
+
+	def count(self, text):
+		'''Return a dict of the number of matches of each pattern in text'''
+		counts = dict.fromkeys(self.patterns, 0)
+		counts.update(Counter(map(attrgetter('lastgroup'), self.regex.finditer(text))))
+		return counts
@@ -0,0 +1,138 @@
+'''
+Phrases (sequences of tokens) compiled into a trie, so that every occurrence of any of them is found in one scan over
+the tokens of a text
+'''
+import numpy as np
+
+class PhraseMatcher:
+	'''
+	Finds every occurrence of any of the given phrases in a sequence of tokens. Each element of a phrase is either a
+	token or a predicate function that is true of the tokens it matches. The phrases are compiled into a trie whose
+	edges are the bits of their distinct elements, and a scan only steps through the trie at the tokens that match
+	some element. Each distinct token of a scan is only given to the predicates once (once for each id of a Vocabulary,
+	for a WordIds), and only if it could continue a phrase. If casefold is true, tokens are case folded before they
+	are compared with the elements that are tokens (predicates are given the tokens as they are). Occurrences may
+	overlap, and a phrase that is given more than once is found once for each time it is given
+	'''
+
+	def __init__(self, phrases, casefold=False):
+		self.phrases = tuple(tuple(phrase) for phrase in phrases)
+		if not all(self.phrases): raise ValueError('A phrase must have at least one element')
+		self.casefold = casefold
+		self._tokens = {} #The bit of each element that is a token
+		self._predicates = [] #Each element that is a predicate, with its bit
+		self._edges = [{}] #The child of each node of the trie for the bit of each element that follows it
+		self._ends = [[]] #The indices of the phrases that end at each node
+		bits = {}
+		for index, phrase in enumerate(self.phrases):
+			node = 0
+			for element in phrase:
+				if not callable(element) and casefold:
+					element = element.casefold()
+				if element not in bits:
+					if len(bits) == 63: raise ValueError('A PhraseMatcher holds at most 63 distinct elements')
+					bits[element] = 1 << len(bits)
+					if callable(element):
+						self._predicates.append((element, bits[element]))
+					else:
+						self._tokens[element] = bits[element]
+				edges = self._edges[node]
+				if bits[element] not in edges:
+					edges[bits[element]] = len(self._edges)
+					self._edges.append({})
+					self._ends.append([])
+				node = edges[bits[element]]
+			self._ends[node].append(index)
+		#Whether every predicate follows a token in the phrases, so that only a token right after one that matches a
+		#token of the phrases needs to be given to the predicates
+		self._predicates_follow_tokens = not any(
+			callable(element) and (i == 0 or callable(phrase[i - 1]))
+			for phrase in self.phrases for i, element in enumerate(phrase)
+		)
+
+	def _predicate_bits(self, token):
+		bits = 0
+		for predicate, bit in self._predicates:
+			if predicate(token):
+				bits |= bit
+		return bits
+
+	def elements_of(self, token):
+		'''Return the bit mask of the elements of the phrases that token matches'''
+		return self._tokens.get(token.casefold() if self.casefold else token, 0) | self._predicate_bits(token)
+
+	def _scan(self, positions, masks):
+		#Yield each occurrence, given the positions (in order) of the tokens that match any element and the bit mask
+		#of each. The phrases matched up to a token are only continued at the position right after it
+		edges = self._edges
+		ends = self._ends
+		partial = [] #The trie node of each phrase matched up to the previous position, and where it starts
+		previous = None
+		for position, mask in zip(positions, masks):
+			if previous is None or position != previous + 1:
+				partial = []
+			advanced = []
+			for node, start in partial + [(0, position)]:
+				for bit, child in edges[node].items():
+					if mask & bit:
+						advanced.append((child, start))
+						for index in ends[child]:
+							yield start, position + 1, index
+			partial = advanced
+			previous = position
+
+	def _masks(self, tokens):
+		#The bit mask of the elements that each of tokens matches
+		token_bits = self._tokens
+		if self.casefold:
+			masks = [token_bits.get(token.casefold(), 0) for token in tokens]
+		else:
+			masks = [token_bits.get(token, 0) for token in tokens]
+		if self._predicates:
+			if self._predicates_follow_tokens:
+				positions = [i + 1 for i, mask in enumerate(masks[:-1]) if mask]
+			else:
+				positions = range(len(masks))
+			predicate_bits = {}
+			for i in positions:
+				token = tokens[i]
+				bits = predicate_bits.get(token)
+				if bits is None:
+					bits = predicate_bits[token] = self._predicate_bits(token)
+				masks[i] |= bits
+		return masks
+
+	def finditer(self, tokens):
+		'''
+		Yield (start, end, index of the phrase) for each occurrence of a phrase in tokens (a sequence of strings), in
+		order of where they end
+		'''
+		masks = self._masks(tokens)
+		positions = [i for i, mask in enumerate(masks) if mask]
+		return self._scan(positions, [masks[i] for i in positions])
+
+	def finditer_ids(self, word_ids):
+		'''Yield each occurrence of a phrase in the words of a WordIds (see finditer)'''
+		masks = word_ids.vocabulary.values(self.elements_of)[word_ids.ids]
+		positions = np.flatnonzero(masks)
+		return self._scan(positions.tolist(), masks[positions].tolist())
+
+	def count(self, tokens):
+		'''Return the number of occurrences of the phrases in tokens'''
+		return sum(1 for _ in self.finditer(tokens))
+
+	def count_ids(self, word_ids):
+		'''Return the number of occurrences of the phrases in the words of a WordIds'''
+		return sum(1 for _ in self.finditer_ids(word_ids))
+
+	def count_in_sentences(self, sentences):
+		'''
+		Return the number of occurrences of the phrases in sentences (a sequence of sequences of tokens), where no
+		occurrence spans two sentences. The tokens of every sentence are scanned at once
+		'''
+		masks = np.array(self._masks([token for sentence in sentences for token in sentence]), dtype=np.int64)
+		positions = np.flatnonzero(masks)
+		#Each position is offset by the number of sentences before it, so that the last position of a sentence is never
+		#right before the first position of the next one
+		sentence_of = np.repeat(np.arange(len(sentences)), [len(sentence) for sentence in sentences])
+		return sum(1 for _ in self._scan((positions + sentence_of[positions]).tolist(), masks[positions].tolist()))
@@ -0,0 +1,64 @@
+'''
+Timing of feature extraction runs
+'''
+import csv
+import json
+from collections import OrderedDict
+
+from . import color as c
+
+class ExtractionProfile:
+	'''
+	Records the wall time of each parse, tokenization, and feature for each file
+
+	Every record is a tuple (kind, name, filepath, seconds, cache) where kind is one of 'parse', 'tokenize', or
+	'feature', and cache is 'hit' if the result was taken from a cache instead of being computed, or 'miss' otherwise.
+	The seconds of a tokenization exclude the time spent on the tokenize types it is derived from, and the seconds
+	of a feature exclude the time spent tokenizing its text.
+	'''
+
+	FIELDS = ('kind', 'name', 'filepath', 'seconds', 'cache')
+
+	def __init__(self):
+		self.records = []
+
+	def record(self, kind, name, filepath, seconds, cache_hit=False):
+		'''Add the timing of one step for one file'''
+		self.records.append((kind, name, filepath, seconds, 'hit' if cache_hit else 'miss'))
+
+	def pop_records(self):
+		'''Remove and return the records so far (used to send the records of a worker process to the parent)'''
+		records, self.records = self.records, []
+		return records
+
+	def summary(self):
+		'''Return the total time, calls, hits and misses of each (kind, name), from the most to the least time'''
+		totals = OrderedDict()
+		for kind, name, _, seconds, cache in self.records:
+			total = totals.setdefault((kind, name), {
+				'kind': kind, 'name': name, 'seconds': 0.0, 'calls': 0, 'hits': 0, 'misses': 0,
+			})
+			total['seconds'] += seconds
+			total['calls'] += 1
+			total['hits' if cache == 'hit' else 'misses'] += 1
+		return sorted(totals.values(), key=lambda total: -total['seconds'])
+
+	def print_hotspots(self):
+		'''Display the summary as a table'''
+		summary = self.summary()
+		overall = sum(total['seconds'] for total in summary) or 1.0
+		print(c.yellow(f'{"seconds":>10} {"%":>6} {"calls":>8} {"misses":>8} {"hits":>8}  {"kind":<8} name'))
+		for total in summary:
+			print(
+				f'{total["seconds"]:>10.4f} {100 * total["seconds"] / overall:>6.2f} {total["calls"]:>8} '
+				f'{total["misses"]:>8} {total["hits"]:>8}  {total["kind"]:<8} {total["name"]}'
+			)
+
+	def write(self, file_prefix):
+		'''Write every record to "<file_prefix>.csv" and the summary to "<file_prefix>.json"'''
+		with open(f'{file_prefix}.csv', mode='w', newline='') as csv_file:
+			writer = csv.writer(csv_file)
+			writer.writerow(self.FIELDS)
+			writer.writerows(self.records)
+		with open(f'{file_prefix}.json', mode='w') as json_file:
+			json.dump(self.summary(), json_file, indent='\t')
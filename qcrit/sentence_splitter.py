@@ -0,0 +1,41 @@
+'''
+A sentence tokenizer that splits text with a single regex, as a faster alternative to an untrained Punkt tokenizer
+'''
+import re
+
+#Closing quotes and brackets that belong to the sentence they follow (the same as in re_boundary_realignment)
+CLOSING_CHARS = r"›»》’”\'\"）\)\]\}\>"
+
+class FastSentenceTokenizer:
+	'''
+	Splits text into sentences that end with a run of terminal punctuation, along with any closing quotes and brackets
+	after it. A sentence only ends there if the punctuation is followed by whitespace, by the end of the text, or (like
+	Punkt) by one of non_word_chars, and the last sentence ends at the last character that is not whitespace.
+	Unlike Punkt, abbreviations and initials (e.g. "J. Smith") are not recognized, an ellipsis followed by whitespace
+	ends a sentence, and whitespace before the first sentence is not part of it
+
+	non_word_chars and closing_chars are escaped for use in a regex character class
+	'''
+
+	def __init__(self, terminal_punctuation, non_word_chars, closing_chars=CLOSING_CHARS):
+		terminal_chars = ''.join(re.escape(punctuation) for punctuation in terminal_punctuation)
+		#Matches the end of a sentence (group 1) and the whitespace after it. The lookahead and backreference match
+		#the run of terminal punctuation atomically, so that the regex never backtracks into the middle of a run like
+		#"..." to end a sentence at the next "."
+		self._sentence_end_regex = re.compile(
+			fr'((?=([{terminal_chars}]+))\2(?:[{closing_chars}]+(?=\s|\Z)|(?=\s|\Z|[{non_word_chars}])))\s*'
+		)
+
+	def span_tokenize(self, text):
+		'''Yield the (start, end) offsets of each sentence in text'''
+		start = len(text) - len(text.lstrip())
+		for match in self._sentence_end_regex.finditer(text, start):
+			yield start, match.end(1)
+			start = match.end()
+		end = len(text.rstrip())
+		if start < end:
+			yield start, end
+
+	def tokenize(self, text):
+		'''Return a list of the sentences in text'''
+		return [text[start:end] for start, end in self.span_tokenize(text)]
@@ -2,200 +2,646 @@
 '''Utilities for textual feature decorator'''
 import re
 from inspect import signature
+from functools import wraps
+from time import perf_counter
 from collections import OrderedDict
-from io import StringIO
 import os
 from os.path import join, dirname, isdir, isfile, abspath, lexists
 import sys
 import pickle
 
-import nltk
-import nltk.tokenize.punkt as punkt
+import numpy as np
+
+from . import compact_tokens, parallel_tokenize
+from .vocabulary import Vocabulary, WordIds
+from .word_statistics import WordStatistics
+from .parse_tree import parse_bracketed
+from .token_cache import TokenCache, DiskTokenCache
+from .sentence_splitter import FastSentenceTokenizer, CLOSING_CHARS
 
-decorated_features = OrderedDict()
-word_tokenizer = None
-sentence_tokenizer = None
-debug_output = StringIO()
 NON_WORD_CHARS = (
-	r"\?¿؟\!¡！‽…⋯᠁ฯ,،，､、。°※··᛫~\:;;\\\/⧸⁄（）\(\)\[\]\{\}\<\>"
+	r"\?¿؟\!¡！‽…⋯᠁ฯ,،，､、。°※··᛫~\:;;\\\/⧸⁄（）\(\)\[\]\{\}\<\>"
 	r"\'\"‘’“”`‹›«»《》\|‖\=\-\‐\‒\–\—\―_\+\*\^\$£€§%#@&†‡"
 )
 
-tokenize_types = {
-	None: {
-		'func': lambda text: text,
-		'prev_filepath': None,
-		'tokens': None,
-	},
-	'sentences': {
-		'func': lambda text: sentence_tokenizer.tokenize(text),
-		'prev_filepath': None,
-		'tokens': None,
-	},
-	'words': {
-		'func': lambda text: word_tokenizer.word_tokenize(text),
-		'prev_filepath': None,
-		'tokens': None,
-	},
-	'sentence_words': {
-		'func': lambda text: [word_tokenizer.word_tokenize(s) for s in sentence_tokenizer.tokenize(text)],
-		'prev_filepath': None,
-		'tokens': None,
-	},
-}
-
-def clear_cache():
-	'''Clear tokens from previously parsed texts'''
-	global tokenize_types
-	global debug_output
-	for _, val in tokenize_types.items():
-		val['prev_filepath'] = None
-		val['tokens'] = None
-	debug_output.truncate(0)
-	debug_output.seek(0)
-
-def setup_tokenizers(*, terminal_punctuation, language=None):
-	'''Initialize the word tokenizer and sentence tokenizer given the terminal punctuation'''
-	global word_tokenizer
-	global sentence_tokenizer
-	global tokenize_types
-	if word_tokenizer or sentence_tokenizer:
-		raise Exception('Tokenizers have already been initialized')
-
-	clear_cache()
-	punkt.PunktLanguageVars.sent_end_chars = terminal_punctuation
-	punkt.PunktLanguageVars.re_boundary_realignment = re.compile(
-		r'[›»》’”\'\"）\)\]\}\>]+?(?:\s+|(?=--)|$)', re.MULTILINE
-	)
+_WHITESPACE = re.compile(r'\s*')
 
+def _sentences_separate_words(text, sentences):
 	'''
-	Accessing private variables of punkt.PunktLanguageVars because
-	nltk has a faulty design pattern that necessitates it.
-	Issue reported here: https://github.com/nltk/nltk/issues/2068
+	Whether the word tokens of the text are exactly the word tokens of its sentences. This holds when each sentence
+	is separated from the next by whitespace, nothing but whitespace lies outside the sentences, and no ". . ."
+	(the only word token that may contain whitespace) could span a boundary between sentences
 	'''
+	pos = 0
+	for i, sentence in enumerate(sentences):
+		start = _WHITESPACE.match(text, pos).end()
+		if not text.startswith(sentence, start):
+			return False
+		if i and (start == pos or (text[pos - 1] == '.' and text[start] == '.')):
+			return False
+		pos = start + len(sentence)
+	return _WHITESPACE.match(text, pos).end() == len(text)
 
-	'''
-	A word tokenizer should strip the non word chars from words,
-	as well as periods and numbers
-	'''
-	word_tokenizer = punkt.PunktLanguageVars()
-	word_tokenizer._re_word_tokenizer = re.compile(punkt.PunktLanguageVars._word_tokenize_fmt % {
-		'NonWord': fr"(?:[\d\.{NON_WORD_CHARS}])",
-		'MultiChar': punkt.PunktLanguageVars._re_multi_char_punct,
-		'WordStart': fr"[^\d\.{NON_WORD_CHARS}]",
-	}, re.UNICODE | re.VERBOSE)
-	word_tokenizer._re_period_context = re.compile(punkt.PunktLanguageVars._period_context_fmt % {
-		'NonWord': fr"(?:[\d\.{NON_WORD_CHARS}])",
-		'SentEndChars': word_tokenizer._re_sent_end_chars,
-	}, re.UNICODE | re.VERBOSE)
+def _words_from_sentence_words(word_tokenizer, text, sentences, sentence_words):
+	if _sentences_separate_words(text, sentences):
+		return [word for sentence in sentence_words for word in sentence]
+	return word_tokenizer.word_tokenize(text)
 
-	'''
-	A sentence tokenizer should strip the non word chars from words.
-	This regex excludes periods because the original regex in the Punkt class
-	excludes them, and it excludes numbers because we do not want to
-	treat numbers with decimals as if they were sentences
-	'''
-	sent_tok_vars = punkt.PunktLanguageVars()
-	sent_tok_vars._re_word_tokenizer = re.compile(punkt.PunktLanguageVars._word_tokenize_fmt % {
-		'NonWord': fr"(?:[{NON_WORD_CHARS}])",
-		'MultiChar': punkt.PunktLanguageVars._re_multi_char_punct,
-		'WordStart': fr"[^{NON_WORD_CHARS}]",
-	}, re.UNICODE | re.VERBOSE)
-	sent_tok_vars._re_period_context = re.compile(punkt.PunktLanguageVars._period_context_fmt % {
-		'NonWord': fr"(?:[{NON_WORD_CHARS}])",
-		'SentEndChars': sent_tok_vars._re_sent_end_chars,
-	}, re.UNICODE | re.VERBOSE)
-
-	if language:
-		#Attempt to download language-specific pretrained sentence tokenizer models from nltk
-		#Assume that the directory name that was downloaded from running
-		#`nltk.download('punkt')` will always be named 'tokenizers'
-		nltk_punkt_dir = join(dirname(__file__), 'tokenizers')
-		if not lexists(nltk_punkt_dir):
-			print('Attempting to download language-specific sentence tokenizer models from nltk...')
-			try:
-				nltk.download(info_or_id='punkt', download_dir=dirname(__file__), raise_on_error=True)
-			except Exception as e:
-				print(
-					'Failed to download sentence tokenization language data.'
-					' Consider leaving the language unspecified. This may cause sentence tokenization to'
-					' not properly recognize abbreviations, but otherwise it has reasonable performance.',
-					file=sys.stderr
-				)
-				raise e
-			print(
-				f'Successfully downloaded tokenizer models to '
-				f'{join(abspath(dirname(__file__)), "tokenizers")}'
-			)
+def _sentence_offsets_separate_words(text, sentences):
+	#Same as _sentences_separate_words, for the TokenOffsets of the sentences
+	pos = 0
+	for i, (start, end) in enumerate(zip(sentences.starts.tolist(), sentences.ends.tolist())):
+		if _WHITESPACE.match(text, pos).end() != start:
+			return False
+		if i and (start == pos or (text[pos - 1] == '.' and text[start] == '.')):
+			return False
+		pos = end
+	return _WHITESPACE.match(text, pos).end() == len(text)
 
-		#Attempt to load nltk data
-		models_dir = join(nltk_punkt_dir, 'punkt', 'PY3')
-		if not isdir(models_dir):
-			import errno
-			print(
-				'NLTK language data may not have been downloaded correctly.'
-				f' Consider leaving the language unspecified, or delete {abspath(nltk_punkt_dir)}'
-				' if it exists, and try again.',
-				file=sys.stderr)
-			raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), models_dir)
+def _compact_words_from_sentence_words(session, text, sentence_words):
+	if _sentence_offsets_separate_words(text, sentence_words.groups):
+		return sentence_words.tokens
+	return session._word_offsets(text)
+
+def _sentence_spans(sentence_tokenizer, text, start, end):
+	#The offsets into text of the sentences of text[start:end]
+	sentences = compact_tokens.sentence_offsets(sentence_tokenizer, text[start:end])
+	dtype = compact_tokens._offset_dtype(text)
+	return sentences.starts.astype(dtype) + start, sentences.ends.astype(dtype) + start
+
+def _word_spans(word_regex, text, start, end):
+	words = compact_tokens.regex_offsets(word_regex, text, start, end)
+	return words.starts, words.ends
+
+def _sentence_word_spans(word_regex, sentences, start, end):
+	#The offsets of the words of sentences[start:end], and the bounds of the words of each of those sentences
+	sentence_words = compact_tokens.sentence_word_offsets(word_regex, sentences[start:end])
+	return sentence_words.tokens.starts, sentence_words.tokens.ends, sentence_words.bounds
+
+def _word_statistics(session, text, sentence_words):
+	words = _compact_words_from_sentence_words(session, text, sentence_words)
+	return WordStatistics(WordIds(session.vocabulary.encode(words), session.vocabulary), sentence_words)
+
+def _make_tokenize_types(session):
+	#A tokenize type with 'derive_from' is computed from the cached tokens of the types it lists,
+	#while 'func' tokenizes the raw text by itself. A type with 'derive_if_cached' is only derived if the tokens of the
+	#types it lists are already cached, since computing them would cost more than 'func' (e.g. the words are found
+	#without splitting the text into sentences). The tokens of None are the text itself, which is never cached.
+	#The tokenizers are looked up when a text is tokenized, since they are created after the session
+	return {
+		None: {
+			'func': lambda text: text,
+		},
+		'sentences': {
+			'func': lambda text: session.sentence_tokenizer.tokenize(text),
+		},
+		'words': {
+			'func': lambda text: session.word_tokenizer.word_tokenize(text),
+			'derive_from': ('sentences', 'sentence_words'),
+			'derive': lambda text, sentences, sentence_words: _words_from_sentence_words(
+				session.word_tokenizer, text, sentences, sentence_words
+			),
+			'derive_if_cached': True,
+		},
+		'sentence_words': {
+			'func': lambda text: [
+				session.word_tokenizer.word_tokenize(s) for s in session.sentence_tokenizer.tokenize(text)
+			],
+			'derive_from': ('sentences',),
+			'derive': lambda text, sentences: [session.word_tokenizer.word_tokenize(s) for s in sentences],
+		},
+		#The words as a WordIds array of their ids in the vocabulary of the session
+		'word_ids': {
+			'func': lambda text: WordIds(
+				session.vocabulary.encode(session.word_tokenizer.word_tokenize(text)), session.vocabulary
+			),
+			'derive_from': ('words',),
+			'derive': lambda text, words: WordIds(session.vocabulary.encode(words), session.vocabulary),
+		},
+		#The compact types hold the same tokens as the types above, as compact_tokens.TokenOffsets
+		#(or NestedTokenOffsets) that only create the string of a token when it is accessed. They are the types that
+		#are tokenized in several processes if the session tokenizes large texts in parallel
+		'compact_sentences': {
+			'func': lambda text: session._sentence_offsets(text),
+		},
+		'compact_words': {
+			'func': lambda text: session._word_offsets(text),
+			'derive_from': ('compact_sentence_words',),
+			'derive': lambda text, sentence_words: _compact_words_from_sentence_words(session, text, sentence_words),
+			'derive_if_cached': True,
+		},
+		'compact_sentence_words': {
+			'func': lambda text: session._sentence_word_offsets(session._sentence_offsets(text)),
+			'derive_from': ('compact_sentences',),
+			'derive': lambda text, sentences: session._sentence_word_offsets(sentences),
+		},
+		#The leaves of a text in the bracketed format of the Penn parsed corpora, as a ParseTree
+		'parsed_tree': {
+			'func': parse_bracketed,
+		},
+		#Counts of the words of the text and of its sentences that several features share, as a WordStatistics. The words
+		#are taken from the words of the sentences, so that the text is only split into sentences once
+		'word_statistics': {
+			'func': lambda text: _word_statistics(
+				session, text, session.tokenize_types['compact_sentence_words']['func'](text)
+			),
+			'derive_from': ('compact_sentence_words',),
+			'derive': lambda text, sentence_words: _word_statistics(session, text, sentence_words),
+		},
+	}
+
+#While the disk cache is in use (or a text is tokenized in parallel), these types are expanded from the compact types
+#(which hold the same tokens), so that only the compact offsets are tokenized and stored
+_expanded_from_compact = {
+	'sentences': ('compact_sentences', list),
+	'words': ('compact_words', list),
+	'sentence_words': ('compact_sentence_words', lambda sentence_words: [list(words) for words in sentence_words]),
+}
+
+def _token_key(tokenize_type, text, filepath):
+	#The length and hash of the text distinguish different texts given the same file path. Hashing a string
+	#is only slow the first time, since python stores the hash in the string
+	return (tokenize_type, filepath, len(text), hash(text))
+
+def _disk_cache_settings(tokenizer_settings):
+	#Everything besides the text that determines the tokens. The pretrained model of a language is identified by its name
+	if tokenizer_settings is None:
+		return None
+	return repr((sorted(tokenizer_settings.items()), NON_WORD_CHARS))
+
+def _language_vars_class(terminal_punctuation):
+	#A subclass of punkt.PunktLanguageVars for each session, so that sessions with different terminal punctuation
+	#do not overwrite each other's class attributes
+	import nltk.tokenize.punkt as punkt #pylint:disable=import-outside-toplevel
+	return type('SessionLanguageVars', (punkt.PunktLanguageVars,), {
+		'sent_end_chars': terminal_punctuation,
+		're_boundary_realignment': re.compile(fr'[{CLOSING_CHARS}]+?(?:\s+|(?=--)|$)', re.MULTILINE),
+	})
+
+def _load_pretrained_sentence_tokenizer(language):
+	#Attempt to download language-specific pretrained sentence tokenizer models from nltk
+	#Assume that the directory name that was downloaded from running
+	#`nltk.download('punkt')` will always be named 'tokenizers'
+	nltk_punkt_dir = join(dirname(__file__), 'tokenizers')
+	if not lexists(nltk_punkt_dir):
+		import nltk #pylint:disable=import-outside-toplevel
+		print('Attempting to download language-specific sentence tokenizer models from nltk...')
 		try:
-			sentence_tokenizer = pickle.load(open(join(
-				models_dir, f'{language}{os.extsep}pickle'
-			), mode='rb'))
+			nltk.download(info_or_id='punkt', download_dir=dirname(__file__), raise_on_error=True)
 		except Exception as e:
-			sep = '", "'
 			print(
-				f'Unable to load language data for "{language}"\nAvailable languages: '
-				f'''"{
-					sep.join(
-						['None'] + [m[:m.index(os.extsep)] for m in os.listdir(models_dir)
-						if m.endswith(f"{os.extsep}pickle") and isfile(join(models_dir, m))]
-					)
-				}"''',
+				'Failed to download sentence tokenization language data.'
+				' Consider leaving the language unspecified. This may cause sentence tokenization to'
+				' not properly recognize abbreviations, but otherwise it has reasonable performance.',
 				file=sys.stderr
 			)
 			raise e
-	else:
-		sentence_tokenizer = punkt.PunktSentenceTokenizer(lang_vars=punkt.PunktLanguageVars())
+		print(
+			f'Successfully downloaded tokenizer models to '
+			f'{join(abspath(dirname(__file__)), "tokenizers")}'
+		)
 
-	sentence_tokenizer._lang_vars._re_period_context = sent_tok_vars._re_period_context
-	sentence_tokenizer._lang_vars._re_word_tokenizer = sent_tok_vars._re_word_tokenizer
+	#Attempt to load nltk data
+	models_dir = join(nltk_punkt_dir, 'punkt', 'PY3')
+	if not isdir(models_dir):
+		import errno
+		print(
+			'NLTK language data may not have been downloaded correctly.'
+			f' Consider leaving the language unspecified, or delete {abspath(nltk_punkt_dir)}'
+			' if it exists, and try again.',
+			file=sys.stderr)
+		raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), models_dir)
+	try:
+		return pickle.load(open(join(
+			models_dir, f'{language}{os.extsep}pickle'
+		), mode='rb'))
+	except Exception as e:
+		sep = '", "'
+		print(
+			f'Unable to load language data for "{language}"\nAvailable languages: '
+			f'''"{
+				sep.join(
+					['None'] + [m[:m.index(os.extsep)] for m in os.listdir(models_dir)
+					if m.endswith(f"{os.extsep}pickle") and isfile(join(models_dir, m))]
+				)
+			}"''',
+			file=sys.stderr
+		)
+		raise e
 
-def textual_feature(*, tokenize_type=None, debug=False):
-	'''Decorator for textual features'''
-	if tokenize_type not in tokenize_types:
-		raise ValueError(
-			'"' + str(tokenize_type) + '" is not a valid tokenize type: Choose from among ' +
-			str(list(tokenize_types.keys()))
+class ExtractionSession:
+	'''
+	Owns a pair of tokenizers, the caches of the tokens they produce, and a registry of features to compute with them.
+	Sessions share no state, so sessions with different tokenizer settings can extract features in one process, each
+	from its own thread. The textual_feature decorator and the functions of this module use default_session
+
+	If terminal_punctuation is given, the tokenizers are set up as by setup_tokenizers. The features decorated in any
+	session (e.g. the values of decorated_features) can be given to register them in this session as well
+	'''
+
+	def __init__(self, *, terminal_punctuation=None, language=None, sentence_splitter='punkt', features=()):
+		self.decorated_features = OrderedDict()
+		self.word_tokenizer = None
+		self.sentence_tokenizer = None
+		#Arguments given to setup_tokenizers, so that worker processes can be set up identically
+		self.tokenizer_settings = None
+		#An ExtractionProfile that records the time spent tokenizing and computing features, if profiling is enabled
+		self.profiler = None
+		#Tokens of recently tokenized texts, keyed by tokenize type, file path, and a fingerprint of the text
+		self.token_cache = TokenCache()
+		#A DiskTokenCache that keeps the compact tokens of each text across runs, if a token cache directory is set
+		self.disk_token_cache = None
+		#Token cache hits and misses of each feature decorated with debug=True
+		self.debug_stats = {}
+		#Ids of the words of the 'word_ids' tokenize type, assigned anew in each extraction run
+		self.vocabulary = Vocabulary()
+		#Texts of at least parallel_min_chars characters are tokenized by tokenize_jobs processes, if it is above 1
+		self.tokenize_jobs = 1
+		self.parallel_min_chars = parallel_tokenize.DEFAULT_MIN_CHARS
+		self.tokenize_types = _make_tokenize_types(self)
+		#The derive_from and derive of each tokenize type added by add_tokenize_type
+		self._added_tokenize_types = {}
+		if terminal_punctuation is not None:
+			self.setup_tokenizers(
+				terminal_punctuation=terminal_punctuation, language=language, sentence_splitter=sentence_splitter
+			)
+		for feature in features:
+			self.add_feature(feature)
+
+	def _cached_tokens(self, tokenize_type, text, filepath):
+		#Tokenize the text unless its tokens are cached, deriving the tokens from other types if possible
+		if tokenize_type is None:
+			return text
+		key = _token_key(tokenize_type, text, filepath)
+		tokens = self.token_cache.get(key, self.token_cache)
+		if tokens is not self.token_cache:
+			if self.profiler is not None:
+				self.profiler.record('tokenize', str(tokenize_type), filepath, 0.0, cache_hit=True)
+			return tokens
+		entry = self.tokenize_types[tokenize_type]
+		disk_token_cache = self.disk_token_cache
+		persisted = disk_token_cache is not None and tokenize_type.startswith('compact_')
+		if tokenize_type in _expanded_from_compact and (
+			disk_token_cache is not None or self._tokenizes_in_parallel(text)
+		):
+			compact_type, expand = _expanded_from_compact[tokenize_type]
+			compact = self._cached_tokens(compact_type, text, filepath)
+			start = perf_counter()
+			tokens = expand(compact)
+		elif persisted:
+			start = perf_counter()
+			tokens = disk_token_cache.load(tokenize_type, text)
+		else:
+			tokens = None
+		if tokens is None:
+			if 'derive_from' in entry and (not entry.get('derive_if_cached') or all(
+				_token_key(dependency, text, filepath) in self.token_cache for dependency in entry['derive_from']
+			)):
+				dependencies = [self._cached_tokens(dep, text, filepath) for dep in entry['derive_from']]
+				start = perf_counter()
+				tokens = entry['derive'](text, *dependencies)
+			else:
+				start = perf_counter()
+				tokens = entry['func'](text)
+			if persisted:
+				disk_token_cache.save(tokenize_type, text, tokens)
+		if self.profiler is not None:
+			self.profiler.record('tokenize', str(tokenize_type), filepath, perf_counter() - start)
+		self.token_cache.put(key, tokens)
+		return tokens
+
+	def cache_stats(self):
+		'''
+		Return the hits, misses, and evictions of the token cache, the number of entries and bytes it holds, and its
+		maximum bytes. If a token cache directory is set, 'disk' holds the hits and misses of the tokens stored in it.
+		If any feature is decorated with debug=True, 'features' maps its name to its hits and misses
+		'''
+		stats = self.token_cache.stats()
+		if self.disk_token_cache is not None:
+			stats['disk'] = {'hits': self.disk_token_cache.hits, 'misses': self.disk_token_cache.misses}
+		if self.debug_stats:
+			stats['features'] = {name: dict(counts) for name, counts in self.debug_stats.items()}
+		return stats
+
+	def set_cache_size(self, max_bytes):
+		'''Set the most bytes of tokens to keep in the token cache, evicting the least recently used tokens if needed'''
+		self.token_cache.max_bytes = max_bytes
+
+	def set_token_cache_dir(self, cache_dir):
+		'''
+		Store the compact tokens of each text in cache_dir (creating it if necessary), and load them from there instead
+		of tokenizing a text whose tokens were stored by any earlier run with the same tokenizer settings. If cache_dir
+		is None, tokens are no longer stored
+		'''
+		if cache_dir is None:
+			self.disk_token_cache = None
+			return
+		if not isinstance(cache_dir, str) or not cache_dir:
+			raise ValueError('The token cache directory must be a string for a directory path')
+		if os.path.exists(cache_dir) and not isdir(cache_dir):
+			raise ValueError(f'"{cache_dir}" is not a directory')
+		self.disk_token_cache = DiskTokenCache(cache_dir, _disk_cache_settings(self.tokenizer_settings))
+		#Tokens from before are not known to be stored
+		self.token_cache.clear()
+
+	def set_tokenize_jobs(self, jobs, min_chars=parallel_tokenize.DEFAULT_MIN_CHARS):
+		'''
+		Tokenize each text of at least min_chars characters in up to jobs processes, by splitting it into chunks at
+		blank lines or after terminal punctuation followed by whitespace. The tokens are identical to the tokens of
+		the whole text, except that the sentences of Punkt could rarely differ near a split (see parallel_tokenize).
+		If jobs is 1, or processes cannot be forked on this platform, texts are tokenized serially
+		'''
+		if not isinstance(jobs, int) or isinstance(jobs, bool) or jobs < 1:
+			raise ValueError('The number of tokenize jobs must be a positive integer')
+		if not isinstance(min_chars, int) or isinstance(min_chars, bool) or min_chars < 0:
+			raise ValueError('The minimum characters of a text to tokenize in parallel must be a non-negative integer')
+		self.tokenize_jobs = jobs
+		self.parallel_min_chars = min_chars
+
+	def _tokenizes_in_parallel(self, text):
+		return (
+			self.tokenize_jobs > 1 and len(text) >= self.parallel_min_chars and parallel_tokenize.fork_available()
+		)
+
+	def _sentence_offsets(self, text):
+		if not self._tokenizes_in_parallel(text):
+			return compact_tokens.sentence_offsets(self.sentence_tokenizer, text)
+		sentence_tokenizer = self.sentence_tokenizer
+		return compact_tokens.TokenOffsets(text, *parallel_tokenize.parallel_spans(
+			lambda text, start, end: _sentence_spans(sentence_tokenizer, text, start, end), text,
+			parallel_tokenize.chunk_bounds(
+				text, self.tokenize_jobs,
+				parallel_tokenize.split_regex(self.tokenizer_settings['terminal_punctuation'])
+			),
+			self.tokenize_jobs
+		))
+
+	def _word_offsets(self, text):
+		word_regex = self.word_tokenizer._word_tokenizer_re()
+		if not self._tokenizes_in_parallel(text):
+			return compact_tokens.regex_offsets(word_regex, text)
+		return compact_tokens.TokenOffsets(text, *parallel_tokenize.parallel_spans(
+			lambda text, start, end: _word_spans(word_regex, text, start, end), text,
+			parallel_tokenize.chunk_bounds(
+				text, self.tokenize_jobs,
+				parallel_tokenize.split_regex(self.tokenizer_settings['terminal_punctuation'])
+			),
+			self.tokenize_jobs
+		))
+
+	def _sentence_word_offsets(self, sentences):
+		#The words of each sentence do not depend on the other sentences, so the sentences are simply divided among
+		#the processes
+		word_regex = self.word_tokenizer._word_tokenizer_re()
+		if not sentences or not self._tokenizes_in_parallel(sentences.text):
+			return compact_tokens.sentence_word_offsets(word_regex, sentences)
+		bounds = sorted({len(sentences) * i // self.tokenize_jobs for i in range(self.tokenize_jobs + 1)})
+		parts = parallel_tokenize.map_in_processes(
+			lambda start, end: _sentence_word_spans(word_regex, sentences, start, end),
+			list(zip(bounds, bounds[1:])), self.tokenize_jobs
+		)
+		#The bounds of each part count from the first word of the part
+		word_bounds = [parts[0][2][:1]]
+		num_words = 0
+		for starts, _, part_bounds in parts:
+			word_bounds.append(part_bounds[1:] + num_words)
+			num_words += len(starts)
+		return compact_tokens.NestedTokenOffsets(
+			compact_tokens.TokenOffsets(
+				sentences.text, np.concatenate([part[0] for part in parts]), np.concatenate([part[1] for part in parts])
+			),
+			np.concatenate(word_bounds), sentences
 		)
-	def decor(f):
-		#TODO make this more extensible. Use keyword args somehow instead of 'text' parameter?
-		#TODO Ensure that features with duplicated names aren’t put in the ordered dict (this can happen if they come from different files)
-		reqrd_params = {'text'}
-		sig_params = signature(f).parameters
-		if not all(tok in sig_params for tok in reqrd_params):
+
+	def clear_cache(self):
+		'''Clear tokens from previously parsed texts, the ids of their words, and the statistics of the token cache'''
+		self.vocabulary = Vocabulary()
+		self.token_cache.clear()
+		self.token_cache.reset_stats()
+		if self.disk_token_cache is not None:
+			self.disk_token_cache.hits = self.disk_token_cache.misses = 0
+		self.debug_stats.clear()
+
+	def setup_tokenizers(self, *, terminal_punctuation, language=None, sentence_splitter='punkt'):
+		'''
+		Initialize the word tokenizer and sentence tokenizer given the terminal punctuation. If sentence_splitter is
+		'fast', sentences are split by a FastSentenceTokenizer instead of by Punkt
+		'''
+		#nltk takes most of the time of importing qcrit, so it is only imported once tokenizers are set up
+		import nltk.tokenize.punkt as punkt #pylint:disable=import-outside-toplevel
+		if self.word_tokenizer or self.sentence_tokenizer:
+			raise Exception('Tokenizers have already been initialized')
+		if sentence_splitter not in ('punkt', 'fast'):
+			raise ValueError(f'"{sentence_splitter}" is not a valid sentence splitter: Choose from among "punkt", "fast"')
+		if sentence_splitter == 'fast' and language:
+			raise ValueError('The fast sentence splitter does not use language data: Leave the language unspecified')
+
+		self.clear_cache()
+		self.tokenizer_settings = {
+			'terminal_punctuation': terminal_punctuation, 'language': language, 'sentence_splitter': sentence_splitter,
+		}
+		if self.disk_token_cache is not None:
+			self.disk_token_cache.settings = _disk_cache_settings(self.tokenizer_settings)
+		language_vars = _language_vars_class(terminal_punctuation)
+
+		'''
+		Accessing private variables of punkt.PunktLanguageVars because
+		nltk has a faulty design pattern that necessitates it.
+		Issue reported here: https://github.com/nltk/nltk/issues/2068
+		'''
+
+		'''
+		A word tokenizer should strip the non word chars from words,
+		as well as periods and numbers
+		'''
+		word_tokenizer = language_vars()
+		word_tokenizer._re_word_tokenizer = re.compile(punkt.PunktLanguageVars._word_tokenize_fmt % {
+			'NonWord': fr"(?:[\d\.{NON_WORD_CHARS}])",
+			'MultiChar': punkt.PunktLanguageVars._re_multi_char_punct,
+			'WordStart': fr"[^\d\.{NON_WORD_CHARS}]",
+		}, re.UNICODE | re.VERBOSE)
+		word_tokenizer._re_period_context = re.compile(punkt.PunktLanguageVars._period_context_fmt % {
+			'NonWord': fr"(?:[\d\.{NON_WORD_CHARS}])",
+			'SentEndChars': word_tokenizer._re_sent_end_chars,
+		}, re.UNICODE | re.VERBOSE)
+
+		'''
+		A sentence tokenizer should strip the non word chars from words.
+		This regex excludes periods because the original regex in the Punkt class
+		excludes them, and it excludes numbers because we do not want to
+		treat numbers with decimals as if they were sentences
+		'''
+		sent_tok_vars = language_vars()
+		sent_tok_vars._re_word_tokenizer = re.compile(punkt.PunktLanguageVars._word_tokenize_fmt % {
+			'NonWord': fr"(?:[{NON_WORD_CHARS}])",
+			'MultiChar': punkt.PunktLanguageVars._re_multi_char_punct,
+			'WordStart': fr"[^{NON_WORD_CHARS}]",
+		}, re.UNICODE | re.VERBOSE)
+		sent_tok_vars._re_period_context = re.compile(punkt.PunktLanguageVars._period_context_fmt % {
+			'NonWord': fr"(?:[{NON_WORD_CHARS}])",
+			'SentEndChars': sent_tok_vars._re_sent_end_chars,
+		}, re.UNICODE | re.VERBOSE)
+
+		if sentence_splitter == 'fast':
+			sentence_tokenizer = FastSentenceTokenizer(terminal_punctuation, NON_WORD_CHARS)
+		elif language:
+			#The pretrained model keeps its parameters, but uses the language variables of this session
+			sentence_tokenizer = _load_pretrained_sentence_tokenizer(language)
+			sentence_tokenizer._lang_vars = sent_tok_vars
+		else:
+			sentence_tokenizer = punkt.PunktSentenceTokenizer(lang_vars=sent_tok_vars)
+
+		self.word_tokenizer = word_tokenizer
+		self.sentence_tokenizer = sentence_tokenizer
+
+	def add_tokenize_type(self, name, *, func=None, derive_from=None, derive=None):
+		'''
+		Add a tokenize type whose tokens are func(text), or else derive(text, *dependencies) given the tokens of each
+		tokenize type in derive_from. They are cached like the tokens of any other type, so the features that share them
+		only compute them once per text. Features of the type bring it along when they are added to another session
+		'''
+		if name in self.tokenize_types: raise ValueError(f'"{name}" is already a tokenize type')
+		if (func is None) == (derive is None):
+			raise ValueError(f'Tokenize type "{name}" must be given either func or derive_from and derive')
+		if func is not None:
+			if derive_from is not None: raise ValueError(f'Tokenize type "{name}" is given func, so it is not derived')
+			self.tokenize_types[name] = {'func': func}
+			self._added_tokenize_types[name] = {'func': func}
+			return
+		if not derive_from or any(dependency not in self.tokenize_types for dependency in derive_from):
 			raise ValueError(
-				f'Error for feature "{f.__name__}"'
-				f'\nMinimal required parameters: {str(reqrd_params)}'
-				f'\nFound parameters: {set(sig_params) if sig_params else "{}"}'
+				f'Tokenize type "{name}" must be derived from among ' + str(list(self.tokenize_types.keys()))
 			)
+		derive_from = tuple(derive_from)
+		self.tokenize_types[name] = {
+			'func': lambda text: derive(
+				text, *(self.tokenize_types[dependency]['func'](text) for dependency in derive_from)
+			),
+			'derive_from': derive_from,
+			'derive': derive,
+		}
+		self._added_tokenize_types[name] = {'derive_from': derive_from, 'derive': derive}
+
+	def add_feature(self, feature):
+		'''Register a feature that was decorated in any session, so that it is computed with this session'''
+		if feature.tokenize_type not in self.tokenize_types and feature.added_tokenize_type is not None:
+			self.add_tokenize_type(feature.tokenize_type, **feature.added_tokenize_type)
+		return self._register(feature.__wrapped__, feature.tokenize_type, feature.debug)
+
+	def textual_feature(self, *, tokenize_type=None, debug=False):
+		'''Decorator for textual features of this session'''
+		if tokenize_type not in self.tokenize_types:
+			raise ValueError(
+				'"' + str(tokenize_type) + '" is not a valid tokenize type: Choose from among ' +
+				str(list(self.tokenize_types.keys()))
+			)
+		def decor(f):
+			#TODO make this more extensible. Use keyword args somehow instead of 'text' parameter?
+			#TODO Ensure that features with duplicated names aren’t put in the ordered dict (this can happen if they come from different files)
+			reqrd_params = {'text'}
+			sig_params = signature(f).parameters
+			if not all(tok in sig_params for tok in reqrd_params):
+				raise ValueError(
+					f'Error for feature "{f.__name__}"'
+					f'\nMinimal required parameters: {str(reqrd_params)}'
+					f'\nFound parameters: {set(sig_params) if sig_params else "{}"}'
+				)
+			return self._register(f, tokenize_type, debug)
+		return decor
+
+	def _register(self, f, tokenize_type, debug):
+		@wraps(f)
 		def wrapper(*, text, filepath=None):
-			if not word_tokenizer or not sentence_tokenizer:
+			if not self.word_tokenizer or not self.sentence_tokenizer:
 				raise ValueError(
 					f'Tokenizers not initialized: Use'
 					f' "setup_tokenizers(terminal_punctuation=<tuple of punctutation>)"'
 					f' before running functions'
 				)
 			if not filepath:
-				return f(tokenize_types[tokenize_type]['func'](text))
-
-			#Cache the tokenized version of this text if this filepath is new
-			if tokenize_types[tokenize_type]['prev_filepath'] != filepath:
-				tokenize_types[tokenize_type]['prev_filepath'] = filepath
-				tokenize_types[tokenize_type]['tokens'] = tokenize_types[tokenize_type]['func'](text)
-			elif debug:
-				debug_output.write('Cache hit! ' + 'function: <' + f.__name__ + '>, filepath: ' + filepath + '\n')
-			return f(tokenize_types[tokenize_type]['tokens'])
-		decorated_features[f.__name__] = wrapper
+				return f(self.tokenize_types[tokenize_type]['func'](text))
+
+			if debug:
+				counts = self.debug_stats.setdefault(f.__name__, {'hits': 0, 'misses': 0})
+				hit = tokenize_type is None or _token_key(tokenize_type, text, filepath) in self.token_cache
+				counts['hits' if hit else 'misses'] += 1
+			profiler = self.profiler
+			if profiler is None:
+				return f(self._cached_tokens(tokenize_type, text, filepath))
+			tokens = self._cached_tokens(tokenize_type, text, filepath)
+			start = perf_counter()
+			score = f(tokens)
+			profiler.record('feature', f.__name__, filepath, perf_counter() - start)
+			return score
+		wrapper.tokenize_type = tokenize_type
+		wrapper.added_tokenize_type = self._added_tokenize_types.get(tokenize_type)
+		wrapper.debug = debug
+		self.decorated_features[f.__name__] = wrapper
 		return wrapper
-	return decor
+
+#The session of the textual_feature decorator and of the functions below
+default_session = ExtractionSession()
+decorated_features = default_session.decorated_features
+tokenize_types = default_session.tokenize_types
+
+#Attributes of the default session that are replaced while it is used, so they are looked up on it when accessed
+_SESSION_ATTRIBUTES = frozenset((
+	'word_tokenizer', 'sentence_tokenizer', 'tokenizer_settings', 'profiler', 'token_cache', 'disk_token_cache',
+	'debug_stats', 'vocabulary',
+))
+
+def __getattr__(name):
+	if name in _SESSION_ATTRIBUTES:
+		return getattr(default_session, name)
+	raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+def _cached_tokens(tokenize_type, text, filepath):
+	return default_session._cached_tokens(tokenize_type, text, filepath)
+
+def cache_stats():
+	'''Return the statistics of the token cache of the default session (see ExtractionSession.cache_stats)'''
+	return default_session.cache_stats()
+
+def set_cache_size(max_bytes):
+	'''Set the most bytes of tokens to keep in the token cache, evicting the least recently used tokens if needed'''
+	default_session.set_cache_size(max_bytes)
+
+def set_token_cache_dir(cache_dir):
+	'''
+	Store the compact tokens of each text in cache_dir (creating it if necessary), and load them from there instead of
+	tokenizing a text whose tokens were stored by any earlier run with the same tokenizer settings. If cache_dir is
+	None, tokens are no longer stored
+	'''
+	default_session.set_token_cache_dir(cache_dir)
+
+def set_tokenize_jobs(jobs, min_chars=parallel_tokenize.DEFAULT_MIN_CHARS):
+	'''
+	Tokenize each text of at least min_chars characters in up to jobs processes, by splitting it into chunks at blank
+	lines or after terminal punctuation followed by whitespace. The tokens are identical to the tokens of the whole text,
+	except that the sentences of Punkt could rarely differ near a split (see parallel_tokenize)
+	'''
+	default_session.set_tokenize_jobs(jobs, min_chars)
+
+def clear_cache():
+	'''Clear tokens from previously parsed texts, the ids of their words, and the statistics of the token cache'''
+	default_session.clear_cache()
+
+def setup_tokenizers(*, terminal_punctuation, language=None, sentence_splitter='punkt'):
+	'''
+	Initialize the word tokenizer and sentence tokenizer given the terminal punctuation. If sentence_splitter is
+	'fast', sentences are split by a FastSentenceTokenizer instead of by Punkt
+	'''
+	default_session.setup_tokenizers(
+		terminal_punctuation=terminal_punctuation, language=language, sentence_splitter=sentence_splitter
+	)
+
+def add_tokenize_type(name, *, func=None, derive_from=None, derive=None):
+	'''
+	Add a tokenize type whose tokens are func(text), or else derive(text, *dependencies) given the tokens of each
+	tokenize type in derive_from (see ExtractionSession.add_tokenize_type)
+	'''
+	default_session.add_tokenize_type(name, func=func, derive_from=derive_from, derive=derive)
+
+def textual_feature(*, tokenize_type=None, debug=False):
+	'''Decorator for textual features'''
+	return default_session.textual_feature(tokenize_type=tokenize_type, debug=debug)
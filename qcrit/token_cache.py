@@ -0,0 +1,185 @@
+'''
+A least recently used cache of tokenized texts, bounded by the approximate number of bytes of the tokens it holds
+'''
+from collections import OrderedDict
+from threading import Lock
+from hashlib import sha256
+import os
+import sys
+
+import numpy as np
+
+from .compact_tokens import TokenOffsets, NestedTokenOffsets
+
+DEFAULT_MAX_BYTES = 256 << 20
+_SAMPLE_SIZE = 64 #The most elements of a list whose bytes are estimated
+
+def estimate_bytes(tokens):
+	'''
+	Approximate the memory held by tokens (strings, nested lists of strings, or objects with an nbytes attribute).
+	The bytes of a long list are estimated from those of evenly spaced elements of it
+	'''
+	if hasattr(tokens, 'nbytes'):
+		return tokens.nbytes
+	if isinstance(tokens, list):
+		if not tokens:
+			return sys.getsizeof(tokens)
+		sample = tokens[::max(1, len(tokens) // _SAMPLE_SIZE)]
+		return sys.getsizeof(tokens) + sum(estimate_bytes(token) for token in sample) * len(tokens) // len(sample)
+	return sys.getsizeof(tokens)
+
+class TokenCache:
+	'''
+	Maps keys (tuples whose first element is the tokenize type) to tokens, evicting the least recently used tokens once
+	the estimated bytes of all the tokens would exceed max_bytes. Tokens larger than max_bytes are kept outside of the
+	limit until other tokens of their tokenize type are cached, so that the tokens of a very large text are still
+	shared by the features of its file. Safe to use from several threads
+	'''
+
+	def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+		self._entries = OrderedDict() #Key to (tokens, estimated bytes), from least to most recently used
+		self._oversized = {} #Tokenize type to (key, tokens, estimated bytes) of tokens larger than max_bytes
+		self._max_bytes = max_bytes
+		self._lock = Lock()
+		self.bytes = 0
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	@property
+	def max_bytes(self):
+		'''The most bytes of tokens the cache holds before it evicts tokens'''
+		return self._max_bytes
+
+	@max_bytes.setter
+	def max_bytes(self, max_bytes):
+		if not isinstance(max_bytes, int) or isinstance(max_bytes, bool) or max_bytes < 0:
+			raise ValueError('The maximum bytes of the token cache must be a non-negative integer')
+		with self._lock:
+			self._max_bytes = max_bytes
+			self._evict()
+
+	def __len__(self):
+		return len(self._entries) + len(self._oversized)
+
+	def __contains__(self, key):
+		return key in self._entries or self._oversized.get(key[0], (None,))[0] == key
+
+	def get(self, key, default=None):
+		'''Return the tokens of key (marking them as the most recently used), or default if they are not cached'''
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is not None:
+				self._entries.move_to_end(key)
+				self.hits += 1
+				return entry[0]
+			oversized = self._oversized.get(key[0])
+			if oversized is not None and oversized[0] == key:
+				self.hits += 1
+				return oversized[1]
+			self.misses += 1
+			return default
+
+	def put(self, key, tokens):
+		'''Cache the tokens of key, evicting the least recently used tokens if necessary'''
+		size = estimate_bytes(tokens)
+		with self._lock:
+			previous = self._entries.pop(key, None)
+			if previous is not None:
+				self.bytes -= previous[1]
+			#Only the most recent tokens of a tokenize type are kept if they are too large
+			self._oversized.pop(key[0], None)
+			if size > self._max_bytes:
+				self._oversized[key[0]] = (key, tokens, size)
+				return
+			self._entries[key] = (tokens, size)
+			self.bytes += size
+			self._evict()
+
+	def _evict(self):
+		while self.bytes > self._max_bytes:
+			_, (_, size) = self._entries.popitem(last=False)
+			self.bytes -= size
+			self.evictions += 1
+
+	def clear(self):
+		'''Remove all the tokens, but keep the statistics'''
+		with self._lock:
+			self._entries.clear()
+			self._oversized.clear()
+			self.bytes = 0
+
+	def reset_stats(self):
+		'''Set the hit, miss, and eviction counters to zero'''
+		with self._lock:
+			self.hits = self.misses = self.evictions = 0
+
+	def stats(self):
+		'''
+		Return the counters and the current size of the cache as a dict. The entries and bytes include the tokens kept
+		outside of the limit
+		'''
+		with self._lock:
+			return {
+				'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+				'entries': len(self._entries) + len(self._oversized),
+				'bytes': self.bytes + sum(size for _, _, size in self._oversized.values()),
+				'max_bytes': self._max_bytes,
+			}
+
+class DiskTokenCache:
+	'''
+	Stores compact tokens (compact_tokens.TokenOffsets or NestedTokenOffsets) in cache_dir as .npy files of their
+	offsets, keyed by the tokenize type, the text, and settings (a string of everything else that determines the
+	tokens). Loaded offsets are memory-mapped, so only the parts of them that are used are read from disk
+	'''
+
+	def __init__(self, cache_dir, settings):
+		self.cache_dir = cache_dir
+		self.settings = settings
+		self.hits = 0
+		self.misses = 0
+		self._digest = (None, None) #The most recent text and its digest, since every tokenize type needs it
+
+	def _path(self, tokenize_type, text):
+		text_key = (len(text), hash(text))
+		if self._digest[0] != text_key:
+			self._digest = (text_key, sha256(text.encode('utf-8', 'surrogatepass')).digest())
+		key = sha256(repr((self.settings, tokenize_type)).encode('utf-8') + self._digest[1]).hexdigest()
+		return os.path.join(self.cache_dir, key[:2], f'{key}.npy')
+
+	def load(self, tokenize_type, text):
+		'''Return the tokens of the text stored for tokenize_type, or None if they were never stored'''
+		try:
+			offsets = np.load(self._path(tokenize_type, text), mmap_mode='r')
+		except (FileNotFoundError, ValueError):
+			#A missing file, or an empty one that memory mapping rejects
+			self.misses += 1
+			return None
+		self.hits += 1
+		#The layout is [number of groups (-1 if the tokens are not grouped), number of tokens, group bounds,
+		#token starts, token ends, group starts, group ends]
+		num_groups, num_tokens = (int(n) for n in offsets[:2])
+		if num_groups < 0:
+			return TokenOffsets(text, offsets[2:2 + num_tokens], offsets[2 + num_tokens:2 + 2 * num_tokens])
+		pos = 2 + num_groups + 1
+		tokens = TokenOffsets(text, offsets[pos:pos + num_tokens], offsets[pos + num_tokens:pos + 2 * num_tokens])
+		pos += 2 * num_tokens
+		groups = TokenOffsets(text, offsets[pos:pos + num_groups], offsets[pos + num_groups:pos + 2 * num_groups])
+		return NestedTokenOffsets(tokens, offsets[2:2 + num_groups + 1], groups)
+
+	def save(self, tokenize_type, text, tokens):
+		'''Store the offsets of the tokens of tokenize_type for the text, replacing the file once it is fully written'''
+		if isinstance(tokens, TokenOffsets):
+			header = [-1, len(tokens)]
+			parts = [tokens.starts, tokens.ends]
+		else:
+			header = [len(tokens), len(tokens.tokens)]
+			parts = [tokens.bounds, tokens.tokens.starts, tokens.tokens.ends, tokens.groups.starts, tokens.groups.ends]
+		dtype = np.result_type(*parts)
+		path = self._path(tokenize_type, text)
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		temp_file = f'{path}{os.extsep}{os.getpid()}{os.extsep}tmp'
+		with open(temp_file, 'wb') as output:
+			np.save(output, np.concatenate([np.array(header, dtype=dtype)] + [part.astype(dtype) for part in parts]))
+		os.replace(temp_file, path)
@@ -0,0 +1,92 @@
+'''
+Integer ids for words, so that the words of a text can be counted with numpy instead of with sets and Counters
+'''
+import numpy as np
+
+class Vocabulary:
+	'''
+	Assigns each distinct word an integer id in the order the words are first seen. The ids of a vocabulary are only
+	meaningful during the extraction run (and the process) that assigned them
+	'''
+
+	def __init__(self):
+		self.word_to_id = {}
+		self.words = [] #The word of each id
+		self._values = {}
+
+	def __len__(self):
+		return len(self.words)
+
+	def encode(self, words):
+		'''Return an int32 array of the id of each word, assigning ids to the words that do not have one yet'''
+		word_to_id = self.word_to_id
+		vocabulary_words = self.words
+		def intern(word):
+			word_id = word_to_id.get(word)
+			if word_id is None:
+				word_id = word_to_id[word] = len(vocabulary_words)
+				vocabulary_words.append(word)
+			return word_id
+		return np.fromiter(map(intern, words), dtype=np.int32, count=len(words))
+
+	def ids_of(self, words):
+		'''Return an array of the ids of the given words, leaving out the words that have never been seen'''
+		return np.fromiter(
+			(self.word_to_id[word] for word in words if word in self.word_to_id), dtype=np.int32
+		)
+
+	def values(self, function, dtype=np.int64):
+		'''
+		Return an array of function(word) for the word of each id. The result is remembered for each function
+		and dtype, and only the words seen since the last call are passed to function. The remembered array doubles
+		in size when it is full, so a call only takes time for the new words instead of for the whole vocabulary
+		'''
+		key = (function, np.dtype(dtype))
+		values, size = self._values.get(key, (np.empty(0, dtype=dtype), 0))
+		if size < len(self.words):
+			if len(values) < len(self.words):
+				grown = np.empty(max(2 * len(values), len(self.words)), dtype=dtype)
+				grown[:size] = values[:size]
+				values = grown
+			new_words = self.words[size:]
+			values[size:len(self.words)] = np.fromiter(map(function, new_words), dtype=dtype, count=len(new_words))
+			size = len(self.words)
+			self._values[key] = (values, size)
+		return values[:size]
+
+	def mask(self, predicate):
+		'''Return a boolean array of whether predicate(word) is truthy for the word of each id (see values)'''
+		return self.values(predicate, bool)
+
+class WordIds:
+	'''The words of a text as an array of their ids in a Vocabulary'''
+	__slots__ = ('ids', 'vocabulary')
+
+	def __init__(self, ids, vocabulary):
+		self.ids = ids
+		self.vocabulary = vocabulary
+
+	def __len__(self):
+		return len(self.ids)
+
+	def __iter__(self):
+		words = self.vocabulary.words
+		for word_id in self.ids.tolist():
+			yield words[word_id]
+
+	@property
+	def nbytes(self):
+		'''Bytes of the ids (the vocabulary is not included)'''
+		return self.ids.nbytes
+
+	def id_counts(self, predicate=None):
+		'''
+		Return an array of the distinct ids of the text in increasing order, and an array of how many times each of
+		them occurs. If predicate is given, the words for which predicate(word) is falsy are not counted
+		'''
+		ids = self.ids if predicate is None else self.ids[self.vocabulary.mask(predicate)[self.ids]]
+		return np.unique(ids, return_counts=True)
+
+	def count_of(self, lexicon):
+		'''Return how many words of the text are in lexicon'''
+		return int(np.isin(self.ids, self.vocabulary.ids_of(lexicon)).sum())
@@ -0,0 +1,82 @@
+'''
+Counts of the words of a text that several features share, gathered once per text instead of once per feature
+'''
+import re
+import sys
+from collections import Counter
+
+#Tokens made only of word characters are words. Other tokens (e.g. punctuation) are not counted as words
+WORD_REGEX = re.compile(r'^\w+$')
+
+def _count_uppercase(token):
+	return sum(1 for letter in token if letter.isupper())
+
+def _count_lowercase(token):
+	return sum(1 for letter in token if letter.islower())
+
+class WordStatistics:
+	'''
+	Counts of the tokens of a text (a WordIds) and of the tokens of each of its sentences (a NestedTokenOffsets).
+	The letters, length, and whether a token is a word are only determined once for each distinct token of the
+	vocabulary, and the tokens of each sentence are only examined up to its first and last word
+
+	uppercase, lowercase, chars - the number of uppercase letters, lowercase letters, and characters in all tokens
+	num_words - the number of tokens that are words
+	word_counts - a Counter of the occurrences of each word
+	frequency_counts - a Counter of the number of distinct words that occur each number of times
+	word_length_counts - a Counter of the occurrences of words of each length
+	num_sentences, sentence_chars - the number of sentences, and the number of characters in all of their tokens
+	sentences_without_words - the number of sentences that have no word
+	start_words, stop_words - Counters of the first and last word of each sentence that has a word
+	start_letters, stop_letters - Counters of the lowercased first letter of those words
+	'''
+	__slots__ = (
+		'uppercase', 'lowercase', 'chars', 'num_words', 'word_counts', 'frequency_counts', 'word_length_counts',
+		'num_sentences', 'sentence_chars', 'sentences_without_words', 'start_words', 'stop_words', 'start_letters',
+		'stop_letters',
+	)
+
+	def __init__(self, word_ids, sentence_words):
+		vocabulary = word_ids.vocabulary
+		#Only the distinct ids of this text are looked up, so the time does not grow with the vocabulary of the run
+		ids, counts = word_ids.id_counts()
+		self.uppercase = int(counts @ vocabulary.values(_count_uppercase)[ids])
+		self.lowercase = int(counts @ vocabulary.values(_count_lowercase)[ids])
+		lengths = vocabulary.values(len)[ids]
+		self.chars = int(counts @ lengths)
+
+		is_word = vocabulary.mask(WORD_REGEX.match)[ids]
+		id_counts = counts[is_word].tolist()
+		self.num_words = sum(id_counts)
+		words = vocabulary.words
+		self.word_counts = Counter(dict(zip((words[word_id] for word_id in ids[is_word].tolist()), id_counts)))
+		self.frequency_counts = Counter(id_counts)
+		self.word_length_counts = Counter()
+		for length, count in zip(lengths[is_word].tolist(), id_counts):
+			self.word_length_counts[length] += count
+
+		tokens = sentence_words.tokens
+		self.num_sentences = len(sentence_words)
+		self.sentence_chars = int(tokens.lengths().sum())
+		self.sentences_without_words = 0
+		self.start_words = Counter()
+		self.stop_words = Counter()
+		bounds = sentence_words.bounds.tolist()
+		for start, end in zip(bounds, bounds[1:]):
+			first = next((i for i in range(start, end) if WORD_REGEX.match(tokens[i])), None)
+			if first is None:
+				self.sentences_without_words += 1
+				continue
+			self.start_words[tokens[first]] += 1
+			self.stop_words[next(tokens[i] for i in range(end - 1, first - 1, -1) if WORD_REGEX.match(tokens[i]))] += 1
+		self.start_letters = Counter()
+		for word, count in self.start_words.items():
+			self.start_letters[word[0].lower()] += count
+		self.stop_letters = Counter()
+		for word, count in self.stop_words.items():
+			self.stop_letters[word[0].lower()] += count
+
+	@property
+	def nbytes(self):
+		'''Approximate bytes of the counters (the words are shared with the vocabulary, so they are not included)'''
+		return sum(sys.getsizeof(getattr(self, name)) for name in self.__slots__)
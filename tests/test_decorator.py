@@ -4,6 +4,7 @@ import unittest
 
 import context #pylint: disable=unused-import
 import qcrit.textual_feature
+import qcrit.token_cache
 
 qcrit.textual_feature.setup_tokenizers(terminal_punctuation=('.', '?'), language='english')
 
@@ -51,36 +52,84 @@ class TestTextualFeature(unittest.TestCase):
 		foo(text=file, filepath=filename)
 		bar(text=file, filepath=filename)
 		rup(text=file, filepath=filename)
+		self.assertEqual(qcrit.textual_feature.cache_stats()['features'], {
+			'foo': {'hits': 0, 'misses': 1}, 'bar': {'hits': 1, 'misses': 0}, 'rup': {'hits': 1, 'misses': 0},
+		})
+
 		self.assertEqual(
-			qcrit.textual_feature.debug_output.getvalue(), 'Cache hit! function: <bar>, filepath: abc/def\n' +
-			'Cache hit! function: <rup>, filepath: abc/def\n'
+			qcrit.textual_feature.token_cache.get(qcrit.textual_feature._token_key('sentences', file, 'abc/def')),
+			['test test.', 'test test test test test test?', 'test test.', 'test.']
 		)
 
-		self.assertEqual(qcrit.textual_feature.tokenize_types['sentences']['prev_filepath'], 'abc/def')
-		self.assertEqual(qcrit.textual_feature.tokenize_types['sentences']['tokens'], ['test test.', 'test test test test test test?', 'test test.', 'test.'])
-
 		qcrit.textual_feature.clear_cache()
 
-		self.assertEqual(qcrit.textual_feature.tokenize_types[None]['prev_filepath'], None)
-		self.assertEqual(qcrit.textual_feature.tokenize_types[None]['tokens'], None)
+		self.assertEqual(len(qcrit.textual_feature.token_cache), 0)
+		self.assertNotIn('features', qcrit.textual_feature.cache_stats())
 
 		filename = 'abc/ghi'
 		foo(text=file, filepath=filename)
 		taz(text=file, filepath=filename)
 		qux(text=file, filepath=filename)
-		self.assertEqual(
-			qcrit.textual_feature.debug_output.getvalue(), 'Cache hit! function: <qux>, filepath: abc/ghi\n'
-		)
+		self.assertEqual(qcrit.textual_feature.cache_stats()['features'], {
+			'foo': {'hits': 0, 'misses': 1}, 'taz': {'hits': 0, 'misses': 1}, 'qux': {'hits': 1, 'misses': 0},
+		})
 		filename = 'abc/jkl'
 		foo(text=file, filepath=filename)
 		bar(text=file, filepath=filename)
 		taz(text=file, filepath=filename)
 		qux(text=file, filepath=filename)
-		self.assertEqual(
-			qcrit.textual_feature.debug_output.getvalue(), 'Cache hit! function: <qux>, filepath: abc/ghi\n' +
-			'Cache hit! function: <bar>, filepath: abc/jkl\n' + \
-			'Cache hit! function: <qux>, filepath: abc/jkl\n'
-		)
+		self.assertEqual(qcrit.textual_feature.cache_stats()['features'], {
+			'foo': {'hits': 0, 'misses': 2}, 'taz': {'hits': 0, 'misses': 2}, 'qux': {'hits': 2, 'misses': 0},
+			'bar': {'hits': 1, 'misses': 0},
+		})
+
+		#The tokens of several files are cached at once
+		filename = 'abc/ghi'
+		foo(text=file, filepath=filename)
+		taz(text=file, filepath=filename)
+		self.assertEqual(qcrit.textual_feature.cache_stats()['features']['foo'], {'hits': 1, 'misses': 2})
+		self.assertEqual(qcrit.textual_feature.cache_stats()['features']['taz'], {'hits': 1, 'misses': 2})
+
+		#A different text with the same file path is tokenized again
+		self.assertEqual(return_sentences(text='test.', filepath=filename), ['test.'])
+
+	def test_cache_eviction(self):
+		file = 'test test. test test test test test test? test test. test.'
+		foo(text=file, filepath='abc/def')
+		stats = qcrit.textual_feature.cache_stats()
+		self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (0, 1, 1))
+
+		#Only room for the tokens of one file
+		qcrit.textual_feature.set_cache_size(stats['bytes'])
+		try:
+			foo(text=file, filepath='abc/ghi')
+			foo(text=file, filepath='abc/def')
+			foo(text=file, filepath='abc/def')
+			stats = qcrit.textual_feature.cache_stats()
+			self.assertEqual((stats['hits'], stats['misses'], stats['evictions'], stats['entries']), (1, 3, 2, 1))
+			self.assertLessEqual(stats['bytes'], stats['max_bytes'])
+			self.assertRaises(ValueError, qcrit.textual_feature.set_cache_size, -1)
+		finally:
+			qcrit.textual_feature.set_cache_size(qcrit.token_cache.DEFAULT_MAX_BYTES)
+
+	def test_cache_oversized_tokens(self):
+		file = 'test test. test test test test test test? test test. test.'
+		#The tokens of each file are larger than the cache, but the most recent tokens of each type are still kept
+		qcrit.textual_feature.set_cache_size(1)
+		try:
+			foo(text=file, filepath='abc/def')
+			bar(text=file, filepath='abc/def')
+			taz(text=file, filepath='abc/def')
+			qux(text=file, filepath='abc/def')
+			stats = qcrit.textual_feature.cache_stats()
+			self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (2, 2, 2))
+			foo(text=file, filepath='abc/ghi')
+			foo(text=file, filepath='abc/def')
+			qux(text=file, filepath='abc/def')
+			stats = qcrit.textual_feature.cache_stats()
+			self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (3, 4, 2))
+		finally:
+			qcrit.textual_feature.set_cache_size(qcrit.token_cache.DEFAULT_MAX_BYTES)
 
 	def test_sentence_tokenization(self):
 		file = 'test test. test test test test test test? test test. test.'
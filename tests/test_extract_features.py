@@ -1,19 +1,89 @@
 #pylint: disable = missing-docstring, blacklisted-name, unused-argument, invalid-name
 '''Test feature extraction'''
 import unittest
+import os
+import pickle
+import csv
+import json
+from tempfile import TemporaryDirectory
+from threading import Thread
+
+from nltk.tokenize.punkt import PunktLanguageVars
 
 import context #pylint: disable=unused-import
-from qcrit.extract_features import main, parse_tess
-from qcrit.textual_feature import textual_feature, setup_tokenizers
+from qcrit.extract_features import main, merge, parse_tess, iter_parse_tess
+from qcrit.feature_cache import FeatureCache
+from qcrit.textual_feature import default_session, _token_key
+from qcrit.textual_feature import textual_feature, setup_tokenizers, cache_stats, ExtractionSession, decorated_features
 
 #Run this file with "-b" to ignore output in passing tests (failing tests still display output)
 
 setup_tokenizers(terminal_punctuation=('.', ';', ';')) #'FULL STOP', 'SEMICOLON', 'GREEK QUESTION MARK'
 
+_DEMO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'demo')
+
 @textual_feature(tokenize_type='words', debug=True)
 def dummy_feature(text):
 	pass
 
+@textual_feature(tokenize_type='sentence_words')
+def num_words_in_sentences(text):
+	return sum(len(sentence) for sentence in text)
+
+_crash_on_file = None
+
+@textual_feature()
+def crash_on_file(text, filepath=None):
+	if _crash_on_file and text.startswith(_crash_on_file):
+		raise RuntimeError('Simulated crash')
+	return len(text)
+
+def _line_by_line_parse_tess(file_name):
+	#The original implementation of parse_tess
+	file_text = []
+	with open(file_name, mode='r', encoding='utf-8') as file:
+		for line in file:
+			if not line.startswith('<'):
+				continue
+			assert '>' in line, f'Malformed tess tag in {file_name}'
+			file_text.append(line[line.index('>') + 1:].strip() + ' ')
+	return ''.join(file_text)
+
+class TestParseTess(unittest.TestCase):
+
+	def testDemoCorpus(self):
+		for file_name in sorted(os.listdir(_DEMO_DIR)):
+			if file_name.endswith('.tess'):
+				file_name = os.path.join(_DEMO_DIR, file_name)
+				self.assertEqual(parse_tess(file_name), _line_by_line_parse_tess(file_name))
+				self.assertEqual(' '.join(iter_parse_tess(file_name)) + ' ', parse_tess(file_name))
+
+	def testLineEndings(self):
+		contents = (
+			'<a 1>\tαβγ  \r\n'
+			'untagged line <b 1> δ\n'
+			'\n'
+			'<c 1>\r'
+			'<d 1>x > y\u00a0\r'
+			' <e 1> indented\n'
+			'<f 1>last'
+		)
+		with TemporaryDirectory() as tmp_dir:
+			file_name = os.path.join(tmp_dir, 'test.tess')
+			with open(file_name, 'w', encoding='utf-8', newline='') as file:
+				file.write(contents)
+			self.assertEqual(parse_tess(file_name), 'αβγ  x > y last ')
+			self.assertEqual(parse_tess(file_name), _line_by_line_parse_tess(file_name))
+			self.assertEqual(list(iter_parse_tess(file_name)), ['αβγ', '', 'x > y', 'last'])
+
+			with open(file_name, 'w', encoding='utf-8') as file:
+				file.write('')
+			self.assertEqual(parse_tess(file_name), '')
+
+			with open(file_name, 'w', encoding='utf-8') as file:
+				file.write('<a 1> ok\n<b 2 unclosed\n')
+			self.assertRaises(AssertionError, parse_tess, file_name)
+
 class TestExtractFeatures(unittest.TestCase):
 
 	def testAllNone(self):
@@ -46,5 +116,425 @@ class TestExtractFeatures(unittest.TestCase):
 	def testOutputDirectoryValidAndNoFile2(self):
 		self.assertRaises(ValueError, main, corpus_dir='.', file_extension_to_parse_function={'tess': parse_tess}, output_file='.')
 
+	def testNonPositiveJobs(self):
+		self.assertRaises(ValueError, main, corpus_dir='.', file_extension_to_parse_function={'tess': parse_tess}, jobs=0)
+
+	def testParallelMatchesSerial(self):
+		with TemporaryDirectory() as tmp_dir:
+			serial_file = os.path.join(tmp_dir, 'serial.pickle')
+			parallel_file = os.path.join(tmp_dir, 'parallel.pickle')
+			main(corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess}, output_file=serial_file)
+			main(
+				corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess},
+				output_file=parallel_file, jobs=2
+			)
+			with open(serial_file, 'rb') as serial, open(parallel_file, 'rb') as parallel:
+				serial_results = pickle.load(serial)
+				parallel_results = pickle.load(parallel)
+		self.assertEqual(serial_results, parallel_results)
+		self.assertEqual(list(serial_results), list(parallel_results))
+		self.assertEqual(len(serial_results), 4)
+
+	def testPrefetchMatchesSerial(self):
+		with TemporaryDirectory() as tmp_dir:
+			results = []
+			parsed_files = []
+			def parse_and_track(file_name):
+				parsed_files.append(os.path.basename(file_name))
+				return parse_tess(file_name)
+			for prefetch in (0, 2):
+				output_file = os.path.join(tmp_dir, f'output{prefetch}.pickle')
+				main(
+					corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_and_track},
+					output_file=output_file, prefetch=prefetch
+				)
+				with open(output_file, 'rb') as pickle_file:
+					results.append(pickle.load(pickle_file))
+		self.assertEqual(results[0], results[1])
+		self.assertEqual(list(results[0]), list(results[1]))
+		self.assertEqual(sorted(parsed_files[:4]), sorted(parsed_files[4:]))
+		self.assertEqual(len(parsed_files), 8)
+		self.assertRaises(
+			ValueError, main, corpus_dir='.', file_extension_to_parse_function={'tess': parse_tess}, prefetch=-1
+		)
+
+	def testTokenCacheDir(self):
+		with TemporaryDirectory() as tmp_dir:
+			token_cache_dir = os.path.join(tmp_dir, 'tokens')
+			results = []
+			for i, (cache_dir, jobs) in enumerate(((None, 1), (token_cache_dir, 1), (token_cache_dir, 1), (token_cache_dir, 2))):
+				output_file = os.path.join(tmp_dir, f'output{i}.pickle')
+				main(
+					corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess},
+					output_file=output_file, jobs=jobs, token_cache_dir=cache_dir
+				)
+				with open(output_file, 'rb') as pickle_file:
+					results.append(pickle.load(pickle_file))
+			self.assertTrue(os.listdir(token_cache_dir))
+			self.assertNotIn('disk', cache_stats())
+			for result in results[1:]:
+				self.assertEqual(result, results[0])
+			self.assertRaises(
+				ValueError, main, corpus_dir='.', file_extension_to_parse_function={'tess': parse_tess},
+				token_cache_dir=output_file
+			)
+
+	def testTokenizeJobs(self):
+		with TemporaryDirectory() as tmp_dir:
+			results = []
+			default_session.set_tokenize_jobs(1, min_chars=0)
+			try:
+				for i, tokenize_jobs in enumerate((1, 3)):
+					output_file = os.path.join(tmp_dir, f'output{i}.pickle')
+					main(
+						corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess},
+						output_file=output_file, tokenize_jobs=tokenize_jobs
+					)
+					with open(output_file, 'rb') as pickle_file:
+						results.append(pickle.load(pickle_file))
+			finally:
+				default_session.set_tokenize_jobs(1)
+			self.assertEqual(results[1], results[0])
+			self.assertEqual(default_session.tokenize_jobs, 1)
+			self.assertRaises(
+				ValueError, main, corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess},
+				jobs=2, tokenize_jobs=2
+			)
+
+	def testExcludedDirectories(self):
+		with TemporaryDirectory() as tmp_dir:
+			for sub_dir in ('a', 'b', os.path.join('b', 'c')):
+				os.mkdir(os.path.join(tmp_dir, sub_dir))
+				with open(os.path.join(tmp_dir, sub_dir, 'text.tess'), 'w') as tess_file:
+					tess_file.write('<a 1> Text. More text.\n')
+			output_file = os.path.join(tmp_dir, 'output.pickle')
+			main(
+				corpus_dir=tmp_dir, file_extension_to_parse_function={'tess': parse_tess},
+				features=['num_words_in_sentences'], output_file=output_file,
+				excluded_paths={os.path.join(tmp_dir, 'b', 'c') + os.sep, os.path.join(tmp_dir, 'a')}
+			)
+			with open(output_file, 'rb') as pickle_file:
+				self.assertEqual(list(pickle.load(pickle_file)), [os.path.join(tmp_dir, 'b', 'text.tess')])
+
+	def testManifest(self):
+		with TemporaryDirectory() as tmp_dir:
+			manifest = os.path.join(tmp_dir, 'manifest.csv')
+			results = []
+			for i in range(2):
+				output_file = os.path.join(tmp_dir, f'output{i}.pickle')
+				main(
+					corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess},
+					features=['num_words_in_sentences'], output_file=output_file, manifest=manifest
+				)
+				with open(output_file, 'rb') as pickle_file:
+					results.append(pickle.load(pickle_file))
+				with open(manifest, newline='') as manifest_file:
+					self.assertEqual(next(csv.reader(manifest_file)), ['corpus_dir', os.path.abspath(_DEMO_DIR)])
+					rows = list(csv.DictReader(manifest_file))
+				self.assertEqual(sorted(row['path'] for row in rows), list(results[0]))
+				self.assertEqual(
+					[int(row['size']) for row in sorted(rows, key=lambda row: row['path'])],
+					[os.path.getsize(file_name) for file_name in results[0]]
+				)
+			self.assertEqual(results[0], results[1])
+
+			#The manifest is used instead of traversing the directory
+			output_file = os.path.join(tmp_dir, 'output2.pickle')
+			file_name = list(results[0])[1]
+			stat = os.stat(file_name)
+			rows = [('corpus_dir', os.path.abspath(_DEMO_DIR)), ('path', 'size', 'mtime')]
+			with open(manifest, 'w', newline='') as manifest_file:
+				csv.writer(manifest_file).writerows(rows + [(file_name, stat.st_size, stat.st_mtime)])
+			main(
+				corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess},
+				features=['num_words_in_sentences'], output_file=output_file, manifest=manifest
+			)
+			with open(output_file, 'rb') as pickle_file:
+				self.assertEqual(list(pickle.load(pickle_file)), [file_name])
+
+			#A manifest of another directory, or of files that have changed, is rejected
+			self.assertRaises(
+				ValueError, main, corpus_dir=tmp_dir, file_extension_to_parse_function={'tess': parse_tess},
+				features=['num_words_in_sentences'], manifest=manifest
+			)
+			for changed_row in ((file_name, stat.st_size + 1, stat.st_mtime), (os.path.join(_DEMO_DIR, 'missing.tess'), 0, 0)):
+				with open(manifest, 'w', newline='') as manifest_file:
+					csv.writer(manifest_file).writerows(rows + [changed_row])
+				self.assertRaises(
+					ValueError, main, corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess},
+					features=['num_words_in_sentences'], manifest=manifest
+				)
+
+	def testInvalidShards(self):
+		for shard_index, shard_count in ((0, None), (None, 2), (2, 2), (-1, 2), (0, 0), (True, 2)):
+			self.assertRaises(
+				ValueError, main, corpus_dir='.', file_extension_to_parse_function={'tess': parse_tess},
+				shard_index=shard_index, shard_count=shard_count
+			)
+
+	def testShardsMergeToSerial(self):
+		with TemporaryDirectory() as tmp_dir:
+			expected_file = os.path.join(tmp_dir, 'expected.pickle')
+			manifest = os.path.join(tmp_dir, 'manifest.csv')
+			main(
+				corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess}, output_file=expected_file,
+				manifest=manifest
+			)
+			shard_files = [os.path.join(tmp_dir, f'shard{i}.pickle') for i in range(3)]
+			for i, shard_file in enumerate(shard_files):
+				main(
+					corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess}, output_file=shard_file,
+					shard_index=i, shard_count=3
+				)
+			with open(expected_file, 'rb') as expected:
+				expected_results = pickle.load(expected)
+			shards = []
+			for shard_file in shard_files:
+				with open(shard_file, 'rb') as shard:
+					shards.append(pickle.load(shard))
+			self.assertEqual([len(shard) for shard in shards], [2, 1, 1])
+			self.assertEqual(list(shards[0]), list(expected_results)[::3])
+
+			output_file = os.path.join(tmp_dir, 'merged.pickle')
+			self.assertEqual(merge(shard_files, output_file, manifest=manifest), ([], []))
+			with open(output_file, 'rb') as merged:
+				merged_results = pickle.load(merged)
+			self.assertEqual(merged_results, expected_results)
+			self.assertEqual(list(merged_results), list(expected_results))
+
+			#Overlapping and missing files are reported
+			self.assertEqual(
+				merge([shard_files[0], shard_files[0], shard_files[2]], os.path.join(tmp_dir, 'partial.pickle'), manifest),
+				(list(shards[0]), list(shards[1]))
+			)
+			self.assertRaises(ValueError, merge, shard_files, output_file)
+
+			#The features of every shard must match
+			mismatched_file = os.path.join(tmp_dir, 'mismatched.pickle')
+			main(
+				corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess}, output_file=mismatched_file,
+				features=['num_words_in_sentences'], shard_index=1, shard_count=3
+			)
+			self.assertRaises(
+				ValueError, merge, [shard_files[0], mismatched_file, shard_files[2]], os.path.join(tmp_dir, 'bad.pickle')
+			)
+
+	def testAugment(self):
+		with TemporaryDirectory() as tmp_dir:
+			expected_file = os.path.join(tmp_dir, 'expected.pickle')
+			output_file = os.path.join(tmp_dir, 'output.pickle')
+			main(
+				corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess}, output_file=expected_file,
+				features=['num_words_in_sentences', 'crash_on_file']
+			)
+			main(
+				corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess}, output_file=output_file,
+				features=['crash_on_file']
+			)
+			self.assertRaises(
+				ValueError, main, corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess},
+				output_file=os.path.join(tmp_dir, 'nonexistent.pickle'), augment=True
+			)
+
+			#Only the new feature is computed, so only its tokenize type is used
+			main(
+				corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess}, output_file=output_file,
+				features=['num_words_in_sentences'], augment=True, profile=True
+			)
+			with open(output_file + '.profile.csv', newline='') as csv_file:
+				self.assertEqual(
+					{(row['kind'], row['name']) for row in csv.DictReader(csv_file)},
+					{('parse', 'tess'), ('tokenize', 'sentences'), ('tokenize', 'sentence_words'),
+					('feature', 'num_words_in_sentences')}
+				)
+			with open(expected_file, 'rb') as expected, open(output_file, 'rb') as output:
+				self.assertEqual(pickle.load(expected), pickle.load(output))
+			self.assertFalse(os.path.isfile(output_file + '.partial'))
+
+	def testCacheReusesScores(self):
+		with TemporaryDirectory() as tmp_dir:
+			cache_file = os.path.join(tmp_dir, 'cache.sqlite')
+			results = []
+			for i in range(2):
+				output_file = os.path.join(tmp_dir, f'output{i}.pickle')
+				main(
+					corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess},
+					output_file=output_file, cache_file=cache_file
+				)
+				with open(output_file, 'rb') as pickle_file:
+					results.append(pickle.load(pickle_file))
+			self.assertEqual(results[0], results[1])
+
+			cache = FeatureCache(cache_file)
+			for file_name, scores in results[0].items():
+				cached_scores, _ = cache.lookup(file_name, parse_tess, scores.keys())
+				self.assertEqual(cached_scores, scores)
+			self.assertEqual(cache.hits, sum(len(scores) for scores in results[0].values()))
+			self.assertEqual(cache.misses, 0)
+			cached_scores, _ = cache.lookup(next(iter(results[0])), lambda file_name: '', ['dummy_feature'])
+			self.assertEqual(cached_scores, {})
+			cache.close()
+
+	def testCacheKeyedOnTokenizeType(self):
+		def num_tokens(text):
+			return len(text)
+		file_name = os.path.join(_DEMO_DIR, 'euripides.heracles.tess')
+		with TemporaryDirectory() as tmp_dir:
+			cache_file = os.path.join(tmp_dir, 'cache.sqlite')
+			#The same feature over tokenize types of the same name that are computed differently
+			derives = (
+				lambda text, words: [word for word in words if len(word) > 1],
+				lambda text, words: [word for word in words if len(word) > 2],
+			)
+			for i, derive in enumerate(derives):
+				session = ExtractionSession()
+				session.add_tokenize_type('long_words', derive_from=('words',), derive=derive)
+				session.textual_feature(tokenize_type='long_words')(num_tokens)
+				cache = FeatureCache(cache_file, session=session)
+				cached_scores, keys = cache.lookup(file_name, parse_tess, ['num_tokens'])
+				self.assertEqual(cached_scores, {})
+				cache.store(keys, {'num_tokens': i})
+				self.assertEqual(cache.lookup(file_name, parse_tess, ['num_tokens'])[0], {'num_tokens': i})
+				cache.close()
+
+	def testResumeAfterCrash(self):
+		global _crash_on_file
+		with TemporaryDirectory() as tmp_dir:
+			expected_file = os.path.join(tmp_dir, 'expected.pickle')
+			output_file = os.path.join(tmp_dir, 'output.pickle')
+			main(corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess}, output_file=expected_file)
+
+			#The third file in sorted order is Euripides' Heracles
+			_crash_on_file = parse_tess(os.path.join(_DEMO_DIR, 'euripides.heracles.tess'))[:40]
+			try:
+				self.assertRaises(
+					RuntimeError, main, corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess},
+					output_file=output_file
+				)
+			finally:
+				_crash_on_file = None
+			self.assertFalse(os.path.isfile(output_file))
+			self.assertTrue(os.path.isfile(output_file + '.partial'))
+			self.assertRaises(
+				ValueError, main, corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess},
+				output_file=output_file
+			)
+
+			#Simulate a record that was partially written when the process was killed
+			with open(output_file + '.partial', 'ab') as journal:
+				journal.write(b'\x40\x00\x00')
+
+			parsed_files = []
+			def parse_and_track(file_name):
+				parsed_files.append(os.path.basename(file_name))
+				return parse_tess(file_name)
+			main(
+				corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_and_track},
+				output_file=output_file, resume=True
+			)
+			self.assertEqual(parsed_files, ['euripides.heracles.tess', 'plato.respublica.part.1.tess'])
+			self.assertFalse(os.path.isfile(output_file + '.partial'))
+			with open(expected_file, 'rb') as expected, open(output_file, 'rb') as output:
+				self.assertEqual(pickle.load(expected), pickle.load(output))
+
+	def testProfile(self):
+		with TemporaryDirectory() as tmp_dir:
+			output_file = os.path.join(tmp_dir, 'output.pickle')
+			main(
+				corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess},
+				features=['num_words_in_sentences'], output_file=output_file, jobs=2, profile=True
+			)
+			with open(output_file + '.profile.csv', newline='') as csv_file:
+				rows = list(csv.DictReader(csv_file))
+			with open(output_file + '.profile.json') as json_file:
+				summary = json.load(json_file)
+		self.assertEqual(
+			{(row['kind'], row['name']) for row in rows},
+			{('parse', 'tess'), ('tokenize', 'sentence_words'), ('tokenize', 'sentences'), ('feature', 'num_words_in_sentences')}
+		)
+		self.assertEqual(sum(row['kind'] == 'feature' for row in rows), 4)
+		self.assertEqual(sum(total['calls'] for total in summary), len(rows))
+		self.assertEqual(summary, sorted(summary, key=lambda total: -total['seconds']))
+
+class TestExtractionSession(unittest.TestCase):
+
+	def testSessionsAreIsolated(self):
+		text = 'A b? C d. E f; G.'
+		session = ExtractionSession(terminal_punctuation=('?',), features=decorated_features.values())
+		self.assertEqual(session.tokenize_types['sentences']['func'](text), ['A b?', 'C d. E f; G.'])
+		self.assertEqual(decorated_features['num_words_in_sentences'](text=text), 11)
+		self.assertEqual(session.decorated_features['num_words_in_sentences'](text=text), 11)
+		self.assertEqual(session.decorated_features['num_words_in_sentences'](text=text, filepath='a'), 11)
+		self.assertIn(_token_key('sentence_words', text, 'a'), session.token_cache)
+		self.assertNotIn(_token_key('sentence_words', text, 'a'), default_session.token_cache)
+
+		#Neither the default session nor nltk's class attributes are changed by another session
+		self.assertEqual(default_session.tokenize_types['sentences']['func'](text), ['A b? C d. E f;', 'G.'])
+		self.assertEqual(PunktLanguageVars.sent_end_chars, ('.', '?', '!'))
+		self.assertRaises(Exception, session.setup_tokenizers, terminal_punctuation=('.',))
+
+		@session.textual_feature(tokenize_type='sentences')
+		def num_sentences(text):
+			return len(text)
+		self.assertEqual(num_sentences(text=text), 2)
+		self.assertNotIn('num_sentences', decorated_features)
+
+	def testAddedTokenizeType(self):
+		text = 'A b? C d. E f; G.'
+		session = ExtractionSession(terminal_punctuation=('.',))
+		session.add_tokenize_type(
+			'long_words', derive_from=('words',), derive=lambda text, words: [word for word in words if len(word) > 1]
+		)
+		self.assertRaises(ValueError, session.add_tokenize_type, 'long_words', derive_from=('words',), derive=len)
+		self.assertRaises(ValueError, session.add_tokenize_type, 'other', derive_from=('lines',), derive=len)
+		self.assertNotIn('long_words', default_session.tokenize_types)
+
+		@session.textual_feature(tokenize_type='long_words')
+		def num_long_words(text):
+			return len(text)
+		self.assertEqual(num_long_words(text='Ab c de.'), 2)
+		self.assertEqual(num_long_words(text='Ab c de.', filepath='a'), 2)
+		self.assertIn(_token_key('long_words', 'Ab c de.', 'a'), session.token_cache)
+
+		#A feature brings its tokenize type to another session
+		other = ExtractionSession(terminal_punctuation=('?',), features=[num_long_words])
+		self.assertIn('long_words', other.tokenize_types)
+		self.assertEqual(other.decorated_features['num_long_words'](text=text, filepath='a'), 0)
+
+		session.add_tokenize_type('num_commas', func=lambda text: text.count(','))
+		self.assertRaises(ValueError, session.add_tokenize_type, 'other', func=len, derive_from=('words',))
+		self.assertRaises(ValueError, session.add_tokenize_type, 'other', derive_from=('words',))
+
+		@session.textual_feature(tokenize_type='num_commas')
+		def commas(text):
+			return text
+		self.assertEqual(commas(text='a, b, c', filepath='a'), 2)
+		other = ExtractionSession(terminal_punctuation=('.',), features=[commas])
+		self.assertEqual(other.decorated_features['commas'](text=',', filepath='a'), 1)
+
+	def testConcurrentSessions(self):
+		with TemporaryDirectory() as tmp_dir:
+			def extract(session, output_file):
+				main(
+					corpus_dir=_DEMO_DIR, file_extension_to_parse_function={'tess': parse_tess},
+					features=['num_words_in_sentences'], output_file=os.path.join(tmp_dir, output_file), session=session
+				)
+			extract(None, 'serial.pickle')
+			sessions = [
+				ExtractionSession(terminal_punctuation=('.', ';', ';'), features=decorated_features.values())
+				for _ in range(2)
+			]
+			threads = [Thread(target=extract, args=(session, f'{i}.pickle')) for i, session in enumerate(sessions)]
+			for thread in threads:
+				thread.start()
+			for thread in threads:
+				thread.join()
+			results = []
+			for output_file in ('serial.pickle', '0.pickle', '1.pickle'):
+				with open(os.path.join(tmp_dir, output_file), 'rb') as pickle_file:
+					results.append(pickle.load(pickle_file))
+			self.assertEqual(results[1], results[0])
+			self.assertEqual(results[2], results[0])
+
 if __name__ == '__main__':
 	unittest.main()
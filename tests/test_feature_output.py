@@ -0,0 +1,105 @@
+#pylint: disable = missing-docstring, invalid-name, unused-argument
+'''Test reading and writing feature extraction results'''
+import unittest
+import os
+import pickle
+from tempfile import TemporaryDirectory
+from math import isnan
+
+import numpy as np
+
+import context #pylint: disable=unused-import
+from qcrit import analyze_models
+from qcrit.feature_output import write_features, read_features, read_feature_matrix
+from qcrit.model_analyzer import model_analyzer, DECORATED_ANALYZERS
+
+_TEXT_TO_FEATURES = {
+	'corpus/a.txt': {'x': 1.5, 'y': 2, 'z': None},
+	'corpus/b.txt': {'x': 3.0, 'y': -4, 'z': 0.25},
+	'corpus/c.txt': {'x': 0.0, 'y': 7, 'z': 8.5},
+}
+
+_received = {}
+
+@model_analyzer()
+def record_inputs(data, target, file_names, feature_names, labels_key):
+	_received.update(data=data, target=target, file_names=file_names, feature_names=feature_names)
+
+class TestFeatureOutput(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp_dir = TemporaryDirectory()
+
+	def tearDown(self):
+		self.tmp_dir.cleanup()
+
+	def path(self, name):
+		return os.path.join(self.tmp_dir.name, name)
+
+	def test_pickle_round_trip(self):
+		write_features(self.path('output.pickle'), _TEXT_TO_FEATURES)
+		with open(self.path('output.pickle'), 'rb') as pickle_file:
+			self.assertEqual(pickle.load(pickle_file), _TEXT_TO_FEATURES)
+		self.assertEqual(read_features(self.path('output.pickle')), _TEXT_TO_FEATURES)
+		self.assertFalse(os.path.exists(self.path('output.pickle.tmp')))
+
+	def test_columnar_round_trip(self):
+		write_features(self.path('output.npz'), _TEXT_TO_FEATURES)
+		data, file_names, feature_names = read_feature_matrix(self.path('output.npz'))
+		self.assertIsInstance(data, np.memmap)
+		self.assertEqual(file_names, list(_TEXT_TO_FEATURES))
+		self.assertEqual(feature_names, ['x', 'y', 'z'])
+		self.assertEqual(data.shape, (3, 3))
+		self.assertEqual(data[1].tolist(), [3.0, -4.0, 0.25])
+		self.assertTrue(isnan(data[0, 2]))
+
+		results = read_features(self.path('output.npz'))
+		self.assertEqual(results['corpus/c.txt'], _TEXT_TO_FEATURES['corpus/c.txt'])
+		self.assertTrue(isnan(results['corpus/a.txt']['z']))
+
+	def test_columnar_rejects_non_numbers(self):
+		self.assertRaises(ValueError, write_features, self.path('output.npz'), {'a.txt': {'x': 'abc'}})
+
+	def test_pickle_matrix(self):
+		write_features(self.path('output.pickle'), _TEXT_TO_FEATURES)
+		data, file_names, feature_names = read_feature_matrix(self.path('output.pickle'))
+		self.assertEqual(file_names, list(_TEXT_TO_FEATURES))
+		self.assertEqual(feature_names, ['x', 'y', 'z'])
+		self.assertEqual(data[1].tolist(), [3.0, -4.0, 0.25])
+		self.assertTrue(isnan(data[0, 2]))
+
+		write_features(self.path('output.pickle'), {'a.txt': {'x': 'abc', 'y': 1}})
+		data, _, _ = read_feature_matrix(self.path('output.pickle'))
+		self.assertEqual(data.tolist(), [['abc', '1']])
+
+	def test_analyze_selected_features(self):
+		write_features(self.path('output.npz'), _TEXT_TO_FEATURES)
+		with open(self.path('labels.csv'), 'w') as labels:
+			labels.write('prose:0,verse:1\nfile,label\ncorpus/c.txt,1\ncorpus/b.txt,0\n')
+		analyze_models.main(self.path('output.npz'), self.path('labels.csv'), ['record_inputs'], features=['y', 'x'])
+		self.assertEqual(_received['file_names'], ['corpus/b.txt', 'corpus/c.txt'])
+		self.assertEqual(_received['feature_names'], ['x', 'y'])
+		self.assertEqual(_received['data'].tolist(), [[3.0, -4.0], [0.0, 7.0]])
+		self.assertEqual(_received['target'].tolist(), ['0', '1'])
+		self.assertRaises(
+			ValueError, analyze_models.main, self.path('output.npz'), self.path('labels.csv'), ['record_inputs'],
+			features=['w']
+		)
+
+	def test_analyze_pickle_matches_columnar(self):
+		with open(self.path('labels.csv'), 'w') as labels:
+			labels.write('prose:0,verse:1\nfile,label\ncorpus/a.txt,0\ncorpus/b.txt,0\ncorpus/c.txt,1\n')
+		results = []
+		for output_file in ('output.pickle', 'output.npz'):
+			write_features(self.path(output_file), _TEXT_TO_FEATURES)
+			analyze_models.main(self.path(output_file), self.path('labels.csv'), ['record_inputs'], features=['x', 'y'])
+			results.append(dict(_received))
+		self.assertEqual(results[0]['data'].tolist(), results[1]['data'].tolist())
+		self.assertEqual(results[0]['file_names'], results[1]['file_names'])
+
+	@classmethod
+	def tearDownClass(cls):
+		del DECORATED_ANALYZERS['record_inputs']
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,47 @@
+#pylint: disable = missing-docstring, invalid-name
+'''Test that importing qcrit does not import its heavy dependencies until they are used'''
+import unittest
+import os
+import sys
+import subprocess
+
+import context #pylint: disable=unused-import
+
+_REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def _cold_import(module, then=''):
+	#Import the module (and run the statement then) in a new interpreter, returning the seconds the import took and
+	#the top-level modules that were imported
+	result = subprocess.run(
+		[
+			sys.executable, '-X', 'importtime', '-c',
+			'\n'.join((
+				'import sys', f'import {module}', then,
+				'print(" ".join(sorted({name.split(".")[0] for name in sys.modules})))'
+			))
+		],
+		cwd=_REPO_DIR, capture_output=True, text=True, check=True,
+	)
+	#Each line of stderr is "import time: <self us> | <cumulative us> | <module>"
+	cumulative = next(
+		int(line.split('|')[1]) for line in result.stderr.splitlines()
+		if line.startswith('import time:') and line.split('|')[2].strip() == module
+	)
+	return cumulative / 1e6, set(result.stdout.split())
+
+class TestImportTime(unittest.TestCase):
+
+	def test_cold_start(self):
+		for module in ('qcrit.extract_features', 'qcrit.analyze_models', 'qcrit.analysis.analyzers'):
+			seconds, modules = _cold_import(module)
+			print(f'Cold import of {module}: {seconds:.3f} seconds')
+			self.assertFalse(modules & {'nltk', 'sklearn', 'tqdm'}, module)
+
+	def test_imported_when_used(self):
+		_, modules = _cold_import(
+			'qcrit.textual_feature', 'qcrit.textual_feature.setup_tokenizers(terminal_punctuation=(".",))'
+		)
+		self.assertIn('nltk', modules)
+
+if __name__ == '__main__':
+	unittest.main()
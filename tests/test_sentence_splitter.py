@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+#pylint: disable = missing-docstring, invalid-name, protected-access
+'''Conformance of the fast sentence splitter with Punkt'''
+import unittest
+import os
+import re
+
+import context #pylint: disable=unused-import
+from qcrit.textual_feature import ExtractionSession
+from qcrit.extract_features import parse_tess
+
+_DEMO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'demo')
+_TERMINAL_PUNCTUATION = ('.', ';', ';')
+
+punkt_session = ExtractionSession(terminal_punctuation=_TERMINAL_PUNCTUATION)
+fast_session = ExtractionSession(terminal_punctuation=_TERMINAL_PUNCTUATION, sentence_splitter='fast')
+
+#A single letter (e.g. an initial) or a number before terminal punctuation, where Punkt does not end a sentence if
+#the next word does not look like the start of one
+_INITIAL_OR_NUMBER = re.compile(r'\W*\w\W*|[\d.]+')
+
+class TestFastSentenceSplitter(unittest.TestCase):
+
+	def assert_same_sentences(self, text):
+		self.assertEqual(
+			fast_session.sentence_tokenizer.tokenize(text), punkt_session.sentence_tokenizer.tokenize(text)
+		)
+
+	def test_demo_corpus(self):
+		#Report each sentence boundary where the splitters differ, and check that Punkt only differs because of
+		#its heuristics for initials and numbers
+		for file_name in sorted(os.listdir(_DEMO_DIR)):
+			if not file_name.endswith('.tess'):
+				continue
+			text = parse_tess(os.path.join(_DEMO_DIR, file_name))
+			punkt_spans = list(punkt_session.sentence_tokenizer.span_tokenize(text))
+			fast_spans = list(fast_session.sentence_tokenizer.span_tokenize(text))
+			punkt_ends = {end for _, end in punkt_spans}
+			fast_ends = {end for _, end in fast_spans}
+			print(
+				f'{file_name}: {len(set(punkt_spans) & set(fast_spans))} of {len(punkt_spans)} Punkt sentences '
+				f'are identical, {len(punkt_ends - fast_ends)} ends are only found by Punkt, '
+				f'{len(fast_ends - punkt_ends)} ends are only found by the fast splitter'
+			)
+			for end in sorted(fast_ends - punkt_ends):
+				print(f'\tOnly the fast splitter ends a sentence at: {text[max(end - 30, 0):end]!r}')
+				self.assertTrue(_INITIAL_OR_NUMBER.fullmatch(text[:end].split()[-1]), text[max(end - 30, 0):end])
+			self.assertFalse(punkt_ends - fast_ends)
+			self.assertGreaterEqual(len(set(punkt_spans) & set(fast_spans)), 0.99 * len(punkt_spans))
+
+	def test_same_sentences(self):
+		for text in (
+			'', '   ', 'abc', 'word. word', 'ab. Word', 'a b."C d.', 'a b.) C d.', 'a (b.) c.', 'a b;C d.', 'a.b. C',
+			'a...b c.', 'test test. test test test test test test; test test. test.',
+			'a b c. "a b c". a b c. "a b c." a b c. “a b c”. a b c. “a b c.” a b c.',
+			'καὶ εὑρέθησαν οὕτω. Μόψος ἔφη: “Κάλχας τεχθήσεσθαι.”ὧν γενομένων Κάλχας ἀπέθανε.',
+		):
+			self.assert_same_sentences(text)
+
+	def test_documented_differences(self):
+		tokenize = fast_session.sentence_tokenizer.tokenize
+		#Initials and numbers end sentences
+		self.assertEqual(tokenize('I. Word'), ['I.', 'Word'])
+		self.assertEqual(tokenize('x 3.5 y. Z'), ['x 3.5 y.', 'Z'])
+		#An ellipsis followed by whitespace ends a sentence
+		self.assertEqual(tokenize('A b... C d.'), ['A b...', 'C d.'])
+		self.assertEqual(tokenize('A b. . . C d.'), ['A b.', '.', '.', 'C d.'])
+		#Whitespace before the first sentence is left out
+		self.assertEqual(tokenize('  Ab. Cd.  '), ['Ab.', 'Cd.'])
+		self.assertEqual(punkt_session.sentence_tokenizer.tokenize('  Ab. Cd.  '), ['  Ab.', 'Cd.'])
+
+	def test_tokenize_types(self):
+		text = parse_tess(os.path.join(_DEMO_DIR, 'euripides.heracles.tess'))
+		for tokenize_type in ('sentences', 'words', 'sentence_words'):
+			expected = punkt_session.tokenize_types[tokenize_type]['func'](text)
+			self.assertEqual(fast_session._cached_tokens(tokenize_type, text, 'a'), expected)
+			compact = fast_session._cached_tokens(f'compact_{tokenize_type}', text, 'a')
+			if tokenize_type == 'sentence_words':
+				self.assertEqual([list(sentence) for sentence in compact], expected)
+			else:
+				self.assertEqual(list(compact), expected)
+
+	def test_invalid_settings(self):
+		self.assertRaises(
+			ValueError, ExtractionSession, terminal_punctuation=_TERMINAL_PUNCTUATION, sentence_splitter='slow'
+		)
+		self.assertRaises(
+			ValueError, ExtractionSession, terminal_punctuation=_TERMINAL_PUNCTUATION, language='greek',
+			sentence_splitter='fast'
+		)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -2,11 +2,23 @@
 #pylint: disable = missing-docstring, blacklisted-name, unused-argument, invalid-name, line-too-long, protected-access
 import unittest
 import re
+import os
+import tempfile
+from collections import Counter
+from unicodedata import normalize
 
 from nltk.tokenize.punkt import PunktSentenceTokenizer, PunktLanguageVars
+import numpy as np
 
 import context #pylint: disable=unused-import
-from qcrit import textual_feature
+from qcrit import textual_feature, parallel_tokenize
+from qcrit.extract_features import parse_tess
+from qcrit.vocabulary import Vocabulary, WordIds
+from qcrit.lexicon import LexiconMatcher
+from qcrit.parse_tree import parse_bracketed
+from qcrit.pattern_counter import PatternCounter
+from qcrit.phrase_matcher import PhraseMatcher
+from qcrit.features import parsed_english_features
 
 #[^\s\d’”\'\"）\)\]\}\.,:;]
 #[“‘—\-†&vâ\*\^（α-ωΑ-Ὠ`̔]
@@ -110,6 +122,427 @@ class TestParsers(unittest.TestCase):
 		expected = ['a', 'b', '†', 'c', '.', '"', 'a', 'b', '‡', 'c', '"', '.', 'a', 'b', 'c', '.', '"', 'a', 'b', 'c', '†', '.', '"', 'a', 'b', 'c', '.', '“', 'a', 'b', 'c', '†', '”', '.', 'a', 'b', 'c', '.', '“', 'a', '‡', 'b', 'c', '.', '”', 'a', 'b', 'c', '.']
 		self.assertEqual(expected, result)
 
+class TestDerivedTokenizeTypes(unittest.TestCase):
+
+	def assert_derived_tokens_match(self, text, filepath):
+		textual_feature.clear_cache()
+		for tokenize_type in ('words', 'sentence_words'):
+			self.assertEqual(
+				textual_feature._cached_tokens(tokenize_type, text, filepath),
+				textual_feature.tokenize_types[tokenize_type]['func'](text)
+			)
+
+	def test_demo_corpus(self):
+		demo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'demo')
+		for file_name in sorted(os.listdir(demo_dir)):
+			if file_name.endswith('.tess'):
+				text = parse_tess(os.path.join(demo_dir, file_name))
+				sentences = textual_feature.tokenize_types['sentences']['func'](text)
+				#Aristotle's Poetics has a ". . ." that spans two sentences
+				if textual_feature._sentences_separate_words(text, sentences):
+					self.assertEqual(
+						[word for sentence in textual_feature.tokenize_types['sentence_words']['func'](text) for word in sentence],
+						textual_feature.tokenize_types['words']['func'](text)
+					)
+				else:
+					self.assertEqual(file_name, 'aristotle.poetics.tess')
+				self.assert_derived_tokens_match(text, file_name)
+
+	def test_boundaries_without_whitespace(self):
+		s = 'καὶ εὑρέθησαν οὕτω. Μόψος ἔφη: “Κάλχας τεχθήσεσθαι.”ὧν γενομένων Κάλχας ἀπέθανε.'
+		self.assertFalse(textual_feature._sentences_separate_words(s, textual_feature.sentence_tokenizer.tokenize(s)))
+		self.assert_derived_tokens_match(s, 'a')
+
+	def test_ellipsis_across_boundary(self):
+		s = 'a b c. . . d e f. g h. . i j.'
+		self.assert_derived_tokens_match(s, 'b')
+
+	def test_surrounding_whitespace(self):
+		for s in ('', '   ', '\n a b. c d; \n', 'a b. \u00a0 c d.'):
+			self.assert_derived_tokens_match(s, s)
+
+class TestCompactTokenizeTypes(unittest.TestCase):
+
+	def assert_compact_tokens_match(self, text, filepath):
+		textual_feature.clear_cache()
+		for tokenize_type in ('sentences', 'words', 'sentence_words'):
+			expected = textual_feature.tokenize_types[tokenize_type]['func'](text)
+			for compact in (
+				textual_feature._cached_tokens(f'compact_{tokenize_type}', text, filepath),
+				textual_feature.tokenize_types[f'compact_{tokenize_type}']['func'](text),
+			):
+				if tokenize_type == 'sentence_words':
+					self.assertEqual([list(sentence) for sentence in compact], expected)
+					self.assertEqual(compact.lengths().tolist(), [len(sentence) for sentence in expected])
+				else:
+					self.assertEqual(list(compact), expected)
+					self.assertEqual(compact.lengths().tolist(), [len(token) for token in expected])
+
+	def test_demo_corpus(self):
+		demo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'demo')
+		for file_name in sorted(os.listdir(demo_dir)):
+			if file_name.endswith('.tess'):
+				self.assert_compact_tokens_match(parse_tess(os.path.join(demo_dir, file_name)), file_name)
+
+	def test_derived_words_fall_back(self):
+		for s in (
+			'a b c. . . d e f. g h. . i j.', '', '   ', '\n a b. c d; \n',
+			'καὶ εὑρέθησαν οὕτω. Μόψος ἔφη: “Κάλχας τεχθήσεσθαι.”ὧν γενομένων Κάλχας ἀπέθανε.',
+		):
+			self.assert_compact_tokens_match(s, s)
+
+	def test_words_derived_only_from_cached_sentences(self):
+		session = textual_feature.ExtractionSession(terminal_punctuation=('.', ';', ';'))
+		calls = []
+		for tokenize_type in ('sentences', 'compact_sentences', 'words', 'compact_words'):
+			def counting_func(text, tokenize_type=tokenize_type, func=session.tokenize_types[tokenize_type]['func']):
+				calls.append(tokenize_type)
+				return func(text)
+			session.tokenize_types[tokenize_type]['func'] = counting_func
+		for text in ('a b c. . . d e f. g h. . i j.', '\n a b. c d; \n', 'καὶ εὑρέθησαν οὕτω. Μόψος ἔφη: “Κάλχας.”ὧν γενομένων.'):
+			words = textual_feature.tokenize_types['words']['func'](text)
+			for tokenize_type, sentences_type in (('words', 'sentence_words'), ('compact_words', 'compact_sentence_words')):
+				#The words of a text whose sentences are not cached are found without splitting it into sentences
+				session.clear_cache()
+				calls.clear()
+				self.assertEqual(list(session._cached_tokens(tokenize_type, text, text)), words)
+				self.assertEqual(calls, [tokenize_type])
+				#Otherwise they are taken from the words of the cached sentences
+				session.clear_cache()
+				session._cached_tokens(sentences_type, text, text)
+				calls.clear()
+				self.assertEqual(list(session._cached_tokens(tokenize_type, text, text)), words)
+				self.assertEqual(calls, [])
+
+	def test_sequence_views(self):
+		s = 'test test. test testing test; test test test. test.'
+		sentence_words = textual_feature.tokenize_types['compact_sentence_words']['func'](s)
+		self.assertEqual(len(sentence_words), 4)
+		self.assertEqual(list(sentence_words[1]), ['test', 'testing', 'test', ';'])
+		self.assertEqual(sentence_words[-1][0], 'test')
+		self.assertEqual([list(sentence) for sentence in sentence_words[1:3]], [['test', 'testing', 'test', ';'], ['test', 'test', 'test', '.']])
+		self.assertEqual(list(sentence_words[1][1:3]), ['testing', 'test'])
+		self.assertEqual(sentence_words[1][1:3].lengths().tolist(), [7, 4])
+		self.assertEqual(list(sentence_words.groups), textual_feature.tokenize_types['sentences']['func'](s))
+		self.assertRaises(IndexError, lambda: sentence_words[4])
+		self.assertEqual(sentence_words.tokens.starts.dtype, np.int32)
+
+class TestWordIds(unittest.TestCase):
+
+	def test_word_ids(self):
+		textual_feature.clear_cache()
+		s = 'a b c. b c d; c d e f.'
+		word_ids = textual_feature._cached_tokens('word_ids', s, 'a')
+		self.assertEqual(list(word_ids), textual_feature.tokenize_types['words']['func'](s))
+		self.assertEqual(word_ids.ids.tolist(), [0, 1, 2, 3, 1, 2, 4, 5, 2, 4, 6, 7, 3])
+		self.assertEqual([array.tolist() for array in word_ids.id_counts()], [list(range(8)), [1, 2, 3, 2, 2, 1, 1, 1]])
+		self.assertEqual([array.tolist() for array in word_ids.id_counts(str.isalpha)], [[0, 1, 2, 4, 6, 7], [1, 2, 3, 2, 1, 1]])
+		self.assertEqual(word_ids.count_of({'c', 'd', 'z'}), 5)
+
+		#Ids are shared across the texts of a run, and new words get new ids
+		word_ids = textual_feature._cached_tokens('word_ids', 'z c', 'b')
+		self.assertEqual(word_ids.ids.tolist(), [8, 2])
+		#Only the ids of the text are counted, however large the vocabulary is
+		self.assertEqual([array.tolist() for array in word_ids.id_counts(str.isalpha)], [[2, 8], [1, 1]])
+		self.assertEqual(word_ids.count_of({'c', 'd', 'y'}), 1)
+
+		textual_feature.clear_cache()
+		self.assertEqual(textual_feature._cached_tokens('word_ids', 'z c', 'b').ids.tolist(), [0, 1])
+
+	def test_vocabulary_values(self):
+		vocabulary = Vocabulary()
+		vocabulary.encode(['ab', 'c'])
+		self.assertEqual(vocabulary.values(len).tolist(), [2, 1])
+		vocabulary.encode(['def', 'ab'])
+		self.assertEqual(vocabulary.values(len).tolist(), [2, 1, 3])
+		self.assertEqual(vocabulary.mask(lambda word: len(word) > 1).tolist(), [True, False, True])
+		#The remembered values grow as words are added a few at a time
+		for i in range(100):
+			vocabulary.encode([str(i)])
+			self.assertEqual(vocabulary.values(len).tolist(), [len(word) for word in vocabulary.words])
+
+class TestWordStatistics(unittest.TestCase):
+
+	def assert_statistics_match(self, text, filepath):
+		textual_feature.clear_cache()
+		statistics = textual_feature._cached_tokens('word_statistics', text, filepath)
+		words = textual_feature.tokenize_types['words']['func'](text)
+		sentence_words = textual_feature.tokenize_types['sentence_words']['func'](text)
+		self.assertEqual(statistics.uppercase, sum(letter.isupper() for word in words for letter in word))
+		self.assertEqual(statistics.lowercase, sum(letter.islower() for word in words for letter in word))
+		self.assertEqual(statistics.chars, sum(len(word) for word in words))
+		word_counts = Counter(word for word in words if re.match(r'^\w+$', word))
+		self.assertEqual(statistics.word_counts, word_counts)
+		self.assertEqual(statistics.num_words, sum(word_counts.values()))
+		self.assertEqual(statistics.frequency_counts, Counter(word_counts.values()))
+		self.assertEqual(statistics.word_length_counts, Counter(len(word) for word in word_counts.elements()))
+		self.assertEqual(statistics.num_sentences, len(sentence_words))
+		self.assertEqual(statistics.sentence_chars, sum(len(word) for sentence in sentence_words for word in sentence))
+		sentence_words = [[word for word in sentence if re.match(r'^\w+$', word)] for sentence in sentence_words]
+		self.assertEqual(statistics.sentences_without_words, sum(1 for sentence in sentence_words if not sentence))
+		self.assertEqual(statistics.start_words, Counter(sentence[0] for sentence in sentence_words if sentence))
+		self.assertEqual(statistics.stop_words, Counter(sentence[-1] for sentence in sentence_words if sentence))
+		self.assertEqual(statistics.start_letters, Counter(sentence[0][0].lower() for sentence in sentence_words if sentence))
+		self.assertEqual(statistics.stop_letters, Counter(sentence[-1][0].lower() for sentence in sentence_words if sentence))
+		self.assertEqual(textual_feature.tokenize_types['word_statistics']['func'](text).word_counts, word_counts)
+
+	def test_demo_corpus(self):
+		demo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'demo')
+		for file_name in ('aristotle.poetics.tess', 'euripides.heracles.tess'):
+			self.assert_statistics_match(parse_tess(os.path.join(demo_dir, file_name)), file_name)
+
+	def test_sentences_without_words(self):
+		for s in ('', '. ; .', 'A b. C d; e F. . . G', 'καὶ εὑρέθησαν οὕτω. Μόψος ἔφη: “Κάλχας τεχθήσεσθαι.”ὧν γενομένων Κάλχας ἀπέθανε. 12 3.'):
+			self.assert_statistics_match(s, s)
+
+	def test_one_sentence_pass(self):
+		#The words and the sentences of the statistics come from a single pass of the sentence tokenizer
+		session = textual_feature.ExtractionSession(terminal_punctuation=('.', ';', ';'))
+		calls = []
+		sentence_tokenizer = session.sentence_tokenizer
+		class CountingTokenizer:
+			def tokenize(self, text):
+				calls.append(text)
+				return sentence_tokenizer.tokenize(text)
+			def span_tokenize(self, text):
+				calls.append(text)
+				return sentence_tokenizer.span_tokenize(text)
+		session.sentence_tokenizer = CountingTokenizer()
+		for text in ('A b. C d; e F. . . G', 'καὶ εὑρέθησαν οὕτω. Μόψος ἔφη: “Κάλχας τεχθήσεσθαι.”ὧν γενομένων.'):
+			statistics = session._cached_tokens('word_statistics', text, text)
+			self.assertEqual(statistics.chars, sum(len(word) for word in session.tokenize_types['words']['func'](text)))
+			self.assertEqual(len(calls), 1)
+			calls.clear()
+
+class TestLexiconMatcher(unittest.TestCase):
+
+	def test_counts(self):
+		matcher = LexiconMatcher({'men': {'μέν', 'μὲν'}, 'particles': {'μέν', 'δέ'}}, suffixes={'superlative': ('τατος',)})
+		vocabulary = Vocabulary()
+		words = ['μέν', normalize('NFD', 'μὲν'), 'δέ', 'καί', 'κάλλιστατος', 'μέν']
+		counts = matcher.count(WordIds(vocabulary.encode(words), vocabulary))
+		self.assertEqual(counts.counts, {'men': 3, 'particles': 3, 'superlative': 1})
+		self.assertEqual(counts.chars, sum(len(word) for word in words))
+		self.assertEqual(counts.has('particles').tolist(), [True, False, True, False, False, True])
+		self.assertIn(normalize('NFD', 'δέ'), matcher.table)
+		with self.assertRaises(TypeError):
+			matcher.table['καί'] = 1
+
+class TestPatternCounter(unittest.TestCase):
+
+	def test_counts(self):
+		counter = PatternCounter()
+		patterns = {
+			'tags': (r'\b(?:DT|IN)\s', 0),
+			'conjunctions': (r'\b(?:and|or|ore)\)', re.IGNORECASE),
+			'selves': (r'(self|selves)\)', 0),
+		}
+		for name, (pattern, flags) in patterns.items():
+			counter.add(name, pattern, flags)
+		self.assertRaises(ValueError, counter.add, 'tags', r'\bMD\s')
+		self.assertRaises(ValueError, counter.add, 'not a name', r'\bMD\s')
+		self.assertRaises(ValueError, counter.add, 'verbose', r'\bMD\s', re.VERBOSE)
+		self.assertRaises(re.error, counter.add, 'unbalanced', r'(\bMD\s')
+		text = '( (IP (NP (DT the) (N ore)) (CONJ AND) (PRO themselves) (P in) (IN for) (CONJ Or) (ADV yore) (. .)))'
+		counts = counter.count(text)
+		self.assertEqual(counts, {
+			name: sum(1 for _ in re.finditer(pattern, text, flags)) for name, (pattern, flags) in patterns.items()
+		})
+		self.assertEqual(counts, {'tags': 2, 'conjunctions': 3, 'selves': 1})
+		self.assertEqual(counter.count(''), {'tags': 0, 'conjunctions': 0, 'selves': 0})
+		#The alternation is compiled once a text is counted
+		self.assertRaises(ValueError, counter.add, 'modals', r'\bMD\s')
+
+class TestPhraseMatcher(unittest.TestCase):
+
+	def test_occurrences(self):
+		phrases = [('in', 'the', 'end'), ('in', 'the'), ('the', 'end', 'of', 'the', 'day'), ('the',), ('the',)]
+		matcher = PhraseMatcher(phrases, casefold=True)
+		tokens = 'In THE end of the day , in the'.split()
+		lowered = [token.lower() for token in tokens]
+		expected = sorted(
+			(start, start + len(phrase), index) for index, phrase in enumerate(phrases)
+			for start in range(len(tokens)) if tuple(lowered[start:start + len(phrase)]) == phrase
+		)
+		self.assertEqual(sorted(matcher.finditer(tokens)), expected)
+		self.assertEqual(matcher.count(tokens), 10)
+		self.assertEqual(PhraseMatcher(phrases).count(tokens), 5)
+		self.assertEqual(matcher.count([]), 0)
+		self.assertRaises(ValueError, PhraseMatcher, [('a',), ()])
+
+	def test_predicates(self):
+		matcher = PhraseMatcher([('+ta', lambda word: 'hwil' in word), (lambda word: word.isdigit(), 'b')])
+		tokens = ['+ta', 'hwile', '+ta', '+ta', 'hwil', '1', 'b', 'b']
+		self.assertEqual(list(matcher.finditer(tokens)), [(0, 2, 0), (3, 5, 0), (5, 7, 1)])
+		#No occurrence spans two sentences
+		sentences = [['+ta'], ['hwile', '+ta', 'hwil'], [], ['+ta', 'hwilum', '7'], ['b']]
+		self.assertEqual(matcher.count_in_sentences(sentences), 2)
+		self.assertEqual(matcher.count_in_sentences([]), 0)
+
+	def test_word_ids(self):
+		matcher = PhraseMatcher([('ἡμῶν', 'αὐτῶν'), ('ἡμῶν',)])
+		vocabulary = Vocabulary()
+		words = ['ἡμῶν', 'αὐτῶν', 'καί', 'ἡμῶν', 'ἡμῶν', 'αὐτῶν']
+		word_ids = WordIds(vocabulary.encode(words), vocabulary)
+		self.assertEqual(list(matcher.finditer_ids(word_ids)), list(matcher.finditer(words)))
+		self.assertEqual(matcher.count_ids(word_ids), 5)
+
+class TestParseTree(unittest.TestCase):
+
+	def test_leaves(self):
+		text = '( (IP-MAT (NP-SBJ (PRO he)) (VBD came) (. .)) (ID ex.1))\n( (IP-MAT (INTJ oh) (. !)))\n(CODE x'
+		tree = parse_bracketed(text)
+		self.assertEqual(list(tree.tags), ['PRO', 'VBD', '.', 'ID', 'INTJ', '.'])
+		self.assertEqual(list(tree.words), ['he', 'came', '.', 'ex.1', 'oh', '!'])
+		self.assertEqual(tree.depths.tolist(), [4, 3, 3, 2, 3, 3])
+		self.assertEqual(tree.sentences.tolist(), [0, 0, 0, 0, 1, 1])
+		#The unclosed bracket at the end starts a third sentence
+		self.assertEqual(tree.num_sentences, 3)
+		self.assertEqual(parse_bracketed('(X a)) (Y b c)').words.starts.tolist(), [3, 10])
+		self.assertEqual(parse_bracketed('(X a)) (Y b c)').sentences.tolist(), [0, 1])
+		tree = parse_bracketed('( (IP-MAT ( moreover) (. .)))')
+		self.assertEqual((list(tree.tags), list(tree.words)), (['', '.'], ['moreover', '.']))
+
+	def test_sentence_words(self):
+		text = (
+			'( (IP-MAT (CONJ +ta) (NP (N hwile)) (ID syn. 1.2 At) (NP (D the) (N end)) (. .)) (CODE <x>)) '
+			'( (IP-MAT (PRO it) (, ,) (VBD stopped) (. ?)) )( (IP-MAT (PRO gone'
+		)
+		#The words are those of the regex that the features used before, including those of leaves without a tag
+		for text, expected in (
+			(text, [['+ta', 'hwile', 'At', 'the', 'end', '.'], ['it', 'stopped', '?']]),
+			('( moreover) (. .)', [['moreover', '.']]),
+			('( (IP-MAT (ADV ( moreover)) (PRO he) (. !)))', [['moreover', 'he', '!']]),
+		):
+			sentences = []
+			cur_sentence = []
+			for match in re.finditer(r' ([A-Za-z&+.!?-]+?)\)', text):
+				cur_sentence.append(match.group(1))
+				if match.group(1) in ('.', '!', '?'):
+					sentences.append(cur_sentence)
+					cur_sentence = []
+			self.assertEqual(sentences, expected)
+			self.assertEqual(parsed_english_features._sentence_words(parse_bracketed(text)), sentences)
+			self.assertEqual(textual_feature._cached_tokens('parsed_sentence_words', text, 'a'), sentences)
+		#Except for text after the brackets in a bracket, which is not a leaf
+		text = '( (IP-MAT (NP (N end) extra) (. .)))'
+		self.assertEqual(parsed_english_features._sentence_words(parse_bracketed(text)), [['end', '.']])
+		textual_feature.clear_cache()
+
+class TestDiskTokenCache(unittest.TestCase):
+
+	def tearDown(self):
+		textual_feature.set_token_cache_dir(None)
+		textual_feature.clear_cache()
+
+	def test_stored_tokens_match(self):
+		demo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'demo')
+		texts = [parse_tess(os.path.join(demo_dir, 'aristotle.poetics.tess')), 'a b c. . . d e f. g h. . i j.', '']
+		with tempfile.TemporaryDirectory() as cache_dir:
+			for run in range(2):
+				textual_feature.set_token_cache_dir(cache_dir)
+				for text in texts:
+					for tokenize_type in ('sentences', 'words', 'sentence_words', 'compact_sentence_words'):
+						tokens = textual_feature._cached_tokens(tokenize_type, text, 'a')
+						if tokenize_type.startswith('compact_'):
+							self.assertEqual(tokens, textual_feature.tokenize_types[tokenize_type]['func'](text))
+							self.assertEqual(list(tokens.groups), textual_feature.tokenize_types['sentences']['func'](text))
+							self.assertIsInstance(tokens.bounds, np.memmap if run else np.ndarray)
+						else:
+							self.assertEqual(tokens, textual_feature.tokenize_types[tokenize_type]['func'](text))
+				stats = textual_feature.cache_stats()['disk']
+				#The second run loads the tokens of every text instead of tokenizing them
+				self.assertEqual(stats, {'hits': 3 * len(texts), 'misses': 0} if run else {'hits': 0, 'misses': 3 * len(texts)})
+				textual_feature.set_token_cache_dir(None)
+				textual_feature.clear_cache()
+
+	def test_settings_change_key(self):
+		with tempfile.TemporaryDirectory() as cache_dir:
+			textual_feature.set_token_cache_dir(cache_dir)
+			textual_feature._cached_tokens('compact_sentences', 'a b. c d; e.', 'a')
+			textual_feature.clear_cache()
+			textual_feature.disk_token_cache.settings += 'changed'
+			textual_feature._cached_tokens('compact_sentences', 'a b. c d; e.', 'a')
+			self.assertEqual(textual_feature.cache_stats()['disk'], {'hits': 0, 'misses': 1})
+		self.assertRaises(ValueError, textual_feature.set_token_cache_dir, __file__)
+
+class TestParallelTokenization(unittest.TestCase):
+
+	def tearDown(self):
+		textual_feature.set_tokenize_jobs(1)
+		textual_feature.clear_cache()
+
+	def assert_parallel_tokens_match(self, text, jobs):
+		#Compare with a text of the same value that is not in the token cache
+		textual_feature.clear_cache()
+		textual_feature.set_tokenize_jobs(jobs, min_chars=0)
+		for tokenize_type in ('sentences', 'words', 'sentence_words', 'compact_sentences', 'compact_words', 'compact_sentence_words'):
+			tokens = textual_feature._cached_tokens(tokenize_type, text, 'a')
+			expected = textual_feature.tokenize_types[tokenize_type]['func'](text)
+			if tokenize_type == 'compact_sentence_words':
+				self.assertEqual(tokens.bounds.tolist(), expected.bounds.tolist())
+				self.assertEqual(list(tokens.tokens), list(expected.tokens))
+			else:
+				self.assertEqual(list(tokens), list(expected), (text, jobs, tokenize_type))
+
+	def test_demo_corpus(self):
+		demo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'demo')
+		text = '\n\n'.join(parse_tess(os.path.join(demo_dir, file_name)) for file_name in ('aristotle.poetics.tess', 'euripides.heracles.tess'))
+		for jobs in (2, 5):
+			self.assert_parallel_tokens_match(text, jobs)
+
+	def test_splits_that_disagree(self):
+		#Chunks split where the whole text has no sentence boundary (initials, numbers, paragraphs without terminal
+		#punctuation) or inside a ". . ." word token are joined again
+		for s in (
+			'A b. c d. E f.\n\ng h. . . i j. K l.', 'a. b. c. d. e. f. g. h.', 'I. Word. J. K. Smith. x 3. 5. y.',
+			'  Ab. Cd.  ', 'a b.) C d. e f. "G h." i.', 'a b\n\nc d\n\ne f.\n\n', 'a b c. . . d e f. g h. . i j.', '',
+		):
+			for jobs in range(2, 9):
+				self.assert_parallel_tokens_match(s, jobs)
+
+	def test_chunk_ends_change_earlier_tokens(self):
+		#Punkt takes the end of a chunk for the end of the text, which can change more than the last token of the chunk
+		serial = textual_feature.ExtractionSession(terminal_punctuation=('.', ';', '?'))
+		session = textual_feature.ExtractionSession(terminal_punctuation=('.', ';', '?'))
+		session.set_tokenize_jobs(2, min_chars=0)
+		for s in ('ab cd. etc.; ef gh.', 'ab cd. Mr.? ef gh.'):
+			for tokenize_type in ('compact_sentences', 'compact_words'):
+				self.assertEqual(
+					list(session.tokenize_types[tokenize_type]['func'](s)),
+					list(serial.tokenize_types[tokenize_type]['func'](s)), (s, tokenize_type)
+				)
+			self.assertEqual(len(session.tokenize_types['compact_sentences']['func'](s)), 3)
+
+	def test_window_depends_on_earlier_text(self):
+		#Punkt splits ";; -" after each ";", but not after ". .;; -", so a window must find the same tokens as a
+		#larger window before it is used
+		serial = textual_feature.ExtractionSession(terminal_punctuation=('.', ';', '?'))
+		session = textual_feature.ExtractionSession(terminal_punctuation=('.', ';', '?'))
+		for jobs in (2, 4):
+			session.set_tokenize_jobs(jobs, min_chars=0)
+			for s in ('. .;; -', 'ab. .;; - cd. ef; gh.'):
+				for tokenize_type in ('compact_sentences', 'compact_words'):
+					self.assertEqual(
+						list(session.tokenize_types[tokenize_type]['func'](s)),
+						list(serial.tokenize_types[tokenize_type]['func'](s)), (s, tokenize_type)
+					)
+				self.assertEqual(
+					[list(words) for words in session.tokenize_types['compact_sentence_words']['func'](s)],
+					[list(words) for words in serial.tokenize_types['compact_sentence_words']['func'](s)], s
+				)
+
+	def test_chunk_bounds(self):
+		splitter = parallel_tokenize.split_regex(('.', ';'))
+		s = 'a b. c d; e f. . . g\n\nh i'
+		self.assertEqual(parallel_tokenize.chunk_bounds(s, 1, splitter), [0, len(s)])
+		bounds = parallel_tokenize.chunk_bounds(s, 20, splitter)
+		self.assertEqual([s[start] for start in bounds[1:-1]], ['c', 'e', 'g', 'h'])
+
+	def test_invalid_settings(self):
+		self.assertRaises(ValueError, textual_feature.set_tokenize_jobs, 0)
+		self.assertRaises(ValueError, textual_feature.set_tokenize_jobs, 2, min_chars=-1)
+
 '''
 #Plutarch Camillus
 "οὐ μὴν π.,ρῆκεν αὐτῷ τὴν ἀρχὴν ὁ δῆμος, ἀλλὰ  βοῶν μήτε ἱππεύοντος αὐτοῦ μήτε ὁπλομαχοῦντος ἐν τοῖς ἀγῶσι δεῖσθαι, βουλευομένου δὲ μόνον καί προστάττοντος, ἠνάγκασεν ὑποστῆναι τὴν στρατηγίαν καί μεθ' ἑνὸς τῶν συναρχόντων Λευκίου Φουρίου τὸν στρατὸν ἄγειν εὐθὺς ἐπὶ τοὺς πολεμίους."